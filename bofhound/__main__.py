@@ -1,9 +1,13 @@
 """Entry point for bofhound CLI application."""
 import sys
+import time
 import logging
+from datetime import datetime
 import typer
-from bofhound.parsers import ParserType, ParsingPipelineFactory
+from bofhound.parsers import ParserType, ParsingPipelineFactory, ParsingResult, ObjectType
 from bofhound.parsers.data_sources import FileDataSource, MythicDataSource, OutflankDataStream
+from bofhound.parsers.parse_cache import ParseCache
+from bofhound.parsers.log_watcher import LogWatcher
 from bofhound.writer import BloodHoundWriter
 from bofhound.uploader import BloodHoundUploader
 from bofhound.ad import ADDS
@@ -44,6 +48,39 @@ def main(
         help="Compress the JSON output files into a zip archive"
     ),
     quiet: bool = typer.Option(False, "--quiet", "-q", help="Suppress banner"),
+    since: datetime = typer.Option(
+        None, "--since", formats=["%Y-%m-%d"],
+        help=("Skip log directories named for days before this date (e.g. Cobalt Strike's "
+              "261001), YYYY-MM-DD")
+    ),
+    jobs: int = typer.Option(
+        1, "--jobs", "-j", min=0,
+        help="Number of worker processes used to parse log files in parallel (0 for all cores)"
+    ),
+    acl_jobs: int = typer.Option(
+        None, "--acl-jobs", min=0,
+        help=("Number of worker processes used to parse ACLs in parallel (0 for all cores, "
+              "defaults to --jobs)")
+    ),
+    watch: bool = typer.Option(
+        False, "--watch", "-w",
+        help="Keep running, parse new log output as it is written and regenerate the JSON files",
+        rich_help_panel="Watch Options"
+    ),
+    watch_interval: float = typer.Option(
+        2.0, "--watch-interval", min=0.1, help="Seconds between checks for new log output",
+        rich_help_panel="Watch Options"
+    ),
+    watch_debounce: float = typer.Option(
+        10.0, "--watch-debounce", min=0,
+        help="Seconds without new records before the JSON files are regenerated",
+        rich_help_panel="Watch Options"
+    ),
+    cache_dir: str = typer.Option(
+        None, "--cache-dir",
+        help=("Directory to cache parsed records in, so later runs only parse new log output "
+              "(not used with --jobs)")
+    ),
     mythic_server: str = typer.Option(
         "127.0.0.1", "--mythic-server", help="IP or hostname of Mythic server to connect to",
         rich_help_panel="Mythic Options"
@@ -76,6 +113,10 @@ def main(
     if not quiet:
         banner()
 
+    since_date = since.date() if since is not None else None
+    if acl_jobs is None:
+        acl_jobs = jobs
+
      # default to Cobalt logfile naming format
     data_source = None
 
@@ -83,28 +124,27 @@ def main(
 
         case ParserType.LdapsearchBof:
             logger.debug("Using ldapsearch parser")
-            data_source = FileDataSource(str(input_files), "beacon*.log")
-
-            # if no CS logs were found, search for pyldapsearch logs or SoaPy logs
-            if len(list(data_source.get_data_streams())) == 0:
-                data_source = FileDataSource(str(input_files), "*.log")
+            # if no CS logs are found, search for pyldapsearch logs or SoaPy logs
+            data_source = FileDataSource(
+                str(input_files), "beacon*.log", fallback_pattern="*.log", since=since_date
+            )
 
         case ParserType.BRC4:
             logger.debug("Using Brute Ratel parser")
             if input_files == "/opt/cobaltstrike/logs":
                 input_files = "/opt/bruteratel/logs"
-            data_source = FileDataSource(str(input_files), "b-*.log")
+            data_source = FileDataSource(str(input_files), "b-*.log", since=since_date)
 
         case ParserType.HAVOC:
             logger.debug("Using Havoc parser")
             if input_files == "/opt/cobaltstrike/logs":
                 input_files = "/opt/havoc/data/loot"
-            data_source = FileDataSource(str(input_files), "Console_*.log")
+            data_source = FileDataSource(str(input_files), "Console_*.log", since=since_date)
 
         case ParserType.OUTFLANKC2:
             logger.debug("Using OutflankC2 parser")
             data_source = FileDataSource(
-                str(input_files), "*.json", stream_type=OutflankDataStream
+                str(input_files), "*.json", stream_type=OutflankDataStream, since=since_date
             )
 
         case ParserType.MYTHIC:
@@ -113,28 +153,72 @@ def main(
                 logger.error("Mythic server and API token must be provided")
                 sys.exit(-1)
             data_source = MythicDataSource(mythic_server, mythic_token)
+            if jobs != 1:
+                # Mythic records can span task outputs, so they must be parsed in order
+                logger.warning("--jobs is not supported with the Mythic parser, ignoring")
+                jobs = 1
 
         case _:
             raise ValueError(f"Unknown parser type: {parser_type}")
 
+    if watch:
+        if not isinstance(data_source, FileDataSource):
+            logger.error("--watch is only supported for log files")
+            sys.exit(-1)
+        watch_logs(
+            data_source, parser_type, watch_interval, watch_debounce,
+            lambda results: write_output(
+                ADDS(), results, output_folder, properties_level, zip_files,
+                bh_server, bh_token_id, bh_token_key, acl_jobs
+            )
+        )
+        return
+
     ad = ADDS()
-    broker = LocalBroker()
     pipeline = ParsingPipelineFactory.create_pipeline(parser_type=parser_type)
+    # Stage LDAP objects as they're parsed so raw attributes don't pile up in memory,
+    # write_output builds their models
+    pipeline.register_sink(ObjectType.LDAP_OBJECT, ad.stage_object)
+
+    cache = None
+    if cache_dir is not None:
+        if jobs != 1:
+            logger.warning("--cache-dir is not supported with --jobs, ignoring")
+        else:
+            cache = ParseCache(cache_dir)
 
     with console.status("", spinner="aesthetic") as status:
         results = pipeline.process_data_source(
             data_source,
-            progress_callback=lambda id: status.update(f"Processing {id}")
+            progress_callback=lambda id: status.update(f"Processing {id}"),
+            jobs=jobs,
+            cache=cache
         )
 
-    ldap_objects = results.get_ldap_objects()
+    if cache is not None:
+        logger.debug("Parse cache reused %d files, skipped %d bytes",
+                     cache.hits, cache.bytes_skipped)
+
+    write_output(ad, results, output_folder, properties_level, zip_files,
+                 bh_server, bh_token_id, bh_token_key, acl_jobs)
+
+
+def write_output(ad: ADDS, results: ParsingResult, output_folder: str,
+                 properties_level: PropertiesLevel, zip_files: bool,
+                 bh_server: str, bh_token_id: str, bh_token_key: str, acl_jobs: int = 1):
+    """
+    Process parsed objects and write out (and optionally upload) the BloodHound JSON
+    files. LDAP objects left in results are imported into ad first, ACLs are parsed
+    in acl_jobs worker processes.
+    """
+    ad.import_objects(results.get_ldap_objects())
+    broker = LocalBroker()
+
     local_objects = results.get_local_group_memberships() + results.get_sessions() + \
         results.get_privileged_sessions() + results.get_registry_sessions()
-    logger.info("Parsed %d LDAP objects", len(ldap_objects))
+    logger.info("Parsed %d LDAP objects", results.get_count(ObjectType.LDAP_OBJECT))
     logger.info("Parsed %d local group/session objects", len(local_objects))
-    logger.info("Sorting parsed objects by type...")
 
-    ad.import_objects(ldap_objects)
     broker.import_objects(results, ad.DOMAIN_MAP.values())
 
     logger.info("Parsed %d Users", len(ad.users))
@@ -160,7 +244,7 @@ def main(
     logger.info("Parsed %d Registry Sessions", len(broker.registry_sessions))
     logger.info("Parsed %d Local Group Memberships", len(broker.local_group_memberships))
 
-    ad.process()
+    ad.process(acl_jobs=acl_jobs)
     ad.process_local_objects(broker)
 
     #
@@ -203,6 +287,44 @@ def main(
         logger.info("Files uploaded to BloodHound server")
 
 
+
+def watch_logs(data_source: FileDataSource, parser_type: ParserType, interval: float,
+               debounce: float, write_output_callback):
+    """
+    Keep parsing output appended to the input logs and regenerate the BloodHound files
+    once no new records have arrived for debounce seconds. Stops on Ctrl+C.
+    """
+    parsers = ParsingPipelineFactory.create_pipeline(parser_type=parser_type).tool_parsers
+    watcher = LogWatcher(data_source, parsers)
+    results = ParsingResult()
+    pending = False
+    last_change = 0.0
+
+    logger.info("Watching %s for new log output, press Ctrl+C to stop", data_source.input_path)
+    try:
+        while True:
+            new_results = watcher.poll()
+            for obj_type, objects in new_results.objects_by_type.items():
+                if objects:
+                    results.add_objects(obj_type, objects)
+                    pending = True
+                    last_change = time.monotonic()
+
+            if pending and time.monotonic() - last_change >= debounce:
+                write_output_callback(results)
+                pending = False
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        # Finish records still in progress, as a run that reached the end of the logs would
+        for parser in watcher.parsers:
+            records = parser.get_results()
+            if records:
+                results.add_objects(parser.produces_object_type, records)
+                pending = True
+        if pending:
+            write_output_callback(results)
+
+
 def banner():
     """Display the bofhound banner."""
     print('''
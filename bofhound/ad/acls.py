@@ -0,0 +1,382 @@
+"""Turns nTSecurityDescriptors into BloodHound ACE relations, in this process or in a
+pool of worker processes."""
+import time
+import hashlib
+from uuid import UUID
+from typing import Dict, List, Optional, Tuple
+from impacket.uuid import string_to_bin
+from bloodhound.ad.utils import ADUtils
+from bloodhound.enumeration.acls import ACCESS_MASK, ACE, EXTRIGHTS_GUID_MAPPING
+from bofhound.ad.models import BloodHoundObject
+from bofhound.ad.security_descriptor import (
+    decode_security_descriptor, format_sid, SE_DACL_PROTECTED
+)
+from bofhound.logger import logger
+
+#
+# Add a GUID for enroll to the bloodhound-python mapping we imported
+#
+EXTRIGHTS_GUID_MAPPING["Enroll"] = string_to_bin("0e10c968-78fb-11d2-90d4-00c04f79dc55")
+EXTRIGHTS_GUID_MAPPING["MembershipPropertySet"] = string_to_bin("bc0ac240-79a9-11d0-9020-00c04fc2d4cf")
+
+ALL_GUID = string_to_bin("00000000-0000-0000-0000-000000000000")
+
+GENERIC_ALL = ACCESS_MASK.GENERIC_ALL
+GENERIC_WRITE = ACCESS_MASK.GENERIC_WRITE
+WRITE_DACL = ACCESS_MASK.WRITE_DACL
+WRITE_OWNER = ACCESS_MASK.WRITE_OWNER
+WRITE_PROP = ACCESS_MASK.ADS_RIGHT_DS_WRITE_PROP
+SELF = ACCESS_MASK.ADS_RIGHT_DS_SELF
+CONTROL_ACCESS = ACCESS_MASK.ADS_RIGHT_DS_CONTROL_ACCESS
+
+INHERITED_ACE = ACE.INHERITED_ACE
+INHERIT_ONLY_ACE = ACE.INHERIT_ONLY_ACE
+
+# Creator Owner, Local System and Principal Self
+IGNORED_SIDS = frozenset(["S-1-3-0", "S-1-5-18", "S-1-5-10"])
+
+#
+# ACE rules, as (entry types, ObjectType, right). The ObjectType is the GUID bytes, or
+# a schema attribute name looked up in ObjectTypeGuidMap. Rules are checked in this
+# order and only for ACCESS_ALLOWED_OBJECT_ACEs whose ObjectType matches.
+#
+# ADS_RIGHT_DS_WRITE_PROP on a property
+WRITE_PROPERTY_RULES = [
+    # AddMember should only fire for the member GUID or the MembershipPropertySet GUID (SharpHound semantics)
+    (['group'], EXTRIGHTS_GUID_MAPPING['WriteMember'], 'AddMember'),
+    (['group'], EXTRIGHTS_GUID_MAPPING['MembershipPropertySet'], 'AddMember'),
+    (['computer'], EXTRIGHTS_GUID_MAPPING['AllowedToAct'], 'AddAllowedToAct'),
+    # Property set, Domain Admins are ignored since they already have enough privileges anyway
+    (['computer', 'user'], EXTRIGHTS_GUID_MAPPING['UserAccountRestrictionsSet'], 'WriteAccountRestrictions'),
+    (['ou', 'domain'], EXTRIGHTS_GUID_MAPPING['WriteGPLink'], 'WriteGPLink'),
+    # Since 4.0
+    (['user', 'computer'], 'ms-ds-key-credential-link', 'AddKeyCredentialLink'),
+    (['user', 'computer'], string_to_bin('f3a64788-5306-11d1-a9c5-0000f80367c1'), 'WriteSPN'),
+    # Rights for certificate templates
+    (['pki template'], string_to_bin('ea1dddc4-60ff-416e-8cc0-17cee534bce7'), 'WritePKINameFlag'),
+    (['pki template'], string_to_bin('d15ef7d8-f226-46db-ae79-b34e560bd12c'), 'WritePKIEnrollmentFlag'),
+]
+# ADS_RIGHT_DS_SELF without ADS_RIGHT_DS_WRITE_PROP, SharpHoundCommon accepts WriteMember,
+# MembershipPropertySet, or AllGuid
+SELF_WRITE_RULES = [
+    (['group'], ALL_GUID, 'AddSelf'),
+    (['group'], EXTRIGHTS_GUID_MAPPING['WriteMember'], 'AddSelf'),
+    (['group'], EXTRIGHTS_GUID_MAPPING['MembershipPropertySet'], 'AddSelf'),
+]
+# ADS_RIGHT_DS_CONTROL_ACCESS for an extended right
+EXTENDED_RIGHT_RULES = [
+    (['domain'], EXTRIGHTS_GUID_MAPPING['GetChanges'], 'GetChanges'),
+    (['domain'], EXTRIGHTS_GUID_MAPPING['GetChangesAll'], 'GetChangesAll'),
+    (['domain'], EXTRIGHTS_GUID_MAPPING['GetChangesInFilteredSet'], 'GetChangesInFilteredSet'),
+    (['user', 'computer'], EXTRIGHTS_GUID_MAPPING['UserForceChangePassword'], 'ForceChangePassword'),
+    (['pki template', 'enterpriseca'], EXTRIGHTS_GUID_MAPPING['Enroll'], 'Enroll'),
+]
+# SharpHoundCommon-style LAPS edge: the LAPS attribute GUIDs are treated as the relevant
+# extended right, only on computers that have LAPS
+LAPS_RULES = [
+    (['computer'], 'ms-mcs-admpwd', 'ReadLAPSPassword'),
+    (['computer'], 'ms-laps-password', 'ReadLAPSPassword'),
+    (['computer'], 'ms-laps-encryptedpassword', 'ReadLAPSPassword'),
+]
+
+# Entry types that get GenericWrite from a property write ACE without ObjectType
+GENERIC_WRITE_TYPES = ['user', 'group', 'computer', 'gpo', 'ou', 'domain', 'pki template',
+                       'enterpriseca', 'rootca', 'aiaca', 'ntauthstore', 'issuancepolicy']
+# Same for ACCESS_ALLOWED_ACEs
+ALLOWED_ACE_GENERIC_WRITE_TYPES = ['user', 'group', 'computer', 'gpo', 'ou']
+
+# (principal SID, right name, inherited)
+Relation = Tuple[str, str, bool]
+
+
+def guid_to_bytes(guid: Optional[str]) -> Optional[bytes]:
+    """
+    Convert an ObjectTypeGuidMap GUID string to the bytes found in ACEs. None for GUIDs
+    that aren't in the lowercase form ACE GUIDs were compared with, they never match.
+    """
+    try:
+        uuid = UUID(guid)
+    except (TypeError, ValueError, AttributeError):
+        return None
+    return uuid.bytes_le if str(uuid) == guid else None
+
+
+class EntryRules:
+    """The ACE rules that can apply to objects of one entry type, with GUIDs as bytes"""
+
+    def __init__(self, entry_type: str, has_laps: bool, guids: "AceRules"):
+        entry_type = entry_type.lower()
+        # InheritedObjectType an inherited ACE needs to apply to this entry type,
+        # None if the type's schema GUID isn't known
+        self.object_class = guids.guid(entry_type)
+        self.generic_write = entry_type in GENERIC_WRITE_TYPES
+        # Don't stop at GenericWrite on the domain and computers, since BloodHound reports
+        # duplicate rights as well, and this might influence some queries
+        self.generic_write_stops = entry_type not in ('domain', 'computer')
+        self.all_extended_rights = entry_type in ('user', 'domain') \
+            or entry_type == 'computer' and has_laps
+        self.write_property = self._compile(WRITE_PROPERTY_RULES, entry_type, guids)
+        self.self_write = self._compile(SELF_WRITE_RULES, entry_type, guids)
+        self.extended_rights = self._compile(
+            (LAPS_RULES if has_laps else []) + EXTENDED_RIGHT_RULES, entry_type, guids)
+
+        # ACCESS_ALLOWED_ACE rules
+        self.allowed_generic_write = entry_type in ALLOWED_ACE_GENERIC_WRITE_TYPES
+        self.allowed_all_extended_rights = entry_type in ('user', 'domain')
+        self.allowed_computer_all_extended_rights = entry_type == 'computer'
+
+    @staticmethod
+    def _compile(rules, entry_type: str, guids: "AceRules") -> Dict[bytes, Tuple[str, ...]]:
+        """Map each ObjectType the rules match on entry_type to the rights it gives"""
+        table = {}
+        for entry_types, guid, right in rules:
+            if entry_type not in entry_types:
+                continue
+            if isinstance(guid, str):
+                guid = guids.guid(guid)
+                if guid is None:
+                    continue
+            if right not in table.get(guid, ()):
+                table[guid] = table.get(guid, ()) + (right,)
+        return table
+
+
+class AceRules:
+    """
+    Dispatch table of EntryRules by entry type and haslaps, compiled on first use.
+    The ObjectTypeGuidMap GUIDs the rules use are converted to bytes once.
+    """
+
+    def __init__(self, object_type_guid_map: Dict[str, str]):
+        self.object_type_guid_map = object_type_guid_map
+        self._guids: Dict[str, Optional[bytes]] = {}
+        self._entries: Dict[Tuple[str, bool], EntryRules] = {}
+
+    def guid(self, name: str) -> Optional[bytes]:
+        """Return the schemaIDGUID bytes of a class or attribute, None if unknown"""
+        if name not in self._guids:
+            self._guids[name] = guid_to_bytes(self.object_type_guid_map.get(name))
+        return self._guids[name]
+
+    def for_entry(self, entry_type: str, has_laps: bool) -> EntryRules:
+        """Return the rules for objects of entry_type"""
+        rules = self._entries.get((entry_type, has_laps))
+        if rules is None:
+            rules = self._entries[(entry_type, has_laps)] = EntryRules(entry_type, has_laps, self)
+        return rules
+
+
+def parse_security_descriptor(value: bytes, entry_type: str, has_laps: bool,
+                              rules: AceRules) -> Tuple[bool, List[Relation]]:
+    """
+    Walk the ACEs of a binary security descriptor and return whether its DACL is
+    protected, and the relations BloodHound cares about for an object of entry_type.
+    Principal SIDs are returned as they appear in the descriptor.
+    """
+    entry = rules.for_entry(entry_type, has_laps)
+    control, owner_sid, aces = decode_security_descriptor(value)
+    # Check for protected DACL flag
+    is_acl_protected = bool(control & SE_DACL_PROTECTED)
+    relations = []
+    append = relations.append
+
+    # Parse owner
+    if owner_sid is not None:
+        osid = format_sid(owner_sid)
+        if osid not in IGNORED_SIDS:
+            append((osid, 'Owns', False))
+
+    for ace_type, ace_flags, mask, object_type, inherited_object_type, sid_bytes in aces:
+        # ACCESS_ALLOWED_OBJECT_ACE and ACCESS_ALLOWED_ACE are the only two aces we care about
+        if ace_type != 0x05 and ace_type != 0x00:
+            continue
+        sid = format_sid(sid_bytes)
+        if sid in IGNORED_SIDS:
+            continue
+        is_inherited = ace_flags & INHERITED_ACE == INHERITED_ACE
+        if not is_inherited and ace_flags & INHERIT_ONLY_ACE == INHERIT_ONLY_ACE:
+            # ACE is set on this object, but only inherited, so not applicable to us
+            continue
+
+        if ace_type == 0x00:
+            if mask & GENERIC_ALL == GENERIC_ALL:
+                # Generic all includes all other rights, so skip from here
+                append((sid, 'GenericAll', is_inherited))
+                continue
+            # Genericwrite is only for properties, don't skip after
+            if mask & WRITE_PROP == WRITE_PROP and entry.allowed_generic_write:
+                append((sid, 'GenericWrite', is_inherited))
+            if mask & WRITE_OWNER == WRITE_OWNER:
+                append((sid, 'WriteOwner', is_inherited))
+            if mask & CONTROL_ACCESS == CONTROL_ACCESS:
+                if entry.allowed_all_extended_rights:
+                    append((sid, 'AllExtendedRights', is_inherited))
+                if entry.allowed_computer_all_extended_rights and sid != "S-1-5-32-544" \
+                    and not sid.endswith('-512'):
+                    append((sid, 'AllExtendedRights', is_inherited))
+            if mask & WRITE_DACL == WRITE_DACL:
+                append((sid, 'WriteDacl', is_inherited))
+            continue
+
+        # Check if the ACE has restrictions on object type (inherited case). If the
+        # entry type's GUID isn't known, skip the ACE to avoid false positives
+        if is_inherited and inherited_object_type is not None \
+            and inherited_object_type != entry.object_class:
+            continue
+
+        # SharpHoundCommon semantics: only treat GenericAll/GenericWrite/WriteDacl/WriteOwner
+        # as *generic edges* if the ACE ObjectType is empty or AllGuid. If ObjectType is set
+        # to a specific GUID (property / extended right), specific edges may still apply.
+        generic_edge_applicable = object_type is None or object_type == ALL_GUID
+        if generic_edge_applicable:
+            # Check from high to low, ignore lower privs which may also match the bitmask
+            if mask & GENERIC_ALL == GENERIC_ALL:
+                # GenericAll includes all other rights, so skip from here (for generic-edge ACEs only)
+                append((sid, 'GenericAll', is_inherited))
+                continue
+            if mask & GENERIC_WRITE == GENERIC_WRITE:
+                append((sid, 'GenericWrite', is_inherited))
+                if entry.generic_write_stops:
+                    continue
+            # These are specific bitmasks so don't break the loop from here
+            if mask & WRITE_DACL == WRITE_DACL:
+                append((sid, 'WriteDacl', is_inherited))
+            if mask & WRITE_OWNER == WRITE_OWNER:
+                append((sid, 'WriteOwner', is_inherited))
+
+        # Property write privileges
+        if mask & WRITE_PROP == WRITE_PROP:
+            if generic_edge_applicable and entry.generic_write:
+                append((sid, 'GenericWrite', is_inherited))
+            if object_type is not None and entry.write_property:
+                for right in entry.write_property.get(object_type, ()):
+                    if right == 'WriteAccountRestrictions' and sid.endswith('-512'):
+                        continue
+                    append((sid, right, is_inherited))
+        elif mask & SELF == SELF:
+            # Self add - since 4.0
+            if object_type is not None and entry.self_write:
+                for right in entry.self_write.get(object_type, ()):
+                    append((sid, right, is_inherited))
+
+        # Extended rights
+        if mask & CONTROL_ACCESS == CONTROL_ACCESS:
+            if generic_edge_applicable and entry.all_extended_rights:
+                append((sid, 'AllExtendedRights', is_inherited))
+            if object_type is not None and entry.extended_rights:
+                for right in entry.extended_rights.get(object_type, ()):
+                    append((sid, right, is_inherited))
+
+    return is_acl_protected, relations
+
+
+def build_relation(sid: str, relation: str, inherited: bool, dn: str,
+                   sid_types: Dict[str, str]) -> dict:
+    """
+    Build the Aces entry for a relation on the object with the given DN. Well-known
+    SIDs are prefixed with the object's domain, sid_types gives the type of known principals.
+    """
+    PrincipalSid = BloodHoundObject.get_sid(sid, dn)
+
+    if sid in sid_types:
+        PrincipalType = sid_types[sid]
+    elif sid in ADUtils.WELLKNOWN_SIDS:
+        PrincipalType = ADUtils.WELLKNOWN_SIDS[sid][1].title()
+    else:
+        PrincipalType = "Unknown"
+
+    return {'RightName': relation, 'PrincipalSID': PrincipalSid, 'IsInherited': inherited, 'PrincipalType': PrincipalType }
+
+
+class AclCache:
+    """
+    Content-addressed cache of parsed security descriptors. Most objects share their
+    descriptor with many others (they inherit the same ACL from their OU), so each
+    distinct (descriptor, entry type, haslaps) is parsed once. Relations are cached with
+    principal SIDs as they appear in the descriptor and built per object from there.
+    """
+
+    def __init__(self, object_type_guid_map: Dict[str, str]):
+        self.rules = AceRules(object_type_guid_map)
+        self._results: Dict[tuple, Optional[Tuple[bool, List[Relation]]]] = {}
+        self.lookups = 0
+        self.misses = 0
+        self.parse_seconds = 0.0
+
+    @staticmethod
+    def key(value: bytes, entry_type: str, has_laps: bool) -> tuple:
+        """Return the cache key of a descriptor on an object of entry_type"""
+        return hashlib.blake2b(value, digest_size=16).digest(), entry_type, has_laps
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._results
+
+    def get(self, key: tuple) -> Optional[Tuple[bool, List[Relation]]]:
+        """Return the stored result for key, None if the descriptor couldn't be parsed"""
+        self.lookups += 1
+        return self._results[key]
+
+    def store(self, key: tuple, result: Optional[Tuple[bool, List[Relation]]],
+              seconds: float) -> None:
+        """Keep the result of parsing a descriptor, and how long parsing it took"""
+        self._results[key] = result
+        self.misses += 1
+        self.parse_seconds += seconds
+
+    def parse(self, value: bytes, entry_type: str,
+              has_laps: bool) -> Optional[Tuple[bool, List[Relation]]]:
+        """Parse a descriptor unless an identical one was parsed before"""
+        key = self.key(value, entry_type, has_laps)
+        if key not in self._results:
+            self.store(key, *parse_descriptor_timed(value, entry_type, has_laps, self.rules))
+        return self.get(key)
+
+    @property
+    def hits(self) -> int:
+        """Number of lookups that reused a parsed descriptor"""
+        return self.lookups - self.misses
+
+    def log_stats(self) -> None:
+        """Report the hit rate and the parsing time it saved in debug output"""
+        if not self.lookups:
+            return
+        saved = self.hits * self.parse_seconds / self.misses if self.misses else 0.0
+        logger.debug(
+            "ACL cache: %d of %d security descriptors were duplicates (%.1f%%), "
+            "%d parsed in %.2fs, saving about %.2fs",
+            self.hits, self.lookups, 100 * self.hits / self.lookups,
+            self.misses, self.parse_seconds, saved
+        )
+
+
+def parse_descriptor_timed(value: bytes, entry_type: str, has_laps: bool, rules: AceRules):
+    """
+    Return parse_security_descriptor's result, None if the descriptor can't be parsed,
+    and the seconds it took
+    """
+    start = time.perf_counter()
+    try:
+        result = parse_security_descriptor(value, entry_type, has_laps, rules)
+    except Exception: # pylint: disable=broad-except
+        # Objects whose ACL fails to parse are skipped
+        result = None
+    return result, time.perf_counter() - start
+
+
+#
+# Worker process side of ADDS.process(acl_jobs=N). ObjectTypeGuidMap is sent once per
+# worker by the pool initializer instead of with every task.
+#
+_worker_rules = AceRules({})
+
+
+def init_acl_worker(object_type_guid_map: Dict[str, str]) -> None:
+    """Pool initializer, compiles the ACE rules shared by every task"""
+    global _worker_rules # pylint: disable=global-statement
+    _worker_rules = AceRules(object_type_guid_map)
+
+
+def parse_descriptor_task(task: Tuple[bytes, str, bool]):
+    """Parse one (descriptor, entry type, haslaps) task, see parse_descriptor_timed"""
+    value, entry_type, has_laps = task
+    return parse_descriptor_timed(value, entry_type, has_laps, _worker_rules)
@@ -1,13 +1,10 @@
+import os
 import re
 import base64
-from io import BytesIO
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List
-from impacket.uuid import string_to_bin
 from bloodhound.ad.utils import ADUtils
-from bloodhound.enumeration.acls import (
-    SecurityDescriptor, ACCESS_MASK, ACE, ACCESS_ALLOWED_OBJECT_ACE,
-    has_extended_right, EXTRIGHTS_GUID_MAPPING, can_write_property, ace_applies
-)
 from bofhound.logger import logger
 from bofhound.ad.models import (
     BloodHoundComputer, BloodHoundDomain, BloodHoundGroup, BloodHoundObject, BloodHoundSchema,
@@ -15,14 +12,13 @@ from bofhound.ad.models import (
     BloodHoundRootCA, BloodHoundNTAuthStore, BloodHoundIssuancePolicy, BloodHoundCertTemplate,
     BloodHoundContainer, BloodHoundDomainTrust, BloodHoundCrossRef, BloodHoundDnsNode
 )
+from bofhound.ad.helpers import DNTable, parse_dn, domain_to_dn
+from bofhound.ad.acls import AclCache, build_relation, init_acl_worker, parse_descriptor_task
 from bofhound.logger import OBJ_EXTRA_FMT, ColorScheme
 from bofhound import console
 
-#
-# Add a GUID for enroll to the bloodhound-python mapping we imported
-#
-EXTRIGHTS_GUID_MAPPING["Enroll"] = string_to_bin("0e10c968-78fb-11d2-90d4-00c04f79dc55")
-EXTRIGHTS_GUID_MAPPING["MembershipPropertySet"] = string_to_bin("bc0ac240-79a9-11d0-9020-00c04fc2d4cf")
+# Security descriptors sent to an ACL worker at a time
+ACL_CHUNK_SIZE = 256
 
 class ADDS():
 
@@ -43,6 +39,11 @@ class ADDS():
         self.sid = None
         self.SID_MAP = {} # {sid: BofHoundModel}
         self.DN_MAP = {} # {dn: BofHoundModel}
+        # IDs of every DN seen in an object's DN or membership. Membership lists are
+        # stored as array('I') of these IDs, see intern_dns
+        self.DN_TABLE = DNTable()
+        self.NAME_MAP = {} # {name or dnshostname, lowercase: BofHoundModel}
+        self.HOSTNAME_MAP = {} # {short hostname, lowercase: [BloodHoundComputer]}
         self.DOMAIN_MAP = {} # {dc: ObjectIdentifier}
         self.CROSSREF_MAP = {} # { netBiosName: BofHoundModel }
         self.DNSNODE_MAP = {} # { dnsHostname: set(ipaddress) }
@@ -64,170 +65,310 @@ class ADDS():
         self.trusts: list[BloodHoundDomainTrust] = []
         self.trustaccounts: list[BloodHoundUser] = []
         self.unknown_objects: list[dict] = []
+        # Objects whose models stage_object hasn't built yet, as [attributes, model class,
+        # list, attributes copied], by DN and SID
+        self._staged = []
+        self._STAGED_DN_MAP = {} # {DN: staged object}
+        self._STAGED_SID_MAP = {} # {sid: staged object}
+        # Objects that can contain others, by DN ID. Built by build_parent_maps()
+        self.CONTAINER_DN_MAP = {} # {dn ID: BloodHoundContainer}
+        self.OU_DN_MAP = {} # {dn ID: BloodHoundOU}
+        self.DOMAIN_DN_MAP = {} # {dn ID: BloodHoundDomain}
+        self.UNKNOWN_DN_MAP = {} # {dn ID: [{}]}
+        # Computers and users by the names DNS nodes and local objects use. Built by
+        # build_computer_indexes() and build_local_object_indexes()
+        self.COMPUTER_DNSHOSTNAME_MAP = {} # {DNSHOSTNAME: [BloodHoundComputer]}
+        self.COMPUTER_SAMACCOUNTNAME_MAP = {} # {SAMACCOUNTNAME: [BloodHoundComputer]}
+        self.COMPUTER_DOMAIN_SAMACCOUNTNAME_MAP = {} # {(domainsid, SAMACCOUNTNAME): [BloodHoundComputer]}
+        self.USER_SAMACCOUNTNAME_MAP = {} # {samaccountname: [BloodHoundUser]}
+        self.USER_DOMAIN_SAMACCOUNTNAME_MAP = {} # {(domainsid, samaccountname): BloodHoundUser}
+        self.NETBIOS_DOMAIN_SID_MAP = {} # {NETBIOSNAME: domainsid}
+        # Groups by how their members refer to them. Built by build_membership_index()
+        self.GROUPS_BY_MEMBER_DN = {} # {member DN ID: [BloodHoundGroup]}, from member
+        self.GROUPS_BY_MEMBER_SID = {} # {foreign security principal SID: [BloodHoundGroup]}
+        self.GROUP_DN_MAP = {} # {group DN ID: BloodHoundGroup}, for memberOf
+        self.GROUP_SID_MAP = {} # {group SID: BloodHoundGroup}, for primary groups
+        # Built by assign_ip_addresses()
+        self.IP_MAP = {} # {ipaddress: [BloodHoundComputer]}
+        self._computer_positions = {} # {id(BloodHoundComputer): index in self.computers}
 
     def import_objects(self, objects):
         """Parse a list of dictionaries representing attributes of an AD object
-            and add or merge them into appropriate lists of objects in the ADDS instance
+            and add or merge them into appropriate lists of objects in the ADDS instance.
+            The attributes of an object seen several times are merged before its model
+            is built, see stage_object. The dictionaries aren't changed, models are
+            built from copies of them, so the same objects can be imported again
 
         objects: [] of {} containing attributes for AD objects
         """
 
         for object in objects:
-            # check if object is a schema - exception for normally required attributes
-            schemaIdGuid = object.get(ADDS.AT_SCHEMAIDGUID, None)
-            if schemaIdGuid:
-                new_schema = BloodHoundSchema(object)
-                if new_schema.SchemaIdGuid is not None:
-                    self.schemas.append(new_schema)
-                    if new_schema.Name not in self.ObjectTypeGuidMap:
-                        self.ObjectTypeGuidMap[new_schema.Name] = new_schema.SchemaIdGuid
-                continue
+            self.stage_object(object)
+        self.build_staged_objects()
 
-            # check if object is a crossRef - exception for normally required attributes
-            if 'top, crossRef' in object.get(ADDS.AT_OBJECTCLASS, ''):
-                new_crossref = BloodHoundCrossRef(object)
-                if new_crossref.netBiosName is not None:
-                    if new_crossref.netBiosName not in self.CROSSREF_MAP:
-                        self.CROSSREF_MAP[new_crossref.netBiosName] = new_crossref
-                continue
 
-            # check if object is a dnsNode - exception for normally required attributes
-            if 'top, dnsNode' in object.get(ADDS.AT_OBJECTCLASS, ''):
-                new_dnsnode = BloodHoundDnsNode(object)
-                if new_dnsnode.name is not None and new_dnsnode.ipaddresses:
-                    if new_dnsnode.name not in self.DNSNODE_MAP:
-                        self.DNSNODE_MAP[new_dnsnode.name] = set()
-                    self.DNSNODE_MAP[new_dnsnode.name].update(new_dnsnode.ipaddresses)
-                continue
+    def import_object(self, object):
+        """Parse a dictionary representing attributes of an AD object
+            and add or merge it into the appropriate list of objects in the ADDS instance.
+            The dictionary isn't changed, the model is built from a copy of it
 
-            #
-            # if samaccounttype comes back as something other
-            #  than int, skip the object
-            #
-            try:
-                accountType = int(object.get(ADDS.AT_SAMACCOUNTTYPE, 0))
-            except:
-                continue
+        object: {} containing attributes for an AD object
+        """
+        if self._staged:
+            self.build_staged_objects()
 
-            target_list = None
+        if self._import_unmodelled(object):
+            return
 
-            # objectClass: top, container
-            # objectClass: top, container, groupPolicyContainer
-            # objectClass: top, organizationalUnit
+        dn = object.get(ADDS.AT_DISTINGUISHEDNAME)
+        originalObject = self.retrieve_object(dn.upper(), object.get(ADDS.AT_OBJECTID, None))
+        model, target_list = self._classify(object)
+        # models adopt their dictionary as Properties and change it
+        bhObject = model(dict(object)) if model else None
+
+        if originalObject:
+            if bhObject:
+                if isinstance(bhObject, BloodHoundDomain):
+                    self.add_domain(bhObject)
+                originalObject.merge_entry(bhObject)
+            else:
+                bhObject = BloodHoundObject(dict(object))
+                originalObject.merge_entry(bhObject)
+            # the merged entry can bring membership lists, a name or dNSHostName
+            self.intern_dns(originalObject)
+            if originalObject.ObjectIdentifier:
+                self.add_object_to_name_maps(originalObject)
+        elif bhObject:
+            self.add_model(bhObject, target_list)
+
+
+    def stage_object(self, object):
+        """Like import_object, but an object's model is only built by build_staged_objects.
+            Until then the attributes of every occurrence of the object (by DN or SID)
+            are merged into one dictionary, later non-empty values win as in merge_entry,
+            so an object returned by several queries is constructed and merged once
+
+        object: {} containing attributes for an AD object
+        """
+        if self._import_unmodelled(object):
+            return
 
-            dn = object.get(ADDS.AT_DISTINGUISHEDNAME, None)
-            sid = object.get(ADDS.AT_OBJECTID, None)
-            guid = object.get(ADDS.AT_OBJECTGUID, None)
+        dn = object.get(ADDS.AT_DISTINGUISHEDNAME).upper()
+        sid = object.get(ADDS.AT_OBJECTID, None)
+        staged = self._STAGED_DN_MAP.get(dn)
+        if staged is None and sid:
+            staged = self._STAGED_SID_MAP.get(sid)
+        if staged is None and self.retrieve_object(dn, sid):
+            # already built by an earlier import
+            self.import_object(object)
+            return
 
-            # SID and DN are required attributes for bofhound objects
-            if dn is None or (sid is None and guid is None):
-                self.unknown_objects.append(object)
-                continue
+        model, target_list = self._classify(object)
+        if staged is not None:
+            attributes = staged[0]
+            for key, value in object.items():
+                if value or key not in attributes:
+                    attributes[key] = value
+        elif model is BloodHoundDomainTrust:
+            # trusts don't have SIDs and aren't merged
+            self.add_model(model(object), target_list)
+        elif model:
+            # the model adopts the staged copy, the caller's dictionary isn't changed
+            staged = [dict(object), model, target_list]
+            self._staged.append(staged)
+            self._STAGED_DN_MAP[dn] = staged
+            if sid:
+                self._STAGED_SID_MAP[BloodHoundObject.get_sid(sid, dn)] = staged
+
+
+    def build_staged_objects(self):
+        """Build the model of every staged object, in the order they were first seen"""
+        staged, self._staged = self._staged, []
+        self._STAGED_DN_MAP = {}
+        self._STAGED_SID_MAP = {}
+        for object, model, target_list in staged:
+            self.add_model(model(object), target_list)
+
+
+    def add_model(self, bhObject, target_list):
+        """Add a newly built model to its list and the maps"""
+        if isinstance(bhObject, BloodHoundDomain):
+            self.add_domain(bhObject)
+        target_list.append(bhObject)
+        if not isinstance(bhObject, BloodHoundDomainTrust): # trusts don't have SIDs
+            self.intern_dns(bhObject)
+            self.add_object_to_maps(bhObject)
+
+
+    def _import_unmodelled(self, object):
+        """Import schemas, crossRefs and dnsNodes, and set aside objects without the
+            attributes bofhound models need. Returns True if object has no model
+        """
+        # check if object is a schema - exception for normally required attributes
+        schemaIdGuid = object.get(ADDS.AT_SCHEMAIDGUID, None)
+        if schemaIdGuid:
+            new_schema = BloodHoundSchema(object)
+            if new_schema.SchemaIdGuid is not None:
+                self.schemas.append(new_schema)
+                if new_schema.Name not in self.ObjectTypeGuidMap:
+                    self.ObjectTypeGuidMap[new_schema.Name] = new_schema.SchemaIdGuid
+            return True
+
+        # check if object is a crossRef - exception for normally required attributes
+        if 'top, crossRef' in object.get(ADDS.AT_OBJECTCLASS, ''):
+            new_crossref = BloodHoundCrossRef(object)
+            if new_crossref.netBiosName is not None:
+                if new_crossref.netBiosName not in self.CROSSREF_MAP:
+                    self.CROSSREF_MAP[new_crossref.netBiosName] = new_crossref
+            return True
+
+        # check if object is a dnsNode - exception for normally required attributes
+        if 'top, dnsNode' in object.get(ADDS.AT_OBJECTCLASS, ''):
+            new_dnsnode = BloodHoundDnsNode(object)
+            if new_dnsnode.name is not None and new_dnsnode.ipaddresses:
+                if new_dnsnode.name not in self.DNSNODE_MAP:
+                    self.DNSNODE_MAP[new_dnsnode.name] = set()
+                self.DNSNODE_MAP[new_dnsnode.name].update(new_dnsnode.ipaddresses)
+            return True
+
+        #
+        # if samaccounttype comes back as something other
+        #  than int, skip the object
+        #
+        try:
+            int(object.get(ADDS.AT_SAMACCOUNTTYPE, 0))
+        except:
+            return True
+
+        # SID and DN are required attributes for bofhound objects
+        if object.get(ADDS.AT_DISTINGUISHEDNAME, None) is None \
+            or (object.get(ADDS.AT_OBJECTID, None) is None and object.get(ADDS.AT_OBJECTGUID, None) is None):
+            self.unknown_objects.append(object)
+            return True
+
+        return False
+
+
+    def _classify(self, object):
+        """Return the model class to build for an object and the list it belongs in,
+            (None, None) if bofhound doesn't model it. Trust accounts and unknown objects
+            are set aside here
+        """
+        accountType = int(object.get(ADDS.AT_SAMACCOUNTTYPE, 0))
 
-            originalObject = self.retrieve_object(dn.upper(), sid)
-            bhObject = None
+        # objectClass: top, container
+        # objectClass: top, container, groupPolicyContainer
+        # objectClass: top, organizationalUnit
 
-            # Groups
-            if accountType in [268435456, 268435457, 536870912, 536870913]:
-                bhObject = BloodHoundGroup(object)
-                target_list = self.groups
+        # Groups
+        if accountType in [268435456, 268435457, 536870912, 536870913]:
+            return BloodHoundGroup, self.groups
 
-            # Users
-            elif object.get(ADDS.AT_MSDS_GROUPMSAMEMBERSHIP, b'') != b'' \
-                or accountType in [805306368]:
-                bhObject = BloodHoundUser(object)
-                target_list = self.users
+        # Users
+        elif object.get(ADDS.AT_MSDS_GROUPMSAMEMBERSHIP, b'') != b'' \
+            or accountType in [805306368]:
+            return BloodHoundUser, self.users
 
-            # Computers
-            elif accountType in [805306369]:
-                bhObject = BloodHoundComputer(object)
-                target_list = self.computers
+        # Computers
+        elif accountType in [805306369]:
+            return BloodHoundComputer, self.computers
 
-            # Trust Accounts
-            elif accountType in [805306370]:
-                self.trustaccounts.append(object)
+        # Trust Accounts
+        elif accountType in [805306370]:
+            self.trustaccounts.append(object)
 
-            # Other Things :)
+        # Other Things :)
+        else:
+            object_class = object.get(ADDS.AT_OBJECTCLASS, '')
+            # if 'top, domain' in object_class or 'top, builtinDomain' in object_class:
+            if 'top, domain' in object_class:
+                if 'objectsid' in object:
+                    return BloodHoundDomain, self.domains
+            # grab domain trusts
+            elif 'trustedDomain' in object_class:
+                return BloodHoundDomainTrust, self.trusts
+            # grab OUs
+            elif 'top, organizationalUnit' in object_class:
+                return BloodHoundOU, self.ous
+            elif 'container, groupPolicyContainer' in object_class:
+                return BloodHoundGPO, self.gpos
+            # grab PKIs
+            elif 'top, certificationAuthority' in object_class:
+                if 'CN=AIA,' in object.get('distinguishedname'):
+                    return BloodHoundAIACA, self.aiacas
+                elif 'CN=Certification Authorities,' in object.get('distinguishedname') :
+                    return BloodHoundRootCA, self.rootcas
+                elif object.get('distinguishedname').upper().startswith('CN=NTAUTHCERTIFICATES,CN=PUBLIC KEY SERVICES,CN=SERVICES,CN=CONFIGURATION,'):
+                    return BloodHoundNTAuthStore, self.ntauthstores
+            elif 'top, msPKI-Enterprise-Oid' in object_class:
+                # only want these if flags property is 2, ref: https://github.com/BloodHoundAD/SharpHoundCommon/blob/ea6b097927c5bb795adb8589e9a843293d36ae37/src/CommonLib/Extensions.cs#L402
+                if 'flags' in object:
+                    if object.get('flags') == '2':
+                        return BloodHoundIssuancePolicy, self.issuancepolicies
+            elif 'top, pKIEnrollmentService' in object_class:
+                return BloodHoundEnterpriseCA, self.enterprisecas
+            # grab PKI Templates
+            elif 'top, pKICertificateTemplate' in object_class:
+                return BloodHoundCertTemplate, self.certtemplates
+            elif 'top, container' in object_class:
+                if not (re.search(r'\{.*\},CN=Policies,CN=System,', object.get('distinguishedname')) or 'CN=Operations,CN=DomainUpdates,CN=System' in object.get('distinguishedname')):
+                    return BloodHoundContainer, self.containers
+            # some well known SIDs dont return the accounttype property
+            elif object.get(ADDS.AT_NAME) in ADUtils.WELLKNOWN_SIDS:
+                return self._lookup_known_sid(object.get(ADDS.AT_NAME))
+            elif object.get(ADDS.AT_COMMONNAME) in ADUtils.WELLKNOWN_SIDS:
+                return self._lookup_known_sid(object.get(ADDS.AT_COMMONNAME))
             else:
-                object_class = object.get(ADDS.AT_OBJECTCLASS, '')
-                # if 'top, domain' in object_class or 'top, builtinDomain' in object_class:
-                if 'top, domain' in object_class:
-                    if 'objectsid' in object:
-                        bhObject = BloodHoundDomain(object)
-                        self.add_domain(bhObject)
-                        target_list = self.domains
-                # grab domain trusts
-                elif 'trustedDomain' in object_class:
-                    bhObject = BloodHoundDomainTrust(object)
-                    target_list = self.trusts
-                # grab OUs
-                elif 'top, organizationalUnit' in object_class:
-                    bhObject = BloodHoundOU(object)
-                    target_list = self.ous
-                elif 'container, groupPolicyContainer' in object_class:
-                    bhObject = BloodHoundGPO(object)
-                    target_list = self.gpos
-                # grab PKIs
-                elif 'top, certificationAuthority' in object_class:
-                    if 'CN=AIA,' in object.get('distinguishedname'):
-                        bhObject = BloodHoundAIACA(object)
-                        target_list = self.aiacas
-                    elif 'CN=Certification Authorities,' in object.get('distinguishedname') :
-                        bhObject = BloodHoundRootCA(object)
-                        target_list = self.rootcas
-                    elif object.get('distinguishedname').upper().startswith('CN=NTAUTHCERTIFICATES,CN=PUBLIC KEY SERVICES,CN=SERVICES,CN=CONFIGURATION,'):
-                        bhObject = BloodHoundNTAuthStore(object)
-                        target_list = self.ntauthstores
-                elif 'top, msPKI-Enterprise-Oid' in object_class:
-                    # only want these if flags property is 2, ref: https://github.com/BloodHoundAD/SharpHoundCommon/blob/ea6b097927c5bb795adb8589e9a843293d36ae37/src/CommonLib/Extensions.cs#L402
-                    if 'flags' in object:
-                        if object.get('flags') == '2':
-                            bhObject = BloodHoundIssuancePolicy(object)
-                            target_list = self.issuancepolicies
-                elif 'top, pKIEnrollmentService' in object_class:
-                    bhObject = BloodHoundEnterpriseCA(object)
-                    target_list = self.enterprisecas
-                # grab PKI Templates
-                elif 'top, pKICertificateTemplate' in object_class:
-                    bhObject = BloodHoundCertTemplate(object)
-                    target_list = self.certtemplates
-                elif 'top, container' in object_class:
-                    if not (re.search(r'\{.*\},CN=Policies,CN=System,', object.get('distinguishedname')) or 'CN=Operations,CN=DomainUpdates,CN=System' in object.get('distinguishedname')):
-                        bhObject = BloodHoundContainer(object)
-                        target_list = self.containers
-                # some well known SIDs dont return the accounttype property
-                elif object.get(ADDS.AT_NAME) in ADUtils.WELLKNOWN_SIDS:
-                    bhObject, target_list =  self._lookup_known_sid(object, object.get(ADDS.AT_NAME))
-                elif object.get(ADDS.AT_COMMONNAME) in ADUtils.WELLKNOWN_SIDS:
-                    bhObject, target_list =  self._lookup_known_sid(object, object.get(ADDS.AT_COMMONNAME))
-                else:
-                    self.unknown_objects.append(object)
+                self.unknown_objects.append(object)
 
+        return None, None
 
-            if originalObject:
-                if bhObject:
-                    originalObject.merge_entry(bhObject)
-                else:
-                    bhObject = BloodHoundObject(object)
-                    originalObject.merge_entry(bhObject)
-            elif bhObject:
-                target_list.append(bhObject)
-                if not isinstance(bhObject, BloodHoundDomainTrust): # trusts don't have SIDs
-                    self.add_object_to_maps(bhObject)
+
+    def intern_dns(self, object:BloodHoundObject):
+        """Replace an object's DN with the DN table's instance, and its lists of
+        member and memberOf DNs with arrays of DN IDs. Lists already stored as
+        arrays are left as they are
+        """
+        dn = object.Properties.get(ADDS.AT_DISTINGUISHEDNAME)
+        if dn is not None:
+            object.Properties[ADDS.AT_DISTINGUISHEDNAME] = self.DN_TABLE.canonical(dn)
+
+        for attr in ('MemberDNs', 'MemberOfDNs'):
+            dns = getattr(object, attr, None)
+            if dns and not isinstance(dns, array):
+                setattr(object, attr, self.DN_TABLE.intern_all(dns))
 
 
     def add_object_to_maps(self, object:BloodHoundObject):
         if object.ObjectIdentifier:
             self.SID_MAP[object.ObjectIdentifier] = object
+            self.add_object_to_name_maps(object)
 
         if ADDS.AT_DISTINGUISHEDNAME in object.Properties:
            self.DN_MAP[object.Properties[ADDS.AT_DISTINGUISHEDNAME]] = object
 
 
+    def add_object_to_name_maps(self, object:BloodHoundObject):
+        """Index an object by its lowercase name, and a computer also by its short
+        hostname, for get_sid_from_name. The first object to use a name keeps it
+        """
+        name = object.Properties.get("name")
+        if name:
+            self.NAME_MAP.setdefault(name.lower(), object)
+
+        if isinstance(object, BloodHoundComputer):
+            dnshostname = object.Properties.get("dnshostname")
+            if dnshostname:
+                self.NAME_MAP.setdefault(dnshostname.lower(), object)
+                hostnames = self.HOSTNAME_MAP.setdefault(dnshostname.split('.')[0].lower(), [])
+                if object not in hostnames:
+                    hostnames.append(object)
+
+
     def add_domain(self, object:BloodHoundObject):
         if ADDS.AT_DISTINGUISHEDNAME in object.Properties and object.ObjectIdentifier:
             dn = object.Properties[ADDS.AT_DISTINGUISHEDNAME]
-            dc = BloodHoundObject.get_domain_component(dn.upper())
+            dc = parse_dn(dn.upper()).domain_component
             if dc not in self.DOMAIN_MAP:
                 self.DOMAIN_MAP[dc] = object.ObjectIdentifier
 
@@ -249,35 +390,36 @@ class ADDS():
             # check for wellknown sid
             if object.ObjectIdentifier in ADUtils.WELLKNOWN_SIDS:
                 object.Properties['domainsid'] = self.DOMAIN_MAP.get(
-                    BloodHoundObject.get_domain_component(object.Properties['distinguishedname']),
+                    parse_dn(object.Properties['distinguishedname']).domain_component,
                     f"S-????"
                 )
                 object.ObjectIdentifier = BloodHoundObject.get_sid(object.ObjectIdentifier, object.Properties['distinguishedname'])
 
 
-    def build_relation(self, object, sid, relation, acetype='', inherited=False):
-        if acetype != '':
-            raise ValueError("BH 4.0 incompatible output called")
-
-        PrincipalSid = BloodHoundObject.get_sid(sid, object.Properties["distinguishedname"])
-
-        if sid in self.SID_MAP:
-            PrincipalType = self.SID_MAP[sid]._entry_type
-        elif sid in ADUtils.WELLKNOWN_SIDS:
-            PrincipalType = ADUtils.WELLKNOWN_SIDS[sid][1].title()
-        else:
-            PrincipalType = "Unknown"
-
-        return {'RightName': relation, 'PrincipalSID': PrincipalSid, 'IsInherited': inherited, 'PrincipalType': PrincipalType }
+    def build_parent_maps(self):
+        """Index containers, OUs, domains and unknown objects by DN ID for calculate_contained.
+        Built once all objects are imported, since merging can still change an object's DN
+        """
+        intern = self.DN_TABLE.intern
+        self.CONTAINER_DN_MAP = {
+            intern(cn.Properties["distinguishedname"]): cn for cn in self.containers
+        }
+        self.OU_DN_MAP = {intern(ou.Properties["distinguishedname"]): ou for ou in self.ous}
+        self.DOMAIN_DN_MAP = {
+            intern(domain.Properties["distinguishedname"]): domain for domain in self.domains
+        }
+        self.UNKNOWN_DN_MAP = {}
+        for obj in self.unknown_objects:
+            dn_id = intern(str(obj.get('distinguishedname')).upper())
+            self.UNKNOWN_DN_MAP.setdefault(dn_id, []).append(obj)
 
     def calculate_contained(self, object):
 
         if object._entry_type == "Domain":
             return
 
-        dn = object.Properties['distinguishedname']
-        start = dn.find(',') + 1
-        contained_dn = dn[start:]
+        contained_dn = parse_dn(object.Properties['distinguishedname']).parent
+        contained_id = self.DN_TABLE.get(contained_dn)
         start_contained = contained_dn[0:2]
         type_contained = ""
         id_contained = None
@@ -288,31 +430,30 @@ class ADDS():
                     id_contained = "S-1-5-32"
                     type_contained = "Domain"
                 else:
-                    for cn in self.containers:
-                        if cn.Properties["distinguishedname"] == contained_dn:
-                            id_contained = cn.ObjectIdentifier
-                            type_contained = "Container"
+                    cn = self.CONTAINER_DN_MAP.get(contained_id)
+                    if cn is not None:
+                        id_contained = cn.ObjectIdentifier
+                        type_contained = "Container"
                     if type_contained == "":
-                        for obj in self.unknown_objects:
-                            if str(obj.get('distinguishedname')).upper() == contained_dn:
-                                id_contained = obj.get("objectguid").upper()
-                                match obj.get('objectclass'):
-                                    case 'top, NTDSService':
-                                        type_contained = "Base"
-                                    case 'top, container':
-                                        type_contained = "Container"
-                                    case 'top, configuration':
-                                        type_contained = "Configuration"
+                        for obj in self.UNKNOWN_DN_MAP.get(contained_id, []):
+                            id_contained = obj.get("objectguid").upper()
+                            match obj.get('objectclass'):
+                                case 'top, NTDSService':
+                                    type_contained = "Base"
+                                case 'top, container':
+                                    type_contained = "Container"
+                                case 'top, configuration':
+                                    type_contained = "Configuration"
             case "OU":
                 type_contained = "OU"
-                for ou in self.ous:
-                    if ou.Properties["distinguishedname"] == contained_dn:
-                        id_contained = ou.ObjectIdentifier
+                ou = self.OU_DN_MAP.get(contained_id)
+                if ou is not None:
+                    id_contained = ou.ObjectIdentifier
             case "DC":
                 type_contained = "Domain"
-                for domain in self.domains:
-                    if domain.Properties["distinguishedname"] == contained_dn:
-                        id_contained = domain.ObjectIdentifier
+                domain = self.DOMAIN_DN_MAP.get(contained_id)
+                if domain is not None:
+                    id_contained = domain.ObjectIdentifier
             case _:
                 return
 
@@ -324,28 +465,27 @@ class ADDS():
             #
             object.ContainedBy = {"ObjectIdentifier":id_contained, "ObjectType":type_contained}
 
-    def process(self):
+    def process(self, acl_jobs=1):
+        """
+        Resolve relationships between the imported objects. ACLs are parsed in acl_jobs
+        worker processes (0 for one per core), or in this process if acl_jobs is 1.
+        """
         all_objects = self.users + self.groups + self.computers + self.domains + self.ous + self.gpos + self.containers \
                         + self.aiacas + self.rootcas + self.enterprisecas + self.certtemplates + self.issuancepolicies \
                         + self.ntauthstores
 
-        total_objects = len(all_objects)
+        self.build_parent_maps()
 
-        num_parsed_relations = 0
+        for object in all_objects:
+            self.recalculate_sid(object)
+            self.calculate_contained(object)
+            self.add_domainsid_prop(object)
 
-        with console.status(f" [bold] Processed {num_parsed_relations} ACLs", spinner="aesthetic") as status:
-            for i, object in enumerate(all_objects):
-                self.recalculate_sid(object)
-                self.calculate_contained(object)
-                self.add_domainsid_prop(object)
-                try:
-                    num_parsed_relations += self.parse_acl(object)
-                    status.update(f" [bold] Processing {num_parsed_relations} ACLs --- {i}/{total_objects} objects parsed")
-                except:
-                    #
-                    # Catch the occasional error parinsing ACLs
-                    #
-                    continue
+        with console.status(" [bold] Processed 0 ACLs", spinner="aesthetic") as status:
+            if acl_jobs == 1:
+                num_parsed_relations = self.parse_acls(all_objects, status)
+            else:
+                num_parsed_relations = self.parse_acls_parallel(all_objects, acl_jobs, status)
 
         logger.info("Parsed %d ACL relationships", num_parsed_relations)
 
@@ -395,41 +535,47 @@ class ADDS():
             logger.info("Resolved hosting computers of CAs")
 
         with console.status(" [bold] Assigning IP addresses to computers", spinner="aesthetic"):
-            for host_fqdn in self.DNSNODE_MAP:
-                computer_found = False
-
-                # try to find computer object based on its dNSHostName attribute
-                for computer in self.computers:
-                    if computer.matches_dnshostname(host_fqdn):
-                        computer_found = True
-                        break
-
-                # look for a computer with samaccountname host$ and the domain's sid
-                if not computer_found:
-                    host_parts = host_fqdn.split(".")
-                    host_name = host_parts[0]
-                    host_domain = ".".join(host_parts[1:])
-                    dc = BloodHoundObject.get_dn(host_domain.upper())
-                    domain_sid = self.DOMAIN_MAP.get(dc, None)
-
-                    if domain_sid is not None:
-                        for computer in self.computers:
-                            if computer.matches_samaccountname(host_name) and computer.ObjectIdentifier.startswith(domain_sid):
-                                computer_found = True
-                                break
-
-                if not computer_found:
-                    continue
-
-                computer.ipaddresses = list(self.DNSNODE_MAP[host_fqdn])
+            self.assign_ip_addresses()
 
         logger.info("Assigned IP addresses to computers")
 
-    def get_sid_from_name(self, name):
-        for entry in self.SID_MAP:
-            if(self.SID_MAP[entry].Properties["name"].lower() == name):
-                return (entry, self.SID_MAP[entry]._entry_type)
-        return (None,None)
+    def assign_ip_addresses(self):
+        """Give each computer the addresses of its DNS node, found by dNSHostName or
+        by sAMAccountName in the node's domain, and index the computers by address
+        """
+        self.build_computer_indexes()
+
+        for host_fqdn, ipaddresses in self.DNSNODE_MAP.items():
+            domain_sid = None
+            host_name, _, host_domain = host_fqdn.partition(".")
+            if not self.COMPUTER_DNSHOSTNAME_MAP.get(host_fqdn.upper()):
+                domain_sid = self._get_domain_sid_from_dns_name(host_domain)
+
+            computers = self._find_computers(host_fqdn, host_name, domain_sid)
+            if computers:
+                computers[0].ipaddresses = list(ipaddresses)
+
+        self.IP_MAP = {}
+        for computer in self.computers:
+            for ipaddress in computer.ipaddresses:
+                self.IP_MAP.setdefault(ipaddress, []).append(computer)
+
+
+    def get_sid_from_name(self, name, domain=None):
+        """Return the SID and type of the object with the given lowercase name or
+        dNSHostName. A short hostname is matched against the first label of computers'
+        dNSHostName, preferring a computer in domain when several share it
+        """
+        object = self.NAME_MAP.get(name)
+        if object is None and '.' not in name:
+            computers = self.HOSTNAME_MAP.get(name, [])
+            object = next(
+                (c for c in computers if domain and c.Properties.get("domain") == domain),
+                computers[0] if computers else None
+            )
+        if object is None:
+            return (None,None)
+        return (object.ObjectIdentifier, object._entry_type)
 
 
     def resolve_delegation_targets(self):
@@ -442,17 +588,13 @@ class ADDS():
                 except IndexError:
                     logger.warning('Invalid delegation target: %s', host)
                     continue
-                try:
-                    (sid, object_type) = self.get_sid_from_name(target.lower())
-                    if sid and object_type:
-                        delegation_entry = {"ObjectIdentifier": sid, "ObjectType": object_type}
-                        logger.debug("Resolved delegation Host: %s, target: %s, %s", host, target, delegation_entry)
-                        resolved_delegation_list.append(delegation_entry)
-                    else:
-                        continue
-                except KeyError:
-                    if '.' in target:
-                        resolved_delegation_list.append(target.upper())
+                (sid, object_type) = self.get_sid_from_name(
+                    target.lower(), object.Properties.get("domain")
+                )
+                if sid and object_type:
+                    delegation_entry = {"ObjectIdentifier": sid, "ObjectType": object_type}
+                    logger.debug("Resolved delegation Host: %s, target: %s, %s", host, target, delegation_entry)
+                    resolved_delegation_list.append(delegation_entry)
             if len(delegatehosts) > 0:
                 object.Properties['allowedtodelegate'] = delegatehosts
                 object.AllowedToDelegate = resolved_delegation_list
@@ -474,12 +616,12 @@ class ADDS():
             user = BloodHoundUser()
             user.AllowedToDelegate = []
             user.ObjectIdentifier = f"{domainname}-S-1-5-20"
-            user.PrimaryGroupSID = None
+            user.PrimaryGroupSid = None
             user.Properties = {
                 "domain": domainname,
                 "domainsid": domainsid,
                 "name": f"NT AUTHORITY@{domainname}",
-                ADDS.AT_DISTINGUISHEDNAME: f"CN=S-1-5-20,CN=FOREIGNSECURITYPRINCIPALS,{BloodHoundObject.get_dn(domainname)}"
+                ADDS.AT_DISTINGUISHEDNAME: f"CN=S-1-5-20,CN=FOREIGNSECURITYPRINCIPALS,{domain_to_dn(domainname)}"
             }
             user.Aces = []
             user.SPNTargets = []
@@ -516,7 +658,7 @@ class ADDS():
             group.Properties = {
                 "domain": domainname.upper(),
                 "name": f"ENTERPRISE DOMAIN CONTROLLERS@{domainname}",
-                ADDS.AT_DISTINGUISHEDNAME: f"CN=S-1-5-9,CN=FOREIGNSECURITYPRINCIPALS,{BloodHoundObject.get_dn(domainname)}"
+                ADDS.AT_DISTINGUISHEDNAME: f"CN=S-1-5-9,CN=FOREIGNSECURITYPRINCIPALS,{domain_to_dn(domainname)}"
             }
             group.Members = []
             group.Aces = []
@@ -540,7 +682,7 @@ class ADDS():
                 "domain": domainname,
                 "domainsid": domainsid,
                 "name": f"EVERYONE@{domainname}",
-                ADDS.AT_DISTINGUISHEDNAME: f"CN=S-1-5-0,CN=FOREIGNSECURITYPRINCIPALS,{BloodHoundObject.get_dn(domainname)}"
+                ADDS.AT_DISTINGUISHEDNAME: f"CN=S-1-5-0,CN=FOREIGNSECURITYPRINCIPALS,{domain_to_dn(domainname)}"
             }
             evgroup.Members = []
             evgroup.Aces = []
@@ -558,7 +700,7 @@ class ADDS():
                     "domain": domainname,
                     "domainsid": domainsid,
                     "name": f"AUTHENTICATED USERS@{domainname}",
-                    ADDS.AT_DISTINGUISHEDNAME: f"CN=S-1-5-11,CN=FOREIGNSECURITYPRINCIPALS,{BloodHoundObject.get_dn(domainname)}"
+                    ADDS.AT_DISTINGUISHEDNAME: f"CN=S-1-5-11,CN=FOREIGNSECURITYPRINCIPALS,{domain_to_dn(domainname)}"
                 }
             augroup.Members = []
             augroup.Aces = []
@@ -575,73 +717,101 @@ class ADDS():
                     "domain": domainname,
                     "domainsid": domainsid,
                     "name": f"INTERACTIVE@{domainname}",
-                    ADDS.AT_DISTINGUISHEDNAME: f"CN=S-1-5-4,CN=FOREIGNSECURITYPRINCIPALS,{BloodHoundObject.get_dn(domainname)}"
+                    ADDS.AT_DISTINGUISHEDNAME: f"CN=S-1-5-4,CN=FOREIGNSECURITYPRINCIPALS,{domain_to_dn(domainname)}"
                 }
             iugroup.Members = []
             iugroup.Aces = []
 
             self.groups.append(iugroup)
 
-    def resolve_group_members(self):
-        """Resolve group memberships for users, groups, and computers"""
-
-        # Build reverse map to reduce algorithmic complexity
-        dn_to_groups: Dict[str, List[BloodHoundGroup]] = {}
+    def build_membership_index(self):
+        """Index groups by their members' DNs, and foreign security principals' SIDs, from
+        the member attribute, and by their own DN and SID for members' memberOf and
+        primary group
+        """
+        self.GROUPS_BY_MEMBER_DN = {}
+        self.GROUPS_BY_MEMBER_SID = {}
+        self.GROUP_DN_MAP = {}
+        self.GROUP_SID_MAP = {}
 
         for group in self.groups:
+            # default groups are added to the list directly
+            self.intern_dns(group)
+            if group.ObjectIdentifier:
+                self.GROUP_SID_MAP.setdefault(group.ObjectIdentifier, group)
             group_dn = group.Properties.get(ADDS.AT_DISTINGUISHEDNAME, None)
             if group_dn is None:
                 continue
+            self.GROUP_DN_MAP.setdefault(self.DN_TABLE.intern(group_dn), group)
+
             for member in group.MemberDNs:
-                if member not in dn_to_groups:
-                    dn_to_groups[member] = []
-                dn_to_groups[member].append(group)
+                self.GROUPS_BY_MEMBER_DN.setdefault(member, []).append(group)
+                # members from a trusted domain are listed as CN=<SID>,CN=ForeignSecurityPrincipals
+                member_dn = self.DN_TABLE.dn(member)
+                if member_dn.startswith("CN=S-1-"):
+                    member_dn = parse_dn(member_dn)
+                    if member_dn.parent.startswith("CN=FOREIGNSECURITYPRINCIPALS,"):
+                        self.GROUPS_BY_MEMBER_SID.setdefault(member_dn.cn, []).append(group)
+
+    def get_member_groups(self, member:BloodHoundObject) -> List[BloodHoundGroup]:
+        """Groups an object is a member of, from the groups' member attribute (by DN or
+        SID), the object's memberOf and its primary group. Each group is listed once
+        """
+        groups = {} # {id(group): group}
 
-        # Single pass to resolve memberships for users, computers, subgroups
-        for user in self.users:
-            user_dn = user.Properties.get(ADDS.AT_DISTINGUISHEDNAME, None)
-            if user_dn is None:
-                continue
-            if user_dn in dn_to_groups:
-                for group in dn_to_groups[user_dn]:
-                    group.add_group_member(user, "User")
-                    logger.debug(
-                        "Resolved %s%s[/] as member of %s%s[/]",
-                        ColorScheme.user, user.Properties['name'],
-                        ColorScheme.group, group.Properties['name'],
-                        extra=OBJ_EXTRA_FMT
-                    )
+        member_dn = member.Properties.get(ADDS.AT_DISTINGUISHEDNAME, None)
+        if member_dn is not None:
+            for group in self.GROUPS_BY_MEMBER_DN.get(self.DN_TABLE.get(member_dn), ()):
+                groups.setdefault(id(group), group)
+        for group in self.GROUPS_BY_MEMBER_SID.get(member.ObjectIdentifier, ()):
+            groups.setdefault(id(group), group)
 
-        for computer in self.computers:
-            computer_dn = computer.Properties.get(ADDS.AT_DISTINGUISHEDNAME, None)
-            if computer_dn is None:
-                continue
-            if computer_dn in dn_to_groups:
-                for group in dn_to_groups[computer_dn]:
-                    group.add_group_member(computer, "Computer")
-                    logger.debug(
-                        "Resolved %s%s[/] as member of %s%s[/]",
-                        ColorScheme.computer, computer.Properties['name'],
-                        ColorScheme.group, group.Properties['name'],
-                        extra=OBJ_EXTRA_FMT
-                    )
+        # BRc4 does not return groups' member attribute, only the members' memberOf
+        for group_dn in getattr(member, 'MemberOfDNs', ()):
+            group = self.GROUP_DN_MAP.get(group_dn)
+            if group is not None:
+                groups.setdefault(id(group), group)
 
+        group = self.GROUP_SID_MAP.get(getattr(member, 'PrimaryGroupSid', None))
+        if group is not None:
+            groups.setdefault(id(group), group)
 
-        for subgroup in self.groups:
-            subgroup_dn = subgroup.Properties.get(ADDS.AT_DISTINGUISHEDNAME, None)
-            if subgroup_dn is None:
-                continue
-            if subgroup_dn in dn_to_groups:
-                for group in dn_to_groups[subgroup_dn]:
-                    group.add_group_member(subgroup, "Group")
+        groups.pop(id(member), None)
+        return list(groups.values())
+
+    def resolve_group_members(self):
+        """Resolve group memberships for users, computers and groups in one pass over them,
+        see get_member_groups. Each member SID is only added to a group once, even if
+        several objects have it
+        """
+        self.build_membership_index()
+
+        # {id(group): SIDs of its members}, starting with the members groups were created with
+        member_sids = {
+            id(group): {member["ObjectIdentifier"] for member in group.Members}
+            for group in self.groups
+        }
+
+        for members, object_type, color, relation in (
+            (self.users, "User", ColorScheme.user, "member"),
+            (self.computers, "Computer", ColorScheme.computer, "member"),
+            (self.groups, "Group", ColorScheme.group, "nested member"),
+        ):
+            for member in members:
+                self.intern_dns(member)
+                for group in self.get_member_groups(member):
+                    sids = member_sids[id(group)]
+                    if member.ObjectIdentifier in sids:
+                        continue
+                    sids.add(member.ObjectIdentifier)
+                    group.add_group_member(member, object_type)
                     logger.debug(
-                        "Resolved %s%s[/] as nested member of %s%s[/]",
-                        ColorScheme.group, subgroup.Properties['name'],
+                        "Resolved %s%s[/] as %s of %s%s[/]",
+                        color, member.Properties['name'], relation,
                         ColorScheme.group, group.Properties['name'],
                         extra=OBJ_EXTRA_FMT
                     )
 
-    # TODO: Algorithm can be optimized
     def resolve_ou_members(self):
         """Resolve OU memberships for users, groups, computers, and nested OUs"""
         for user in self.users:
@@ -677,72 +847,68 @@ class ADDS():
                     extra=OBJ_EXTRA_FMT
                 )
 
+        # OU tree, {id(parent OU or domain): [child OUs]}
+        child_ous = {}
+        roots = list(self.domains)
         for nested_ou in self.ous:
             ou = self._resolve_nested_ou(nested_ou)
             if ou is not None:
                 ou.add_ou_member(nested_ou, "OU")
+                child_ous.setdefault(id(ou), []).append(nested_ou)
                 logger.debug(
                     "Identified %s%s[/] as within OU %s%s[/]",
                     ColorScheme.ou, nested_ou.Properties['name'],
                     ColorScheme.ou, ou.Properties['name'],
                     extra=OBJ_EXTRA_FMT
                 )
+            else:
+                roots.append(nested_ou)
+
+        # Walk the tree post-order so child OUs' affected objects are known before
+        #  their parent's. Objects are listed directly within their OU first, then
+        #  those of each child OU in turn
+        for root in roots:
+            stack = [(root, False)]
+            while stack:
+                node, children_done = stack.pop()
+                children = child_ous.get(id(node), [])
+                if not children_done:
+                    stack.append((node, True))
+                    stack.extend((child, False) for child in children)
+                    continue
 
-        sorted_ous = sorted(self.ous, key=lambda x: len(x.Properties['distinguishedname']), reverse=True)
-
-        for ou in sorted_ous:
-            affectedcomputers = []
-            affectedusers = []
-            for childobject in ou.ChildObjects:
-                match childobject["ObjectType"] :
-                    case "Computer":
-                        affectedcomputers.append(childobject)
-                    case "User":
-                        affectedusers.append(childobject)
-                    case "OU":
-                        childid = childobject["ObjectIdentifier"]
-                        for childou in sorted_ous:
-                            if childou.ObjectIdentifier == childid:
-                                affectedcomputers = affectedcomputers + childou.AffectedComputers
-                                affectedusers = affectedusers + childou.AffectedUsers
-
-            ou.AffectedComputers = affectedcomputers
-            ou.AffectedUsers = affectedusers
-
-        sorted_domains = sorted(self.domains, key=lambda x: len(x.Properties['distinguishedname']), reverse=True)
-
-        for domain in sorted_domains:
-            affectedcomputers = []
-            affectedusers = []
-            for childobject in domain.ChildObjects:
-                match childobject["ObjectType"] :
-                    case "Computer":
-                        affectedcomputers.append(childobject)
-                    case "User":
-                        affectedusers.append(childobject)
-                    case "OU":
-                        childid = childobject["ObjectIdentifier"]
-                        for childou in sorted_ous:
-                            if childou.ObjectIdentifier == childid:
-                                affectedcomputers = affectedcomputers + childou.AffectedComputers
-                                affectedusers = affectedusers + childou.AffectedUsers
-
-            domain.AffectedComputers = affectedcomputers
-            domain.AffectedUsers = affectedusers
+                affectedcomputers = []
+                affectedusers = []
+                for childobject in node.ChildObjects:
+                    match childobject["ObjectType"]:
+                        case "Computer":
+                            affectedcomputers.append(childobject)
+                        case "User":
+                            affectedusers.append(childobject)
+                for child in children:
+                    affectedcomputers.extend(child.AffectedComputers)
+                    affectedusers.extend(child.AffectedUsers)
+
+                node.AffectedComputers = affectedcomputers
+                node.AffectedUsers = affectedusers
 
 
     def link_gpos(self):
         # BHCE appears to now require domainsid prop on GPOs
+        gpos_by_dn = {} # {dn ID: BloodHoundGPO}
         for gpo in self.gpos:
             self.add_domainsid_prop(gpo)
+            gpo_dn = gpo.Properties.get(ADDS.AT_DISTINGUISHEDNAME)
+            if gpo_dn is not None:
+                gpos_by_dn[self.DN_TABLE.intern(gpo_dn)] = gpo
 
         for object in self.ous + self.domains:
             if object._entry_type == 'OU':
                 self.add_domainsid_prop(object) # since OUs don't have a SID to get a domainsid from
 
             for gplink in object.GPLinks:
-                if gplink[0] in self.DN_MAP:
-                    gpo = self.DN_MAP[gplink[0]]
+                gpo = gpos_by_dn.get(self.DN_TABLE.get(gplink[0]))
+                if gpo is not None:
                     object.add_linked_gpo(gpo, gplink[1])
 
                     if object._entry_type == 'Domain':
@@ -778,13 +944,13 @@ class ADDS():
                                 prior['TargetDomainName'] == trust.TrustProperties['TargetDomainName']
                                 for prior in domain.Trusts)
                             ):
-                                domain.Trusts.append(trust.TrustProperties)
+                                domain.append_to('Trusts', trust.TrustProperties)
                             break
 
 
     def add_domainsid_prop(self, item):
         """Add the domain SID property to the object. Assumes DOMAIN_MAP is populated."""
-        dc = BloodHoundObject.get_domain_component(item.Properties["distinguishedname"])
+        dc = parse_dn(item.Properties["distinguishedname"]).domain_component
         if dc in self.DOMAIN_MAP:
             item.Properties["domainsid"] = self.DOMAIN_MAP[dc]
 
@@ -797,7 +963,7 @@ class ADDS():
                 for template in self.certtemplates:
                     if template.Properties['name'].split('@')[0].lower() == template_name.lower() \
                     and template.Properties['domain'] == entry.Properties['domain']:
-                        entry.EnabledCertTemplates.append({"ObjectIdentifier": template.ObjectIdentifier.upper(), "ObjectType": "CertTemplate"})
+                        entry.append_to('EnabledCertTemplates', {"ObjectIdentifier": template.ObjectIdentifier.upper(), "ObjectType": "CertTemplate"})
 
     def resolve_hosting_computer(self, ca:BloodHoundEnterpriseCA):
         if 'dnshostname' in ca.Properties:
@@ -809,327 +975,261 @@ class ADDS():
                     return
             logger.warning(f"Could not resolve CA hosting computer: {hostname}")
 
-    def parse_acl(self, entry:BloodHoundObject):
-        """
-        Parse the nTSecurityDescriptor attribute of an AD object and extract BloodHound
-        relationships
+    def get_sid_types(self) -> Dict[str, str]:
+        """Return the type of every object in SID_MAP, keyed by SID"""
+        return {sid: object._entry_type for sid, object in self.SID_MAP.items()}
 
-        Returns int: number of relations parsed
-        """
+
+    @staticmethod
+    def decode_security_descriptor(entry:BloodHoundObject):
+        """Return the binary nTSecurityDescriptor of an object, None if it has none"""
         if not entry.RawAces:
-            return 0
+            return None
 
         try:
-            value = base64.b64decode(entry.RawAces)
+            return base64.b64decode(entry.RawAces)
         except Exception as e:
             logger.warning(
                 "Error base64 decoding nTSecurityDescriptor attribute on %s %s: %s",
                 entry._entry_type, entry.Properties.get('name', 'UNKNOWN'), e
             )
-            return 0
-
-        if not value:
-            return 0
-        sd = SecurityDescriptor(BytesIO(value))
-        # Check for protected DACL flag
-        entry.IsACLProtected = sd.has_control(sd.PD)
-        relations = []
-
-        # Parse owner
-        osid = str(sd.owner_sid)
-        ignoresids = ["S-1-3-0", "S-1-5-18", "S-1-5-10"]
-        # Ignore Creator Owner or Local System
-        if osid not in ignoresids:
-            relations.append(self.build_relation(entry, osid, 'Owns', inherited=False))
-        for ace_object in sd.dacl.aces:
-            if ace_object.ace.AceType != 0x05 and ace_object.ace.AceType != 0x00:
-                # These are the only two aces we care about currently
-                #logger.debug('Don\'t care about acetype %d', ace_object.ace.AceType)
-                continue
-            # Check if sid is ignored
-            sid = str(ace_object.acedata.sid)
-            # Ignore Creator Owner or Local System
-            if sid in ignoresids:
-                continue
-            if ace_object.ace.AceType == 0x05:
-                is_inherited = ace_object.has_flag(ACE.INHERITED_ACE)
-                # ACCESS_ALLOWED_OBJECT_ACE
-                if not ace_object.has_flag(ACE.INHERITED_ACE) and ace_object.has_flag(ACE.INHERIT_ONLY_ACE):
-                    # ACE is set on this object, but only inherited, so not applicable to us
-                    continue
-
-                # Check if the ACE has restrictions on object type (inherited case)
-                if ace_object.has_flag(ACE.INHERITED_ACE) \
-                    and ace_object.acedata.has_flag(ACCESS_ALLOWED_OBJECT_ACE.ACE_INHERITED_OBJECT_TYPE_PRESENT):
-                    # Verify if the ACE applies to this object type
-                    try:
-                        if not ace_applies(ace_object.acedata.get_inherited_object_type().lower(), entry._entry_type.lower(), self.ObjectTypeGuidMap):
-                            continue
-                    except KeyError:
-                        # If we can't validate the GUID, skip this ACE to avoid false positives
-                        continue
-                mask = ace_object.acedata.mask
-
-                # ObjectType helpers (computed once per ACE)
-                obj_type_present = ace_object.acedata.has_flag(ACCESS_ALLOWED_OBJECT_ACE.ACE_OBJECT_TYPE_PRESENT)
-                obj_type_is_allguid = obj_type_present and ace_object.acedata.data.ObjectType == string_to_bin("00000000-0000-0000-0000-000000000000")
-                generic_edge_applicable = (not obj_type_present) or obj_type_is_allguid
-
-                # Now the magic, we have to check all the rights BloodHound cares about
-
-                # Check generic access masks first
-                if mask.has_priv(ACCESS_MASK.GENERIC_ALL) or mask.has_priv(ACCESS_MASK.WRITE_DACL) \
-                    or mask.has_priv(ACCESS_MASK.WRITE_OWNER) or mask.has_priv(ACCESS_MASK.GENERIC_WRITE):
-                    # SharpHoundCommon semantics:
-                    # - Only treat GenericAll/GenericWrite/WriteDacl/WriteOwner as *generic edges* if the ACE ObjectType
-                    #   is empty or AllGuid. If ObjectType is set to a specific GUID (property / extended right),
-                    #   do NOT skip this ACE, because GenericAll/GenericWrite may still imply specific edges later.
-                    if not generic_edge_applicable:
-                        # Don't emit generic edges here; fall through so specific checks can run.
-                        pass
-                    else:
-
-                        # Check from high to low, ignore lower privs which may also match the bitmask,
-                        # even though this shouldn't happen since we check for exact matches currently
-                        if mask.has_priv(ACCESS_MASK.GENERIC_ALL):
-                            relations.append(self.build_relation(entry, sid, 'GenericAll', inherited=is_inherited))
-                            # GenericAll includes all other rights, so skip from here (for generic-edge ACEs only)
-                            continue
-
-                        if mask.has_priv(ACCESS_MASK.GENERIC_WRITE):
-                            relations.append(self.build_relation(entry, sid, 'GenericWrite', inherited=is_inherited))
-                            # Don't skip this if it's the domain object, since BloodHound reports duplicate
-                            # rights as well, and this might influence some queries
-                            if entry._entry_type.lower() != 'domain' and entry._entry_type.lower() != 'computer':
-                                continue
-
-                        # These are specific bitmasks so don't break the loop from here
-                        if mask.has_priv(ACCESS_MASK.WRITE_DACL):
-                            relations.append(self.build_relation(entry, sid, 'WriteDacl', inherited=is_inherited))
-
-                        if mask.has_priv(ACCESS_MASK.WRITE_OWNER):
-                            relations.append(self.build_relation(entry, sid, 'WriteOwner', inherited=is_inherited))
-
-                # Property write privileges
-                writeprivs = mask.has_priv(ACCESS_MASK.ADS_RIGHT_DS_WRITE_PROP)
-                if writeprivs:
-                    # GenericWrite
-                    if entry._entry_type.lower() in ['user', 'group', 'computer', 'gpo', 'ou', 'domain', 'pki template', 'enterpriseca', 'rootca', 'aiaca', 'ntauthstore', 'issuancepolicy'] \
-                        and generic_edge_applicable:
-                        relations.append(self.build_relation(entry, sid, 'GenericWrite', inherited=is_inherited))
-                    # AddMember should only fire for the member GUID or the MembershipPropertySet GUID (SharpHound semantics)
-                    if entry._entry_type.lower() == 'group' and (
-                        obj_type_present and can_write_property(ace_object, EXTRIGHTS_GUID_MAPPING['WriteMember']) or
-                        obj_type_present and can_write_property(ace_object, EXTRIGHTS_GUID_MAPPING['MembershipPropertySet'])
-                    ):
-                        relations.append(self.build_relation(entry, sid, 'AddMember', '', inherited=is_inherited))
-                    if entry._entry_type.lower() == 'computer' and \
-                        obj_type_present and can_write_property(ace_object, EXTRIGHTS_GUID_MAPPING['AllowedToAct']):
-                        relations.append(self.build_relation(entry, sid, 'AddAllowedToAct', '', inherited=is_inherited))
-                    # Property set, but ignore Domain Admins since they already have enough privileges anyway
-                    if entry._entry_type.lower() in ['computer', 'user'] and \
-                        obj_type_present and can_write_property(ace_object, EXTRIGHTS_GUID_MAPPING['UserAccountRestrictionsSet']) and \
-                        not sid.endswith('-512'):
-                        relations.append(self.build_relation(entry, sid, 'WriteAccountRestrictions', '', inherited=is_inherited))
-                    if entry._entry_type.lower() in ['ou', 'domain'] and \
-                        obj_type_present and can_write_property(ace_object, EXTRIGHTS_GUID_MAPPING['WriteGPLink']):
-                        relations.append(self.build_relation(entry, sid, 'WriteGPLink', '', inherited=is_inherited))
-
-                    # Since 4.0
-                    # Key credential link property write rights
-                    if entry._entry_type.lower() in ['user', 'computer']  and obj_type_present \
-                    and 'ms-ds-key-credential-link' in self.ObjectTypeGuidMap and ace_object.acedata.get_object_type().lower() == self.ObjectTypeGuidMap['ms-ds-key-credential-link']:
-                        relations.append(self.build_relation(entry, sid, 'AddKeyCredentialLink', inherited=is_inherited))
-
-                    # ServicePrincipalName property write rights (exclude generic rights)
-                    if entry._entry_type.lower() in ['user', 'computer'] and obj_type_present \
-                    and ace_object.acedata.get_object_type().lower() == 'f3a64788-5306-11d1-a9c5-0000f80367c1':
-                        relations.append(self.build_relation(entry, sid, 'WriteSPN', inherited=is_inherited))
-
-                    #
-                    # Rights for certificate templates
-                    #
-                    if entry._entry_type.lower() == 'pki template' and obj_type_present \
-                    and ace_object.acedata.get_object_type().lower() == 'ea1dddc4-60ff-416e-8cc0-17cee534bce7':
-                        relations.append(self.build_relation(entry, sid, 'WritePKINameFlag', inherited=is_inherited))
-
-                    if entry._entry_type.lower() == 'pki template' and obj_type_present \
-                    and ace_object.acedata.get_object_type().lower() == 'd15ef7d8-f226-46db-ae79-b34e560bd12c':
-                        relations.append(self.build_relation(entry, sid, 'WritePKIEnrollmentFlag', inherited=is_inherited))
-
-                elif ace_object.acedata.mask.has_priv(ACCESS_MASK.ADS_RIGHT_DS_SELF):
-                    # Self add - since 4.0
-                    # SharpHoundCommon accepts WriteMember, MembershipPropertySet, or AllGuid
-                    if entry._entry_type.lower() == 'group' and obj_type_present and \
-                        (obj_type_is_allguid or ace_object.acedata.data.ObjectType in (
-                            EXTRIGHTS_GUID_MAPPING['WriteMember'],
-                            EXTRIGHTS_GUID_MAPPING['MembershipPropertySet'],
-                        )):
-                        relations.append(self.build_relation(entry, sid, 'AddSelf', '', inherited=is_inherited))
-
-                # Extended rights
-                control_access = mask.has_priv(ACCESS_MASK.ADS_RIGHT_DS_CONTROL_ACCESS)
-                if control_access:
-                    has_laps = bool(entry.Properties.get('haslaps'))
-                    # All Extended
-                    if entry._entry_type.lower() in ['user', 'domain'] and generic_edge_applicable:
-                        relations.append(self.build_relation(entry, sid, 'AllExtendedRights', '', inherited=is_inherited))
-                    # SharpHoundCommon only emits AllExtendedRights for computers in the LAPS case
-                    if entry._entry_type.lower() == 'computer' and has_laps and generic_edge_applicable:
-                        relations.append(self.build_relation(entry, sid, 'AllExtendedRights', '', inherited=is_inherited))
-                    # SharpHoundCommon-style LAPS edge: treat LAPS attribute GUIDs as the relevant "extended right"
-                    if entry._entry_type.lower() == 'computer' and has_laps and obj_type_present:
-                        laps_guid = ace_object.acedata.get_object_type().lower()
-                        if laps_guid in (
-                            self.ObjectTypeGuidMap.get('ms-mcs-admpwd'),
-                            self.ObjectTypeGuidMap.get('ms-laps-password'),
-                            self.ObjectTypeGuidMap.get('ms-laps-encryptedpassword'),
-                        ):
-                            relations.append(self.build_relation(entry, sid, 'ReadLAPSPassword', inherited=is_inherited))
-                    if entry._entry_type.lower() == 'domain' and \
-                        obj_type_present and has_extended_right(ace_object, EXTRIGHTS_GUID_MAPPING['GetChanges']):
-                        relations.append(self.build_relation(entry, sid, 'GetChanges', '', inherited=is_inherited))
-                    if entry._entry_type.lower() == 'domain' and \
-                        obj_type_present and has_extended_right(ace_object, EXTRIGHTS_GUID_MAPPING['GetChangesAll']):
-                        relations.append(self.build_relation(entry, sid, 'GetChangesAll', '', inherited=is_inherited))
-                    if entry._entry_type.lower() == 'domain' and \
-                        obj_type_present and has_extended_right(ace_object, EXTRIGHTS_GUID_MAPPING['GetChangesInFilteredSet']):
-                        relations.append(self.build_relation(entry, sid, 'GetChangesInFilteredSet', '', inherited=is_inherited))
-                    if entry._entry_type.lower() in ['user', 'computer'] and \
-                        obj_type_present and has_extended_right(ace_object, EXTRIGHTS_GUID_MAPPING['UserForceChangePassword']):
-                        relations.append(self.build_relation(entry, sid, 'ForceChangePassword', '', inherited=is_inherited))
-
-                    #
-                    # Rights for certificate templates
-                    #
-                    if entry._entry_type.lower() in ['pki template', 'enterpriseca'] and \
-                        obj_type_present and has_extended_right(ace_object, EXTRIGHTS_GUID_MAPPING['Enroll']):
-                        relations.append(self.build_relation(entry, sid, 'Enroll', '', inherited=is_inherited))
-
-
-            if ace_object.ace.AceType == 0x00:
-                is_inherited = ace_object.has_flag(ACE.INHERITED_ACE)
-                mask = ace_object.acedata.mask
-                # ACCESS_ALLOWED_ACE
-                if not ace_object.has_flag(ACE.INHERITED_ACE) and ace_object.has_flag(ACE.INHERIT_ONLY_ACE):
-                    # ACE is set on this object, but only inherited, so not applicable to us
-                    continue
+            return None
 
-                if mask.has_priv(ACCESS_MASK.GENERIC_ALL):
-                    # Generic all includes all other rights, so skip from here
-                    relations.append(self.build_relation(entry, sid, 'GenericAll', inherited=is_inherited))
-                    continue
-
-                if mask.has_priv(ACCESS_MASK.ADS_RIGHT_DS_WRITE_PROP):
-                    # Genericwrite is only for properties, don't skip after
-                    if entry._entry_type.lower() in ['user', 'group', 'computer', 'gpo', 'ou']:
-                        relations.append(self.build_relation(entry, sid, 'GenericWrite', inherited=is_inherited))
-
-                if mask.has_priv(ACCESS_MASK.WRITE_OWNER):
-                    relations.append(self.build_relation(entry, sid, 'WriteOwner', inherited=is_inherited))
-
-                # For users and domain, check extended rights
-                if entry._entry_type.lower() in ['user', 'domain'] and mask.has_priv(ACCESS_MASK.ADS_RIGHT_DS_CONTROL_ACCESS):
-                    relations.append(self.build_relation(entry, sid, 'AllExtendedRights', '', inherited=is_inherited))
 
-                if entry._entry_type.lower() == 'computer' and mask.has_priv(ACCESS_MASK.ADS_RIGHT_DS_CONTROL_ACCESS) and \
-                sid != "S-1-5-32-544" and not sid.endswith('-512'):
-                    relations.append(self.build_relation(entry, sid, 'AllExtendedRights', '', inherited=is_inherited))
-
-                if mask.has_priv(ACCESS_MASK.WRITE_DACL):
-                    relations.append(self.build_relation(entry, sid, 'WriteDacl', inherited=is_inherited))
-
-        entry.Aces = relations
-
-        return len(relations)
+    def parse_acls(self, objects, status=None):
+        """Parse the ACLs of objects in this process. Returns the number of relations"""
+        num_parsed_relations = 0
+        sid_types = self.get_sid_types()
+        cache = AclCache(self.ObjectTypeGuidMap)
+        for i, object in enumerate(objects):
+            try:
+                num_parsed_relations += self.parse_acl(object, sid_types, cache)
+                if status is not None:
+                    status.update(f" [bold] Processing {num_parsed_relations} ACLs --- {i}/{len(objects)} objects parsed")
+            except:
+                #
+                # Catch the occasional error parinsing ACLs
+                #
+                continue
+        cache.log_stats()
+        return num_parsed_relations
 
 
-    def _is_member_of(self, member: BloodHoundObject, group: BloodHoundGroup):
-        if ADDS.AT_DISTINGUISHEDNAME in member.Properties:
-            if member.Properties["distinguishedname"] in group.MemberDNs:
-                return True
+    def parse_acls_parallel(self, objects, jobs, status=None):
+        """
+        Parse the ACLs of objects in jobs worker processes (0 for one per core). Each
+        distinct descriptor is sent to a worker once, with the entry type and haslaps the
+        rules need, and the objects' Aces are built from the results here. Sets the same
+        IsACLProtected and Aces as parse_acls. Returns the number of relations
+        """
+        cache = AclCache(self.ObjectTypeGuidMap)
+        keyed_objects = []
+        pending = {}
+        for object in objects:
+            value = self.decode_security_descriptor(object)
+            if not value:
+                continue
+            task = (value, object._entry_type, bool(object.Properties.get('haslaps')))
+            key = AclCache.key(*task)
+            keyed_objects.append((object, key))
+            if key not in pending:
+                pending[key] = task
+
+        with ProcessPoolExecutor(
+            max_workers=jobs or os.cpu_count(), initializer=init_acl_worker,
+            initargs=(self.ObjectTypeGuidMap,)
+        ) as executor:
+            results = executor.map(parse_descriptor_task, pending.values(), chunksize=ACL_CHUNK_SIZE)
+            for key, (result, seconds) in zip(pending, results):
+                cache.store(key, result, seconds)
 
-        # BRc4 does not use DN in groups' member attribute, so we have
-        # to check membership from the other side of the relationship
-        if ADDS.AT_DISTINGUISHEDNAME in group.Properties:
-            if group.Properties["distinguishedname"] in member.MemberOfDNs:
-                return True
+        num_parsed_relations = 0
+        sid_types = self.get_sid_types()
+        for i, (object, key) in enumerate(keyed_objects):
+            try:
+                num_parsed_relations += self.set_aces(object, cache.get(key), sid_types)
+                if status is not None:
+                    status.update(f" [bold] Processing {num_parsed_relations} ACLs --- {i}/{len(keyed_objects)} objects parsed")
+            except:
+                continue
+        cache.log_stats()
+        return num_parsed_relations
 
-        if member.PrimaryGroupSid == group.ObjectIdentifier:
-            return True
 
-        return False
+    def parse_acl(self, entry:BloodHoundObject, sid_types:Dict[str, str]=None,
+                  cache:AclCache=None):
+        """
+        Parse the nTSecurityDescriptor attribute of an AD object and extract BloodHound
+        relationships
 
+        Returns int: number of relations parsed
+        """
+        value = self.decode_security_descriptor(entry)
+        if not value:
+            return 0
 
-    def _is_nested_group(self, subgroup, group):
-        if ADDS.AT_DISTINGUISHEDNAME in subgroup.Properties:
-            if subgroup.Properties["distinguishedname"] in group.MemberDNs:
-                return True
+        if sid_types is None:
+            sid_types = self.get_sid_types()
+        if cache is None:
+            cache = AclCache(self.ObjectTypeGuidMap)
+        result = cache.parse(value, entry._entry_type, bool(entry.Properties.get('haslaps')))
+        return self.set_aces(entry, result, sid_types)
 
-        if ADDS.AT_DISTINGUISHEDNAME in group.Properties:
-            # BRc4 does not use DN in groups' member attribute, so we have
-            # to check membership from the other side of the relationship
-            if group.Properties["distinguishedname"] in subgroup.MemberOfDNs:
-                return True
 
-        return False
+    @staticmethod
+    def set_aces(entry:BloodHoundObject, result, sid_types:Dict[str, str]):
+        """
+        Set IsACLProtected and Aces from a parsed descriptor, whose relations still
+        hold the SIDs found in the descriptor. Returns the number of relations
+        """
+        if result is None:
+            return 0
+        is_acl_protected, relations = result
+        dn = entry.Properties["distinguishedname"]
+        entry.Aces = [
+            build_relation(sid, relation, inherited, dn, sid_types)
+            for sid, relation, inherited in relations
+        ]
+        entry.IsACLProtected = is_acl_protected
+        return len(entry.Aces)
 
 
     def _resolve_object_ou(self, item):
-        if "OU=" in item.Properties["distinguishedname"]:
-            target_ou = "OU=" + item.Properties["distinguishedname"].split("OU=", 1)[1]
-            for ou in self.ous:
-                if ou.Properties["distinguishedname"] == target_ou:
-                    return ou
+        target_ou = parse_dn(item.Properties["distinguishedname"]).ancestor("OU=")
+        if target_ou is not None:
+            return self.OU_DN_MAP.get(self.DN_TABLE.get(target_ou))
         return None
 
 
     def _resolve_nested_ou(self, nested_ou):
-        dn = nested_ou.Properties["distinguishedname"]
+        dn = parse_dn(nested_ou.Properties["distinguishedname"])
         # else is top-level OU
-        if len(dn.split("OU=")) > 2:
-            target_ou = "OU=" + dn.split("OU=", 2)[2]
-            for ou in self.ous:
-                if ou.Properties["distinguishedname"] == target_ou:
-                    return ou
+        target_ou = dn.ancestor("OU=", 2)
+        if target_ou is not None:
+            return self.OU_DN_MAP.get(self.DN_TABLE.get(target_ou))
         else:
-            dc = BloodHoundObject.get_domain_component(dn)
-            for domain in self.domains:
-                if dc == domain.Properties[self.AT_DISTINGUISHEDNAME]:
-                    return domain
-        return None
+            return self.DOMAIN_DN_MAP.get(self.DN_TABLE.get(dn.domain_component))
 
 
-    def _lookup_known_sid(self, object, sid):
+    def _lookup_known_sid(self, sid):
+        """Return a model class for a well-known SID, which names the object, and its list"""
         known_sid_type = ADUtils.WELLKNOWN_SIDS[sid][1]
         if known_sid_type == "USER":
-            bhObject = BloodHoundUser(object)
-            target_list = self.users
+            model, target_list = BloodHoundUser, self.users
         elif known_sid_type == "COMPUTER":
-            bhObject = BloodHoundComputer(object)
-            target_list = self.computers
+            model, target_list = BloodHoundComputer, self.computers
         elif known_sid_type == "GROUP":
-            bhObject = BloodHoundGroup(object)
-            target_list = self.groups
-        bhObject.Properties["name"] = ADUtils.WELLKNOWN_SIDS[sid][0].upper()
-        return bhObject, target_list
+            model, target_list = BloodHoundGroup, self.groups
+
+        def build(object):
+            bhObject = model(object)
+            bhObject.Properties["name"] = ADUtils.WELLKNOWN_SIDS[sid][0].upper()
+            return bhObject
+        return build, target_list
 
 
     def _get_domain_sid_from_netbios_name(self, nbtns_domain):
+        # the crossRef's nCName is the DN of the domain it names
         if nbtns_domain in self.CROSSREF_MAP:
-            dn = self.CROSSREF_MAP[nbtns_domain].distinguishedName
-            if dn in self.DOMAIN_MAP:
-                return self.DOMAIN_MAP[dn]
+            return self.DOMAIN_MAP.get(self.CROSSREF_MAP[nbtns_domain].nCName, None)
+        return None
+
+
+    def build_computer_indexes(self):
+        """Index computers by dNSHostName and by sAMAccountName, alone and together
+        with their domain SID. Each list keeps the order of self.computers
+        """
+        self.COMPUTER_DNSHOSTNAME_MAP = {}
+        self.COMPUTER_SAMACCOUNTNAME_MAP = {}
+        self.COMPUTER_DOMAIN_SAMACCOUNTNAME_MAP = {}
+        self._computer_positions = {}
+        for position, computer in enumerate(self.computers):
+            self._computer_positions[id(computer)] = position
+            dnshostname = computer.Properties.get('dnshostname')
+            if dnshostname:
+                self.COMPUTER_DNSHOSTNAME_MAP.setdefault(dnshostname.upper(), []).append(computer)
+
+            samaccountname = computer.Properties.get('samaccountname')
+            if not samaccountname:
+                continue
+            self.COMPUTER_SAMACCOUNTNAME_MAP.setdefault(samaccountname.upper(), []).append(computer)
+            if computer.ObjectIdentifier:
+                domain_sid = computer.ObjectIdentifier.rsplit('-', 1)[0]
+                self.COMPUTER_DOMAIN_SAMACCOUNTNAME_MAP.setdefault(
+                    (domain_sid, samaccountname.upper()), []
+                ).append(computer)
+
+
+    def build_local_object_indexes(self):
+        """Index computers and users by the names local objects refer to them with,
+        so each session and local group membership is resolved with lookups
+        """
+        self.build_computer_indexes()
+
+        self.USER_SAMACCOUNTNAME_MAP = {}
+        self.USER_DOMAIN_SAMACCOUNTNAME_MAP = {}
+        for user in self.users:
+            samaccountname = user.Properties.get('samaccountname')
+            if not samaccountname or not user.ObjectIdentifier:
+                continue
+            domain_sid = user.ObjectIdentifier.rsplit('-', 1)[0]
+            self.USER_SAMACCOUNTNAME_MAP.setdefault(samaccountname.lower(), []).append(user)
+            self.USER_DOMAIN_SAMACCOUNTNAME_MAP.setdefault((domain_sid, samaccountname.lower()), user)
+
+        self.NETBIOS_DOMAIN_SID_MAP = {}
+        for netbios_name in self.CROSSREF_MAP:
+            domain_sid = self._get_domain_sid_from_netbios_name(netbios_name)
+            if domain_sid is not None:
+                self.NETBIOS_DOMAIN_SID_MAP[netbios_name.upper()] = domain_sid
+
+
+    def _get_domain_sid_from_dns_name(self, dns_domain):
+        return self.DOMAIN_MAP.get(domain_to_dn(dns_domain.upper()), None)
+
+
+    def _find_computers(self, host_fqdn, host_name, domain_sid):
+        """Return the computers whose dNSHostName is host_fqdn, or whose sAMAccountName
+        is host_name$ in the given domain, in the order they were imported
+        """
+        found = {}
+        if host_fqdn is not None:
+            for computer in self.COMPUTER_DNSHOSTNAME_MAP.get(host_fqdn.upper(), []):
+                found[id(computer)] = computer
+        if domain_sid is not None and host_name is not None:
+            for computer in self.COMPUTER_DOMAIN_SAMACCOUNTNAME_MAP.get(
+                (domain_sid, host_name.upper() + '$'), []
+            ):
+                found[id(computer)] = computer
+        return sorted(found.values(), key=lambda c: self._computer_positions[id(c)])
+
+
+    def _find_user_sid(self, samaccountname, domain_sid, session_type):
+        """Return the SID of the user with samaccountname, preferring the one in
+        domain_sid when the name is used in several domains
+        """
+        if domain_sid is not None:
+            user = self.USER_DOMAIN_SAMACCOUNTNAME_MAP.get((domain_sid, samaccountname.lower()))
+            if user is not None:
+                return user.ObjectIdentifier
+
+        match_users = self.USER_SAMACCOUNTNAME_MAP.get(samaccountname.lower(), [])
+        if len(match_users) > 1:
+            logger.warning("Multiple users with sAMAccountName %s found for %s",
+                           ColorScheme.user + samaccountname + "[/]", session_type)
+            return None
+        if len(match_users) == 1:
+            return match_users[0].ObjectIdentifier
         return None
 
 
     # process local group memberships and sessions
     def process_local_objects(self, broker):
-        for computer in self.computers:
-            self.process_privileged_sessions(broker.privileged_sessions, computer)
-            self.process_registry_sessions(broker.registry_sessions, computer)
-            self.process_sessions(broker.sessions, computer)
-            self.process_local_group_memberships(broker.local_group_memberships, computer)
+        self.build_local_object_indexes()
+
+        self.process_privileged_sessions(broker.privileged_sessions)
+        self.process_registry_sessions(broker.registry_sessions)
+        self.process_sessions(broker.sessions)
+        self.process_local_group_memberships(broker.local_group_memberships)
 
 
         if len(broker.local_group_memberships) > 0:
@@ -1143,46 +1243,29 @@ class ADDS():
 
 
     # correlate privileged sessions to BH Computer objects
-    def process_privileged_sessions(self, privileged_sessions, computer_object):
+    def process_privileged_sessions(self, privileged_sessions):
         for session in privileged_sessions:
-            # skip sessions that have already been matched to a computer object
-            if session.matched:
-                continue
-
-            computer_found = False
-
-            # first we'll try to directly match the session host's dns name to a
-            # computer object's dNSHostName attribute
-            if session.host_fqdn is not None:
-                if computer_object.matches_dnshostname(session.host_fqdn):
-                    computer_found = True
-
-            # second we'll check to see if the host's DNS domain is a known domain
-            # converting the host DNS suffix to a domain component could be problematic?
-            if session.host_domain is not None and not computer_found:
-                dc = BloodHoundObject.get_dn(session.host_domain.upper())
-                domain_sid = self.DOMAIN_MAP.get(dc, None)
-
-                # if we have the domain, check for a computer with samaccountname host$
-                # and the domain's sid
-                if domain_sid is not None:
-                    if computer_object.matches_samaccountname(session.host_name) and \
-                        computer_object.ObjectIdentifier.startswith(domain_sid):
-
-                        computer_found = True
+            # match the session host's dns name to a computer object's dNSHostName
+            # attribute, or the host name to the sAMAccountName of a computer in the
+            # domain named by the host's DNS suffix
+            domain_sid = None
+            if session.host_domain is not None:
+                domain_sid = self._get_domain_sid_from_dns_name(session.host_domain)
+            computers = self._find_computers(session.host_fqdn, session.host_name, domain_sid)
 
             # if we've got the computer, then try to find the user's SID
-            if not computer_found:
+            if not computers:
                 continue
 
-            match_users = [user for user in self.users if user.Properties.get('samaccountname', '').lower() == session.user.lower()]
-            if len(match_users) > 1:
-                logger.warning("Multiple users with sAMAccountName %s found for privileged session",
-                               ColorScheme.user + session.user + "[/]")
-                # TODO: implement NetBIOS domain name handling
+            # the session's NetBIOS domain tells apart users with the same sAMAccountName
+            user_domain_sid = None
+            if session.user_domain is not None:
+                user_domain_sid = self.NETBIOS_DOMAIN_SID_MAP.get(session.user_domain.upper())
+            user_sid = self._find_user_sid(session.user, user_domain_sid, "privileged session")
+            if user_sid is None:
                 continue
-            elif len(match_users) == 1:
-                user_sid = match_users[0].ObjectIdentifier
+
+            for computer_object in computers:
                 computer_object.add_session(user_sid, "privileged")
                 logger.debug(
                     "Resolved privileged session on %s",
@@ -1190,110 +1273,70 @@ class ADDS():
                     extra=OBJ_EXTRA_FMT
                 )
 
-    def process_registry_sessions(self, registry_sessions, computer_object):
-        """Correlate registry sessions to a computer object."""
+    def process_registry_sessions(self, registry_sessions):
+        """Correlate each registry session to the first computer object it matches."""
         for session in registry_sessions:
             # skip sessions that have already been matched to a computer object
             if session.matched:
                 continue
 
-            # first we'll try to directly match the session host's dns name to a
-            # computer object's dNSHostName attribute
-            if session.host_fqdn is not None:
-                if computer_object.matches_dnshostname(session.host_name):
-                    session.matched = True
-                    computer_object.add_session(session.user_sid, "registry")
-                    logger.debug(
-                        "Resolved registry session on %s via dNSHostName match",
-                        ColorScheme.computer + computer_object.Properties['name'] + "[/]",
-                        extra=OBJ_EXTRA_FMT
-                    )
-                    continue
-
-            # second we'll check to see if the host's DNS domain is a known domain
-            # converting the host DNS suffix to a domain component could be problematic?
+            # match the session host's dns name to a computer object's dNSHostName
+            # attribute, or the host name to the sAMAccountName of a computer in the
+            # domain named by the host's DNS suffix
             if session.host_domain is not None:
-                dc = BloodHoundObject.get_dn(session.host_domain.upper())
-                domain_sid = self.DOMAIN_MAP.get(dc, None)
-
-                # if we have the domain, check for a computer with samaccountname host$
-                # and the domain's sid
-                if domain_sid is not None:
-                    if computer_object.matches_samaccountname(session.host_name) and \
-                        computer_object.ObjectIdentifier.startswith(domain_sid):
-
-                        session.matched = True
-                        computer_object.add_session(session.user_sid, "registry")
-                        logger.debug(
-                            "Resolved registry session on %s via domain + sAMAccountName match",
-                            ColorScheme.computer + computer_object.Properties['name'] + "[/]",
-                            extra=OBJ_EXTRA_FMT
-                        )
-                        continue
+                domain_sid = self._get_domain_sid_from_dns_name(session.host_domain)
+                computers = self._find_computers(session.host_fqdn, session.host_name, domain_sid)
+                match_type = "dNSHostName or domain + sAMAccountName"
 
             # if we don't have the host domain/FQDN from the session, we just try to match samaccountname
             # this is probably only error prone if there multiple domains with the same hostname
-            elif computer_object.matches_samaccountname(session.host_name):
-                session.matched = True
-                computer_object.add_session(session.user_sid, "registry")
-                logger.debug(
-                    "Resolved registry session on %s via fuzzy sAMAccountName match",
-                    ColorScheme.computer + computer_object.Properties['name'] + "[/]",
-                    extra=OBJ_EXTRA_FMT
-                )
-
+            else:
+                computers = self.COMPUTER_SAMACCOUNTNAME_MAP.get(session.host_name.upper() + '$', [])
+                match_type = "fuzzy sAMAccountName"
 
-    # TODO: Algorithm can be optimized
-    def process_sessions(self, sessions, computer_object):
-        """Correlate sessions to a computer object."""
-        for session in sessions:
-            # skip sessions that have already been matched to a computer object
-            if session.matched:
+            if not computers:
                 continue
 
-            computer_found = False
-
-            # case 1: we have the host's DNS name
-            if session.ptr_record is not None:
-
-                # first try to match dNSHostName
-                if computer_object.matches_dnshostname(session.ptr_record):
-                    computer_found = True
+            computer_object = computers[0]
+            session.matched = True
+            computer_object.add_session(session.user_sid, "registry")
+            logger.debug(
+                "Resolved registry session on %s via %s match",
+                ColorScheme.computer + computer_object.Properties['name'] + "[/]",
+                match_type,
+                extra=OBJ_EXTRA_FMT
+            )
 
-                # if that doesn't work, try to match the host's domain
-                if session.computer_domain is not None and not computer_found:
-                    dc = BloodHoundObject.get_dn(session.computer_domain.upper())
-                    domain_sid = self.DOMAIN_MAP.get(dc, None)
 
-                    # if we have the domain, check for a computer with samaccountname host$
-                    # and the domain's sid
-                    if domain_sid is not None:
-                        if computer_object.matches_samaccountname(session.computer_name) and \
-                            computer_object.ObjectIdentifier.startswith(domain_sid):
+    def process_sessions(self, sessions):
+        """Correlate sessions to computer objects."""
+        for session in sessions:
+            computers = []
 
-                            computer_found = True
+            # case 1: we have the host's DNS name
+            if session.ptr_record is not None:
+                # match dNSHostName, or sAMAccountName in the host's DNS domain
+                domain_sid = None
+                if session.computer_domain is not None:
+                    domain_sid = self._get_domain_sid_from_dns_name(session.computer_domain)
+                computers = self._find_computers(session.ptr_record, session.computer_name, domain_sid)
 
             # case 2: we have the NETBIOS host and domain name
             elif session.computer_netbios_domain is not None:
-                domain_sid = self._get_domain_sid_from_netbios_name(session.computer_netbios_domain)
-                if domain_sid is not None:
-                    if computer_object.matches_samaccountname(session.computer_name) and computer_object.ObjectIdentifier.startswith(domain_sid):
-                        computer_found = True
+                domain_sid = self.NETBIOS_DOMAIN_SID_MAP.get(session.computer_netbios_domain.upper())
+                computers = self._find_computers(None, session.computer_name, domain_sid)
 
             # if we've got the computer, then try to find the user's SID
-            if not computer_found:
+            if not computers:
                 continue
 
-            match_users = [user for user in self.users if user.Properties.get('samaccountname', '').lower() == session.username.lower()]
-            if len(match_users) > 1:
-                logger.warning(
-                    "Multiple users with sAMAccountName %s found for session",
-                    ColorScheme.user + session.user + "[/]"
-                )
-                # TODO: implement NetBIOS domain name handling
+            # NetSessionEnum doesn't return the user's domain, when the sAMAccountName
+            # is used in several domains, take the user from the session host's domain
+            user_sid = self._find_user_sid(session.username, domain_sid, "session")
+            if user_sid is None:
                 continue
-            elif len(match_users) == 1:
-                user_sid = match_users[0].ObjectIdentifier
+
+            for computer_object in computers:
                 computer_object.add_session(user_sid, "session")
                 logger.debug(
                     "Resolved session on %s",
@@ -1303,48 +1346,27 @@ class ADDS():
 
 
     # correlate local group memberships to BH Computer objects
-    def process_local_group_memberships(self, local_group_memberships, computer_object):
+    def process_local_group_memberships(self, local_group_memberships):
         for member in local_group_memberships:
-            # skip memberships that have already been matched to a computer object
-            if member.matched:
-                continue
-
-            computer_found = False
-
-            # first we'll try to directly match the session host's dns name to a
-            # computer object's dNSHostName attribute
-            if member.host_fqdn is not None:
-                if computer_object.matches_dnshostname(member.host_fqdn):
-                    computer_found = True
-
-
-            # second we'll check to see if the host's DNS domain is a known domain
-            if member.host_domain is not None and not computer_found:
-                dc = BloodHoundObject.get_dn(member.host_domain.upper())
-                domain_sid = self.DOMAIN_MAP.get(dc, None)
-
-                # if we have the domain, check for a computer with samaccountname host$
-                # and the domain's sid
-                if domain_sid is not None:
-                    if computer_object.matches_samaccountname(member.host_name) and \
-                        computer_object.ObjectIdentifier.startswith(domain_sid):
-
-                        computer_found = True
-
-            # if we've got the computer, then check the sid before submitting
-            if not computer_found:
-                continue
+            # match the host's dns name to a computer object's dNSHostName attribute,
+            # or the host name to the sAMAccountName of a computer in the domain named
+            # by the host's DNS suffix
+            domain_sid = None
+            if member.host_domain is not None:
+                domain_sid = self._get_domain_sid_from_dns_name(member.host_domain)
+            computers = self._find_computers(member.host_fqdn, member.host_name, domain_sid)
 
             color = ColorScheme.user if member.member_sid_type == "User" else ColorScheme.group
 
-            computer_object.add_local_group_member(member.member_sid, member.member_sid_type, member.group)
-            logger.debug(
-                "Resolved %s as member of %s on %s",
-                color + member.member + "[/]",
-                ColorScheme.group + member.group + "[/]",
-                ColorScheme.computer + computer_object.Properties['name'] + "[/]",
-                extra=OBJ_EXTRA_FMT
-            )
+            for computer_object in computers:
+                computer_object.add_local_group_member(member.member_sid, member.member_sid_type, member.group)
+                logger.debug(
+                    "Resolved %s as member of %s on %s",
+                    color + member.member + "[/]",
+                    ColorScheme.group + member.group + "[/]",
+                    ColorScheme.computer + computer_object.Properties['name'] + "[/]",
+                    extra=OBJ_EXTRA_FMT
+                )
 
 
     @staticmethod
@@ -1,3 +1,5 @@
 from .trustdirection import TrustDirection
 from .trusttype import TrustType
-from .propertieslevel import PropertiesLevel
\ No newline at end of file
+from .propertieslevel import PropertiesLevel
+from .dn_table import DNTable
+from .dn_parser import ParsedDN, parse_dn, domain_to_dn
\ No newline at end of file
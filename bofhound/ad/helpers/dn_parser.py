@@ -0,0 +1,77 @@
+import re
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple
+
+# DNs parsed recently are kept. An object's DN is parsed again by its model, its ACEs
+# and each ADDS processing step, and every object in a domain shares its domain's parts
+DN_CACHE_SIZE = 65536
+DOMAIN_CACHE_SIZE = 1024
+
+DC_SEPARATOR = re.compile(',DC=', flags=re.I)
+
+
+class ParsedDN(NamedTuple):
+    """
+    Components of a distinguished name, in the case it was given in. RDNs are split
+    on every comma, as bofhound always has.
+    """
+    dn: str
+    parent: str                 # 'OU=STAFF,DC=TEST,DC=LAB', '' without a parent
+    domain_component: str       # 'DC=TEST,DC=LAB'
+    domain: str                 # 'TEST.LAB', uppercase
+
+    @property
+    def rdns(self) -> List[str]:
+        """['CN=ALICE', 'OU=STAFF', 'DC=TEST', 'DC=LAB']"""
+        return self.dn.split(',')
+
+    @property
+    def cn(self) -> Optional[str]:
+        """Value of the first RDN if it's a CN"""
+        if self.dn.startswith('CN='):
+            return self.dn.split(',', 1)[0][3:]
+        return None
+
+    def ancestor(self, rdn_type: str, nth: int = 1) -> Optional[str]:
+        """DN from the nth RDN of a type (e.g. 'OU=') to the end, or None"""
+        dn = self.dn
+        start = 0 if dn.startswith(rdn_type) else None
+        search = 0
+        while True:
+            if start is None:
+                comma = dn.find(f',{rdn_type}', search)
+                if comma == -1:
+                    return None
+                start = comma + 1
+            nth -= 1
+            if nth == 0:
+                return dn[start:]
+            search, start = start, None
+
+
+@lru_cache(maxsize=DOMAIN_CACHE_SIZE)
+def _domain_parts(tail: str) -> Tuple[str, str]:
+    """Domain component and DNS domain of a DN's DC RDNs, shared by the domain's DNs"""
+    # same as bloodhound-python's ADUtils.ldap2domain
+    return tail, DC_SEPARATOR.sub('.', tail)[3:].upper()
+
+
+@lru_cache(maxsize=DN_CACHE_SIZE)
+def parse_dn(dn: str) -> ParsedDN:
+    parent = dn.partition(',')[2]
+    start = dn.find('DC=')
+    tail = dn[start:]
+    if start != -1 and (start == 0 or dn[start - 1] == ',') \
+            and tail.count(',') == tail.count(',DC='):
+        # the DC RDNs end the DN, as they usually do
+        domain_component, domain = _domain_parts(tail)
+    else:
+        domain_component = ','.join([rdn for rdn in dn.split(',') if rdn.startswith('DC=')])
+        domain = _domain_parts(tail)[1]
+    return ParsedDN(dn, parent, domain_component, domain)
+
+
+@lru_cache(maxsize=DOMAIN_CACHE_SIZE)
+def domain_to_dn(domain: str) -> str:
+    """DN of a DNS domain name, 'test.lab' -> 'DC=test,DC=lab'"""
+    return ','.join(f'DC={component}' for component in domain.split('.'))
@@ -0,0 +1,48 @@
+from array import array
+from typing import Iterable, List, Optional
+
+
+class DNTable():
+    """
+    Interning table that gives each normalized (uppercase) distinguished name an
+    integer ID. Lists of DNs are stored as array('I') of IDs, and every structure
+    that refers to the same DN shares the table's string for it.
+    """
+
+    __slots__ = ('_ids', '_dns')
+
+    def __init__(self):
+        self._ids = {} # {DN: ID}
+        self._dns = [] # [DN], by ID
+
+    def __len__(self):
+        return len(self._dns)
+
+    def __contains__(self, dn):
+        return dn in self._ids
+
+    def intern(self, dn: str) -> int:
+        """Return the ID of a DN, assigning the next one if it's new"""
+        id = self._ids.get(dn)
+        if id is None:
+            id = len(self._dns)
+            self._ids[dn] = id
+            self._dns.append(dn)
+        return id
+
+    def intern_all(self, dns: Iterable[str]) -> array:
+        return array('I', map(self.intern, dns))
+
+    def get(self, dn: str) -> Optional[int]:
+        """Return the ID of a DN, or None if it was never interned"""
+        return self._ids.get(dn)
+
+    def canonical(self, dn: str) -> str:
+        """Return the table's instance of a DN, interning it if it's new"""
+        return self._dns[self.intern(dn)]
+
+    def dn(self, id: int) -> str:
+        return self._dns[id]
+
+    def dns(self, ids: Iterable[int]) -> List[str]:
+        return [self._dns[id] for id in ids]
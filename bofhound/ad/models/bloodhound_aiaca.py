@@ -1,10 +1,14 @@
-from bloodhound.ad.utils import ADUtils
-from .bloodhound_object import BloodHoundObject
+from bofhound.ad.helpers import parse_dn
+from .bloodhound_object import BloodHoundObject, EMPTY_LIST
 from bofhound.logger import logger, OBJ_EXTRA_FMT, ColorScheme
 
 
 class BloodHoundAIACA(BloodHoundObject):
 
+    __slots__ = ('x509Certificate',)
+
+    _entry_type = "AIACA"
+
     GUI_PROPERTIES = [
         'domain', 'name', 'distinguishedname', 'domainsid', 'isaclprotected',
         'description', 'whencreated', 'crosscertificatepair', 'hascrosscertificatepair',
@@ -18,7 +22,6 @@ class BloodHoundAIACA(BloodHoundObject):
     def __init__(self, object):
         super().__init__(object)
 
-        self._entry_type = "AIACA"
         self.ContainedBy = {}
         self.IsACLProtected = False
         self.IsDeleted = False
@@ -28,7 +31,7 @@ class BloodHoundAIACA(BloodHoundObject):
             self.ObjectIdentifier = object.get("objectguid").upper()
 
         if 'distinguishedname' in object.keys():
-            domain = ADUtils.ldap2domain(object.get('distinguishedname')).upper()
+            domain = parse_dn(object.get('distinguishedname')).domain
             self.Properties['domain'] = domain
             self.Properties['distinguishedname'] = object.get('distinguishedname').upper()
 
@@ -1,5 +1,5 @@
-from bloodhound.ad.utils import ADUtils
-from .bloodhound_object import BloodHoundObject
+from bofhound.ad.helpers import parse_dn
+from .bloodhound_object import BloodHoundObject, EMPTY_LIST
 import ast
 import base64
 
@@ -8,6 +8,10 @@ from bofhound.logger import logger, OBJ_EXTRA_FMT, ColorScheme
 
 
 class BloodHoundCertTemplate(BloodHoundObject):
+    __slots__ = ('GPLinks', 'cas_ids')
+
+    _entry_type = "PKI Template"
+
     GUI_PROPERTIES = [
         'domain', 'name', 'distinguishedname', 'domainsid', 'isaclprotected',
         'description', 'whencreated', 'validityperiod', 'renewalperiod',
@@ -26,20 +30,20 @@ class BloodHoundCertTemplate(BloodHoundObject):
 
         super().__init__(object)
 
-        self._entry_type = "PKI Template"
-        self.GPLinks = []
+        self.GPLinks = EMPTY_LIST
         self.ContainedBy = {}
         self.IsACLProtected = False
-        self.cas_ids = []
+        self.cas_ids = EMPTY_LIST
 
         if 'objectguid' in object.keys():
             self.ObjectIdentifier = object.get("objectguid").upper()
 
         if 'distinguishedname' in object.keys():
-            domain = ADUtils.ldap2domain(object.get('distinguishedname')).upper()
+            dn = parse_dn(object.get('distinguishedname'))
+            domain = dn.domain
             self.Properties['domain'] = domain
             self.Properties['distinguishedname'] = object.get('distinguishedname').upper()
-            self.Properties['name'] = self.get_cn_from_dn(object.get('distinguishedname')) + "@" + domain
+            self.Properties['name'] = dn.cn + "@" + domain
 
         if 'description' in object.keys():
             self.Properties['description'] = object.get('description')
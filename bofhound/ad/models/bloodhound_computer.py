@@ -1,13 +1,20 @@
 import calendar
 from datetime import datetime
 from bloodhound.ad.utils import ADUtils, LDAP_SID
+from bofhound.ad.helpers import parse_dn
 
-from .bloodhound_object import BloodHoundObject
+from .bloodhound_object import BloodHoundObject, EMPTY_LIST
 from bofhound.logger import logger, OBJ_EXTRA_FMT, ColorScheme
 
 
 class BloodHoundComputer(BloodHoundObject):
 
+    __slots__ = ('not_collected', 'uac', 'hostname', 'PrimaryGroupSid', 'sessions',
+                 'AllowedToDelegate', 'MemberOfDNs', 'privileged_sessions',
+                 'registry_sessions', 'local_group_members', 'ipaddresses')
+
+    _entry_type = "Computer"
+
     GUI_PROPERTIES = [
         'domain', 'name', 'distinguishedname', 'domainsid', 'samaccountname',
         'haslaps', 'isaclprotected', 'description', 'whencreated', 'enabled',
@@ -33,7 +40,6 @@ class BloodHoundComputer(BloodHoundObject):
     def __init__(self, object):
         super().__init__(object)
 
-        self._entry_type = "Computer"
         self.not_collected = {
             "Collected": False,
             "FailureReason": None,
@@ -45,14 +51,14 @@ class BloodHoundComputer(BloodHoundObject):
         self.hostname = object.get('dnshostname', None)
         self.PrimaryGroupSid = self.get_primary_membership(object) # Returns none if non-existent
         self.sessions = None #['not currently supported by bofhound']
-        self.AllowedToDelegate = []
-        self.MemberOfDNs = []
-        self.sessions = []
+        self.AllowedToDelegate = EMPTY_LIST
+        self.MemberOfDNs = EMPTY_LIST
+        self.sessions = EMPTY_LIST
         self.ContainedBy = {}
-        self.privileged_sessions = []
-        self.registry_sessions = []
+        self.privileged_sessions = EMPTY_LIST
+        self.registry_sessions = EMPTY_LIST
         self.local_group_members = {} # {group_name: [{member_sid, member_type}]}
-        self.ipaddresses = []
+        self.ipaddresses = EMPTY_LIST
 
         if 'dnshostname' in object.keys():
             self.hostname = object.get('dnshostname', None)
@@ -64,24 +70,12 @@ class BloodHoundComputer(BloodHoundObject):
 
         if 'useraccountcontrol' in object.keys():
             self.uac = int(object.get('useraccountcontrol'))
-            self.Properties['unconstraineddelegation'] = self.uac & 0x00080000 == 0x00080000
-            self.Properties['enabled'] = self.uac & 2 == 0
-            self.Properties['trustedtoauth'] = self.uac & 0x01000000 == 0x01000000
-            self.Properties['isdc'] = self.uac & 0x2000 == 0x2000
-
-        if 'operatingsystem' in object.keys():
-            self.Properties['operatingsystem'] = object.get('operatingsystem', 'Unknown')
 
         if 'operatingsystemservicepack' in object.keys() and 'operatingsystem' in self.Properties:
             self.Properties['operatingsystem'] += f' {object.get("operatingsystemservicepack")}'
 
-        if 'sidhistory' in object.keys():
-            self.Properties['sidhistory'] = [LDAP_SID(bsid).formatCanonical() for bsid in object.get('sidhistory', [])]
-        else:
-            self.Properties['sidhistory'] = []
-
         if 'distinguishedname' in object.keys():
-            domain = ADUtils.ldap2domain(object.get('distinguishedname')).upper()
+            domain = parse_dn(object.get('distinguishedname')).domain
             self.Properties['domain'] = domain
             if 'samaccountname' in object.keys() and 'dnshostname' not in object.keys():
                 samacctname = object.get("samaccountname")
@@ -100,6 +94,32 @@ class BloodHoundComputer(BloodHoundObject):
         else:
             self.Properties['haslaps'] = False
 
+        if 'ntsecuritydescriptor' in object.keys():
+            self.RawAces = object['ntsecuritydescriptor']
+
+        if 'memberof' in object.keys():
+                self.MemberOfDNs = [f'CN={dn.upper()}' for dn in object.get('memberof').split(', CN=')]
+                if len(self.MemberOfDNs) > 0:
+                    self.MemberOfDNs[0] = self.MemberOfDNs[0][3:]
+
+        self.Properties.setdefault('email', None)
+        self.Properties.setdefault('description', None)
+
+
+    def _derive_properties(self, object):
+        super()._derive_properties(object)
+
+        if self.uac is not None:
+            self.Properties['unconstraineddelegation'] = self.uac & 0x00080000 == 0x00080000
+            self.Properties['enabled'] = self.uac & 2 == 0
+            self.Properties['trustedtoauth'] = self.uac & 0x01000000 == 0x01000000
+            self.Properties['isdc'] = self.uac & 0x2000 == 0x2000
+
+        if 'sidhistory' in object.keys():
+            self.Properties['sidhistory'] = [LDAP_SID(bsid).formatCanonical() for bsid in object.get('sidhistory', [])]
+        else:
+            self.Properties['sidhistory'] = []
+
         if 'lastlogontimestamp' in object.keys():
             self.Properties['lastlogontimestamp'] = ADUtils.win_timestamp_to_unix(
                 int(object.get('lastlogontimestamp'))
@@ -118,33 +138,6 @@ class BloodHoundComputer(BloodHoundObject):
         if 'serviceprincipalname' in object.keys():
             self.Properties['serviceprincipalnames'] = object.get('serviceprincipalname').split(', ')
 
-        if 'description' in object.keys():
-            self.Properties['description'] = object.get('description')
-        
-        if 'email' in object.keys():
-            self.Properties['email'] = object.get('email')
-
-        if 'samaccounttype' in object.keys():
-            self.Properties['samaccounttype'] = object.get('samaccounttype')    
-
-        if 'ntsecuritydescriptor' in object.keys():
-            self.RawAces = object['ntsecuritydescriptor']
-
-        if 'memberof' in object.keys():
-                self.MemberOfDNs = [f'CN={dn.upper()}' for dn in object.get('memberof').split(', CN=')]
-                if len(self.MemberOfDNs) > 0:
-                    self.MemberOfDNs[0] = self.MemberOfDNs[0][3:]
-
-        if 'email' in object.keys():
-            self.Properties['email'] = object.get('email')
-        else:
-            self.Properties['email'] = None
-
-        if 'description' in object.keys():
-            self.Properties['description'] = object.get('description')
-        else:
-            self.Properties['description'] = None
-
     def to_json(self, properties_level):
         self.Properties['isaclprotected'] = self.IsACLProtected
         data = super().to_json(properties_level)
@@ -224,11 +217,17 @@ class BloodHoundComputer(BloodHoundObject):
         }
 
         if session_type == 'privileged':
-            self.privileged_sessions.append(session)
+            attr = 'privileged_sessions'
         elif session_type == 'registry':
-            self.registry_sessions.append(session)
+            attr = 'registry_sessions'
         elif session_type == 'session':
-            self.sessions.append(session)
+            attr = 'sessions'
+        else:
+            return
+
+        # the same session can be reported by more than one tool or host name
+        if session not in getattr(self, attr):
+            self.append_to(attr, session)
 
 
     # add a local group member
@@ -1,10 +1,14 @@
-from bloodhound.ad.utils import ADUtils
-from .bloodhound_object import BloodHoundObject
+from bofhound.ad.helpers import parse_dn
+from .bloodhound_object import BloodHoundObject, EMPTY_LIST
 from bofhound.logger import logger, OBJ_EXTRA_FMT, ColorScheme
 
 
 class BloodHoundContainer(BloodHoundObject):
 
+    __slots__ = ('ChildObjects',)
+
+    _entry_type = "Container"
+
     GUI_PROPERTIES = [
         'domain', 'name', 'distinguishedname', 'domainsid', 'highvalue', 'isaclprotected'
     ]
@@ -15,7 +19,6 @@ class BloodHoundContainer(BloodHoundObject):
     def __init__(self, object):
         super().__init__(object)
 
-        self._entry_type = "Container"
         self.ContainedBy = {}
         self.Properties["blocksinheritance"] = False
 
@@ -23,7 +26,7 @@ class BloodHoundContainer(BloodHoundObject):
             self.ObjectIdentifier = object.get("objectguid").upper().upper()
         
         if 'distinguishedname' in object.keys() and 'ou' in object.keys():
-            self.Properties["domain"] = ADUtils.ldap2domain(object.get('distinguishedname').upper())
+            self.Properties["domain"] = parse_dn(object.get('distinguishedname')).domain
             self.Properties["name"] = f"{object.get('name').upper()}@{self.Properties['domain']}"
             logger.debug(f"Reading Container object {ColorScheme.ou}{self.Properties['name']}[/]", extra=OBJ_EXTRA_FMT)
         
@@ -34,8 +37,8 @@ class BloodHoundContainer(BloodHoundObject):
 
         self.Properties["highvalue"] = False
 
-        self.Aces = []
-        self.ChildObjects = []
+        self.Aces = EMPTY_LIST
+        self.ChildObjects = EMPTY_LIST
         self.IsDeleted = False
         self.IsACLProtected = False
 
@@ -1,5 +1,6 @@
 from adidnsdump import dnsdump
 from bofhound.logger import logger, OBJ_EXTRA_FMT, ColorScheme
+from bofhound.ad.helpers import parse_dn
 import base64
 
 class BloodHoundDnsNode(object):
@@ -12,9 +13,9 @@ class BloodHoundDnsNode(object):
         if 'dnsrecord' in object.keys() and 'name' in object.keys() and 'distinguishedname' in object.keys():
             dn = object.get('distinguishedname')
             self.distinguishedName = dn.upper()
-            dn = dn.split(',')
-            domain_name = dn[0].split('=')[1]
-            domain_suffix = dn[1].split('=')[1]
+            rdns = parse_dn(dn).rdns
+            domain_name = rdns[0].split('=')[1]
+            domain_suffix = rdns[1].split('=')[1]
 
             if domain_name in ['@', 'DomainDnsZones', 'ForestDnsZones'] or domain_suffix in ['RootDNSServers', '..TrustAnchors']:
                 logger.debug(f"Ignoring dnsNode object {ColorScheme.dns}{self.distinguishedName}[/]", extra=OBJ_EXTRA_FMT)
@@ -1,11 +1,17 @@
 from bloodhound.ad.utils import ADUtils
-from .bloodhound_object import BloodHoundObject
+from bofhound.ad.helpers import parse_dn
+from .bloodhound_object import BloodHoundObject, EMPTY_LIST
 
 from bofhound.logger import logger, OBJ_EXTRA_FMT, ColorScheme
 
 
 class BloodHoundDomain(BloodHoundObject):
 
+    __slots__ = ('GPLinks', 'Trusts', 'Links', 'ChildObjects', 'GPOChanges',
+                 'AffectedComputers', 'AffectedUsers')
+
+    _entry_type = "Domain"
+
     GUI_PROPERTIES = [
         'distinguishedname', 'domainsid', 'description', 'whencreated',
         'functionallevel', 'domain', 'isaclprotected', 'collected',
@@ -18,8 +24,7 @@ class BloodHoundDomain(BloodHoundObject):
     def __init__(self, object):
         super().__init__(object)
 
-        self._entry_type = "Domain"
-        self.GPLinks = []
+        self.GPLinks = EMPTY_LIST
         self.ContainedBy = {}
         level_id = object.get('msds-behavior-version', 0)
         try:
@@ -32,9 +37,10 @@ class BloodHoundDomain(BloodHoundObject):
         self.Properties['collected'] = True
 
         if 'distinguishedname' in object.keys():
-            self.Properties["name"] = ADUtils.ldap2domain(object.get('distinguishedname').upper())
+            dn = parse_dn(object.get('distinguishedname'))
+            self.Properties["name"] = dn.domain
             self.Properties["domain"] = self.Properties["name"]
-            dc = BloodHoundObject.get_domain_component(object.get('distinguishedname').upper())
+            dc = dn.domain_component
             logger.debug(f"Reading Domain object {ColorScheme.domain}{self.Properties['name']}[/]", extra=OBJ_EXTRA_FMT)
 
         if 'objectsid' in object.keys():
@@ -59,10 +65,10 @@ class BloodHoundDomain(BloodHoundObject):
 
         self.Properties["functionallevel"] = functional_level
 
-        self.Trusts = []
-        self.Aces = []
-        self.Links = []
-        self.ChildObjects = []
+        self.Trusts = EMPTY_LIST
+        self.Aces = EMPTY_LIST
+        self.Links = EMPTY_LIST
+        self.ChildObjects = EMPTY_LIST
         self.GPOChanges = {
             "AffectedComputers": [],
             "DcomUsers": [],
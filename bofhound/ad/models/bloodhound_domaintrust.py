@@ -1,10 +1,9 @@
-from bloodhound.ad.utils import ADUtils
 from bloodhound.ad.trusts import ADDomainTrust
 from impacket.ldap.ldaptypes import LDAP_SID
 
 from bofhound.logger import logger, OBJ_EXTRA_FMT, ColorScheme
 from bofhound.ad.models.bloodhound_object import BloodHoundObject
-from bofhound.ad.helpers import TrustType, TrustDirection
+from bofhound.ad.helpers import TrustType, TrustDirection, parse_dn
 
 
 class BloodHoundDomainTrust(object):
@@ -28,12 +27,18 @@ class BloodHoundDomainTrust(object):
             'trustdirection' in object.keys() and 'trusttype' in object.keys() and 'trustattributes' in object.keys() and \
             'securityidentifier' in object.keys():
             
-            self.LocalDomainDn = BloodHoundObject.get_domain_component(object.get('distinguishedname')).upper()
+            dn = parse_dn(object.get('distinguishedname'))
+            self.LocalDomainDn = dn.domain_component.upper()
             trust_partner = object.get('trustpartner').upper()
-            domain = ADUtils.ldap2domain(object.get('distinguishedname')).upper()
+            domain = dn.domain
             logger.debug(f'Reading trust relationship between {ColorScheme.domain}{domain}[/] and {ColorScheme.domain}{trust_partner}[/]', extra=OBJ_EXTRA_FMT)
-            domainsid = LDAP_SID()
-            domainsid.fromCanonical(object.get('securityidentifier'))
+            securityidentifier = object.get('securityidentifier')
+            if securityidentifier.upper().startswith('S-'):
+                domainsid = LDAP_SID()
+                domainsid.fromCanonical(securityidentifier)
+            else:
+                # BRc4 writes the binary SID as hex
+                domainsid = LDAP_SID(bytes.fromhex(securityidentifier))
             trust = ADDomainTrust(trust_partner, int(object.get('trustdirection')), object.get('trusttype'), int(object.get('trustattributes')), domainsid.getData())
             self.TrustProperties = trust.to_output()
 
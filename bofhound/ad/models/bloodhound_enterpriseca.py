@@ -1,12 +1,17 @@
-from bloodhound.ad.utils import ADUtils
+from bofhound.ad.helpers import parse_dn
 
-from .bloodhound_object import BloodHoundObject
+from .bloodhound_object import BloodHoundObject, EMPTY_LIST
 from bofhound.logger import logger, OBJ_EXTRA_FMT, ColorScheme
 from bofhound.ad.helpers.cert_utils import PkiCertificateAuthorityFlags
 
 
 class BloodHoundEnterpriseCA(BloodHoundObject):
 
+    __slots__ = ('CARegistryData', 'x509Certificate', 'HostingComputer',
+                 'EnabledCertTemplates', 'CertTemplates')
+
+    _entry_type = "EnterpriseCA"
+
     GUI_PROPERTIES = [
         'domain', 'name', 'distinguishedname', 'domainsid', 'isaclprotected',
         'description', 'whencreated', 'flags', 'caname', 'dnshostname', 'certthumbprint',
@@ -21,7 +26,6 @@ class BloodHoundEnterpriseCA(BloodHoundObject):
     def __init__(self, object):
         super().__init__(object)
 
-        self._entry_type = "EnterpriseCA"
         self.IsDeleted = False
         self.ContainedBy = {}
         self.IsACLProtected = False
@@ -36,7 +40,7 @@ class BloodHoundEnterpriseCA(BloodHoundObject):
             self.ObjectIdentifier = object.get("objectguid").upper()
 
         if 'distinguishedname' in object.keys():
-            domain = ADUtils.ldap2domain(object.get('distinguishedname')).upper()
+            domain = parse_dn(object.get('distinguishedname')).domain
             self.Properties['domain'] = domain
             self.Properties['distinguishedname'] = object.get('distinguishedname').upper()
 
@@ -64,7 +68,7 @@ class BloodHoundEnterpriseCA(BloodHoundObject):
             self.RawAces = object['ntsecuritydescriptor']
 
         self.HostingComputer = None
-        self.EnabledCertTemplates = []
+        self.EnabledCertTemplates = EMPTY_LIST
 
         if 'certificatetemplates' in object.keys():
             self.CertTemplates = object.get('certificatetemplates').split(', ')
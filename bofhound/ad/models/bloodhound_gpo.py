@@ -1,11 +1,15 @@
-from bloodhound.ad.utils import ADUtils
+from bofhound.ad.helpers import parse_dn
 
-from .bloodhound_object import BloodHoundObject
+from .bloodhound_object import BloodHoundObject, EMPTY_LIST
 from bofhound.logger import logger, OBJ_EXTRA_FMT, ColorScheme
 
 
 class BloodHoundGPO(BloodHoundObject):
 
+    __slots__ = ()
+
+    _entry_type = "GPO"
+
     GUI_PROPERTIES = [
         'distinguishedname', 'whencreated',
         'domain', 'domainsid', 'name', 'highvalue',
@@ -18,11 +22,10 @@ class BloodHoundGPO(BloodHoundObject):
     def __init__(self, object):
         super().__init__(object)
 
-        self._entry_type = "GPO"
         self.ContainedBy = {}
         
         if 'distinguishedname' in object.keys() and 'displayname' in object.keys():
-            self.Properties["domain"] = ADUtils.ldap2domain(object.get('distinguishedname').upper())
+            self.Properties["domain"] = parse_dn(object.get('distinguishedname')).domain
             self.Properties["name"] = f"{object.get('displayname').upper()}@{self.Properties['domain']}"
             logger.debug(f"Reading GPO object {ColorScheme.gpo}{self.Properties['name']}[/]", extra=OBJ_EXTRA_FMT)
 
@@ -40,7 +43,7 @@ class BloodHoundGPO(BloodHoundObject):
 
         self.Properties["highvalue"] = False
 
-        self.Aces = []
+        self.Aces = EMPTY_LIST
 
         self.IsDeleted = False
         self.IsACLProtected = False
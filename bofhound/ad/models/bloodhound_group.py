@@ -1,11 +1,16 @@
 from bloodhound.ad.utils import ADUtils
+from bofhound.ad.helpers import parse_dn
 
-from .bloodhound_object import BloodHoundObject
+from .bloodhound_object import BloodHoundObject, EMPTY_LIST
 from bofhound.logger import logger, OBJ_EXTRA_FMT, ColorScheme
 
 
 class BloodHoundGroup(BloodHoundObject):
 
+    __slots__ = ('Members', 'MemberDNs', 'MemberOfDNs')
+
+    _entry_type = "Group"
+
     GUI_PROPERTIES = [
         'distinguishedname', 'samaccountname', 'objectsid',
         'admincount', 'description', 'whencreated',
@@ -19,18 +24,17 @@ class BloodHoundGroup(BloodHoundObject):
     def __init__(self, object):
         super().__init__(object)
 
-        self._entry_type = "Group"
-        self.Members = []
-        self.Aces = []
+        self.Members = EMPTY_LIST
+        self.Aces = EMPTY_LIST
         self.ContainedBy = {}
         self.IsDeleted = False
         self.IsACLProtected = False
-        self.MemberDNs = []
-        self.MemberOfDNs = []
+        self.MemberDNs = EMPTY_LIST
+        self.MemberOfDNs = EMPTY_LIST
         self.IsACLProtected = False
 
         if 'distinguishedname' in object.keys() and 'samaccountname' in object.keys():
-            domain = ADUtils.ldap2domain(object.get('distinguishedname')).upper()
+            domain = parse_dn(object.get('distinguishedname')).domain
             name = f'{object.get("samaccountname")}@{domain}'.upper()
             self.Properties["name"] = name
             self.Properties["domain"] = domain
@@ -71,7 +75,7 @@ class BloodHoundGroup(BloodHoundObject):
             "ObjectIdentifier": object.ObjectIdentifier,
             "ObjectType": object_type
         }
-        self.Members.append(member)
+        self.append_to('Members', member)
 
 
     def to_json(self, properties_level):
@@ -1,14 +1,18 @@
 import hashlib
 import base64
 from asn1crypto import x509
-from bloodhound.ad.utils import ADUtils
+from bofhound.ad.helpers import parse_dn
 
-from .bloodhound_object import BloodHoundObject
+from .bloodhound_object import BloodHoundObject, EMPTY_LIST
 from bofhound.logger import logger, OBJ_EXTRA_FMT, ColorScheme
 
 
 class BloodHoundIssuancePolicy(BloodHoundObject):
 
+    __slots__ = ('GroupLink',)
+
+    _entry_type = "IssuancePolicy"
+
     GUI_PROPERTIES = [
         'domain', 'name', 'distinguishedname', 'domainsid', 'isaclprotected',
         'description', 'whencreated', 'displayname', 'certtemplateoid'
@@ -20,7 +24,6 @@ class BloodHoundIssuancePolicy(BloodHoundObject):
     def __init__(self, object):
         super().__init__(object)
 
-        self._entry_type = "IssuancePolicy"
         self.IsDeleted = False
         self.ContainedBy = {}
         self.IsACLProtected = False
@@ -30,7 +33,7 @@ class BloodHoundIssuancePolicy(BloodHoundObject):
             self.ObjectIdentifier = object.get("objectguid").upper()
 
         if 'distinguishedname' in object.keys():
-            domain = ADUtils.ldap2domain(object.get('distinguishedname')).upper()
+            domain = parse_dn(object.get('distinguishedname')).domain
             self.Properties['domain'] = domain
             self.Properties['distinguishedname'] = object.get('distinguishedname').upper()
 
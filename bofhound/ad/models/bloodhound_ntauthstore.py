@@ -1,14 +1,18 @@
 import hashlib
 import base64
 from asn1crypto import x509
-from bloodhound.ad.utils import ADUtils
+from bofhound.ad.helpers import parse_dn
 
-from .bloodhound_object import BloodHoundObject
+from .bloodhound_object import BloodHoundObject, EMPTY_LIST
 from bofhound.logger import logger, OBJ_EXTRA_FMT, ColorScheme
 
 
 class BloodHoundNTAuthStore(BloodHoundObject):
 
+    __slots__ = ()
+
+    _entry_type = "NTAuthStore"
+
     GUI_PROPERTIES = [
         'domain', 'name', 'distinguishedname', 'domainsid', 'isaclprotected',
         'description', 'whencreated', 'certthumbprints'
@@ -20,7 +24,6 @@ class BloodHoundNTAuthStore(BloodHoundObject):
     def __init__(self, object):
         super().__init__(object)
 
-        self._entry_type = "NTAuthStore"
         self.IsDeleted = False
         self.ContainedBy = {}
         self.IsACLProtected = False
@@ -31,7 +34,7 @@ class BloodHoundNTAuthStore(BloodHoundObject):
             self.ObjectIdentifier = object.get("objectguid").upper()
 
         if 'distinguishedname' in object.keys():
-            domain = ADUtils.ldap2domain(object.get('distinguishedname')).upper()
+            domain = parse_dn(object.get('distinguishedname')).domain
             self.Properties['domain'] = domain
             self.Properties['distinguishedname'] = object.get('distinguishedname').upper()
 
@@ -1,6 +1,7 @@
 import calendar
 import hashlib
 import base64
+from functools import lru_cache
 from asn1crypto import x509
 from datetime import datetime
 from bloodhound.enumeration.acls import SecurityDescriptor, ACL, ACCESS_ALLOWED_ACE, ACCESS_MASK, ACE, ACCESS_ALLOWED_OBJECT_ACE, has_extended_right, EXTRIGHTS_GUID_MAPPING, can_write_property, ace_applies
@@ -8,13 +9,45 @@ from bloodhound.ad.utils import ADUtils
 
 from bofhound.logger import logger, OBJ_EXTRA_FMT, ColorScheme
 from bofhound.ad.models.bloodhound_schema import BloodHoundSchema
-from bofhound.ad.helpers import PropertiesLevel
+from bofhound.ad.helpers import PropertiesLevel, parse_dn, domain_to_dn
 
 # TODO: Move appropriate actions from this class to a super class of Users/Computers/maybe groups?
 
 
+class EmptyList(list):
+    """
+    Read-only empty list shared by every model attribute that has no items yet, so
+    the list is only allocated when the first item is added with append_to
+    """
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("EMPTY_LIST is shared, add items with BloodHoundObject.append_to")
+
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+
+
+EMPTY_LIST = EmptyList()
+
+
+@lru_cache(maxsize=None)
+def slot_names(cls):
+    """Every slot of a model class, including those declared by its base classes"""
+    return tuple(dict.fromkeys(
+        name for klass in reversed(cls.__mro__) for name in getattr(klass, '__slots__', ())
+    ))
+
+
 class BloodHoundObject():
 
+    # Models are created for every object in the forest, so they have no __dict__.
+    # Subclasses declare the attributes they add in their own __slots__.
+    __slots__ = ('ObjectIdentifier', 'Aces', 'RawAces', 'Properties', 'ContainedBy',
+                 'IsDeleted', 'IsACLProtected', '_derived')
+
+    _entry_type = None
+
     GUI_PROPERTIES = [
     ]
 
@@ -27,22 +60,22 @@ class BloodHoundObject():
 
     def __init__(self, object=None):
         self.ObjectIdentifier = None
-        self.Aces = []
+        self.Aces = EMPTY_LIST
         self.RawAces = None
         self.Properties = {}
+        self._derived = not object
 
         if isinstance(object, dict):
-            # Ensure all keys are lowercase
-            for item in object.keys():
-                self.Properties[item.lower()] = object[item]
+            # The parsers emit lowercase keys, so the parsed object is adopted as the
+            # properties without a copy. Properties derived from the raw attributes are
+            # only computed by derive_properties, when the object is written.
+            self.Properties = object
 
             self.ObjectIdentifier = BloodHoundObject.get_sid(object.get('objectsid', None), object.get('distinguishedname', None))
 
             if 'distinguishedname' in object.keys():
                 self.Properties["distinguishedname"] = object.get('distinguishedname', None).upper()
 
-            self.__parse_whencreated(object)
-
 
     def get_primary_membership(self, object):
         """
@@ -63,31 +96,48 @@ class BloodHoundObject():
         object          -- the new object to merge (required)
         base_preference -- whether or not to prefer the base object. If true, self's properties could be overwritten (default False)
         """
-        self_attributes = self.__dict__.keys()
-        for attr, value in object.__dict__.items():
+        for attr in slot_names(type(object)):
+            if attr == '_derived':
+                continue
+            try:
+                value = getattr(object, attr)
+            except AttributeError:
+                # the slot was never set on the other object
+                continue
+
             if attr == 'Properties':
-                for k, v in getattr(object, attr).items():
-                    if not k in getattr(self, attr).keys():
-                        getattr(self, attr)[k] = v
+                for k, v in value.items():
+                    if not k in self.Properties.keys():
+                        self.Properties[k] = v
                     else:
                         if k == 'distinguishedname':
-                            if not getattr(self, attr)[k]:
-                                getattr(self, attr)[k] = v
+                            if not self.Properties[k]:
+                                self.Properties[k] = v
                         if not base_preference:
-                            if getattr(object, attr).get(k, None):
-                                getattr(self, attr)[k] = v
+                            if v:
+                                self.Properties[k] = v
 
-            elif not attr in self_attributes:
-                setattr(self, attr, value)
+            elif not hasattr(self, attr):
+                # attributes of another model class can't be kept on this one
+                if attr in slot_names(type(self)):
+                    setattr(self, attr, value)
             else:
                 if attr == 'ObjectIdentifier':
                     if not self.ObjectIdentifier:
                         setattr(self, attr, value)
 
                 if not base_preference:
-                    if getattr(object, attr):
+                    if value:
                         setattr(self, attr, value)
-    
+
+
+    def append_to(self, attr, item):
+        """Append an item to a list attribute, allocating the list if it's EMPTY_LIST"""
+        items = getattr(self, attr)
+        if items is EMPTY_LIST:
+            items = []
+            setattr(self, attr, items)
+        items.append(item)
 
 
     def get_distinguished_name(self):
@@ -104,7 +154,21 @@ class BloodHoundObject():
             return None
 
 
+    def derive_properties(self):
+        """Replace raw attributes with the properties derived from them, only once"""
+        if self._derived:
+            return
+        self._derived = True
+        self._derive_properties(self.Properties)
+
+
+    def _derive_properties(self, object):
+        """Compute derived properties from the raw attributes in object (self.Properties)"""
+        self.__parse_whencreated(object)
+
+
     def to_json(self, properties_level):
+        self.derive_properties()
         data = {
             "Properties": {}
         }
@@ -146,7 +210,7 @@ class BloodHoundObject():
             "GUID": object.ObjectIdentifier,
             "IsEnforced": False
         }
-        self.Links.append(link)
+        self.append_to('Links', link)
 
 
     # used by Domains and OUs
@@ -155,14 +219,13 @@ class BloodHoundObject():
             "ObjectIdentifier": object.ObjectIdentifier,
             "ObjectType": object_type
         }
-        self.ChildObjects.append(member)
+        self.append_to('ChildObjects', member)
 
 
     @staticmethod
     def get_sid(sid, dn=None):
         if sid in ADUtils.WELLKNOWN_SIDS:
-            domain = ADUtils.ldap2domain(dn).upper()
-            PrincipalSid = f'{domain}-{sid}'
+            PrincipalSid = f'{parse_dn(dn).domain}-{sid}'
         else:
             PrincipalSid = sid
 
@@ -172,28 +235,17 @@ class BloodHoundObject():
     # Should probably move to ADDS?
     @staticmethod
     def get_domain_component(dn):
-        dc = ''
-        for component in dn.split(','):
-            if component.startswith('DC='):
-                dc += f"{component},"
-        return dc[:-1]
+        return parse_dn(dn).domain_component
 
 
     @staticmethod
     def get_dn(domain):
-        components = domain.split('.')
-        base = ''
-        for comp in components:
-            base += f',DC={comp}'
-        
-        return base[1:]
+        return domain_to_dn(domain)
     
     
     @staticmethod
     def get_cn_from_dn(dn):
-        for component in dn.split(',', 1):
-            if component.startswith('CN='):
-                return component[3:]
+        return parse_dn(dn).cn
     
     #
     # for AIACAs, EnterpriseCAs, and RootCAs
@@ -1,11 +1,16 @@
-from bloodhound.ad.utils import ADUtils
+from bofhound.ad.helpers import parse_dn
 
-from .bloodhound_object import BloodHoundObject
+from .bloodhound_object import BloodHoundObject, EMPTY_LIST
 from bofhound.logger import logger, OBJ_EXTRA_FMT, ColorScheme
 
 
 class BloodHoundOU(BloodHoundObject):
 
+    __slots__ = ('GPLinks', 'Links', 'ChildObjects', 'GPOChanges', 'AffectedComputers',
+                 'AffectedUsers')
+
+    _entry_type = "OU"
+
     GUI_PROPERTIES = [
         'distinguishedname', 'whencreated',
         'domain', 'domainsid', 'name', 'highvalue', 'description',
@@ -18,13 +23,12 @@ class BloodHoundOU(BloodHoundObject):
     def __init__(self, object):
         super().__init__(object)
 
-        self._entry_type = "OU"
-        self.GPLinks = []
+        self.GPLinks = EMPTY_LIST
         self.ContainedBy = {}
         self.Properties["blocksinheritance"] = False
 
         if 'distinguishedname' in object.keys() and 'ou' in object.keys():
-            self.Properties["domain"] = ADUtils.ldap2domain(object.get('distinguishedname').upper())
+            self.Properties["domain"] = parse_dn(object.get('distinguishedname')).domain
             self.Properties["name"] = f"{object.get('ou').upper()}@{self.Properties['domain']}"
             logger.debug(f"Reading OU object {ColorScheme.ou}{self.Properties['name']}[/]", extra=OBJ_EXTRA_FMT)
 
@@ -48,9 +52,9 @@ class BloodHoundOU(BloodHoundObject):
 
         self.Properties["highvalue"] = False
 
-        self.Aces = []
-        self.Links = []
-        self.ChildObjects = []
+        self.Aces = EMPTY_LIST
+        self.Links = EMPTY_LIST
+        self.ChildObjects = EMPTY_LIST
         self.GPOChanges = {
             "AffectedComputers": [],
             "AffectedUsers": [],
@@ -1,11 +1,15 @@
-from bloodhound.ad.utils import ADUtils
+from bofhound.ad.helpers import parse_dn
 
-from .bloodhound_object import BloodHoundObject
+from .bloodhound_object import BloodHoundObject, EMPTY_LIST
 from bofhound.logger import logger, OBJ_EXTRA_FMT, ColorScheme
 
 
 class BloodHoundRootCA(BloodHoundObject):
 
+    __slots__ = ('x509Certificate',)
+
+    _entry_type = "RootCA"
+
     GUI_PROPERTIES = [
         'domain', 'name', 'distinguishedname', 'domainsid', 'isaclprotected',
         'description', 'whencreated', 'certthumbprint', 'certname', 'certchain',
@@ -18,7 +22,6 @@ class BloodHoundRootCA(BloodHoundObject):
     def __init__(self, object):
         super().__init__(object)
 
-        self._entry_type = "RootCA"
         self.ContainedBy = {}
         self.IsACLProtected = False
         self.IsDeleted = False
@@ -28,7 +31,7 @@ class BloodHoundRootCA(BloodHoundObject):
             self.ObjectIdentifier = object.get("objectguid").upper()
 
         if 'distinguishedname' in object.keys():
-            domain = ADUtils.ldap2domain(object.get('distinguishedname')).upper()
+            domain = parse_dn(object.get('distinguishedname')).domain
             self.Properties['domain'] = domain
             self.Properties['distinguishedname'] = object.get('distinguishedname').upper()
 
@@ -1,13 +1,19 @@
 from bloodhound.ad.utils import ADUtils
 from bloodhound.ad.structures import LDAP_SID
 from bloodhound.enumeration.memberships import MembershipEnumerator
+from bofhound.ad.helpers import parse_dn
 
-from .bloodhound_object import BloodHoundObject
+from .bloodhound_object import BloodHoundObject, EMPTY_LIST
 from bofhound.logger import logger, OBJ_EXTRA_FMT, ColorScheme
 
 
 class BloodHoundUser(BloodHoundObject):
 
+    __slots__ = ('PrimaryGroupSid', 'AllowedToDelegate', 'SPNTargets', 'HasSIDHistory',
+                 'MemberOfDNs')
+
+    _entry_type = "User"
+
     GUI_PROPERTIES = [
         'domain', 'name', 'distinguishedname', 'domainsid', 'samaccountname',
         'isaclprotected', 'description', 'whencreated', 'sensitive',
@@ -28,21 +34,20 @@ class BloodHoundUser(BloodHoundObject):
     def __init__(self, object=None):
         super().__init__(object)
 
-        self._entry_type = "User"
         self.PrimaryGroupSid = None
-        self.AllowedToDelegate = []
-        self.Aces = []
+        self.AllowedToDelegate = EMPTY_LIST
+        self.Aces = EMPTY_LIST
         self.ContainedBy = {}
-        self.SPNTargets = []
-        self.HasSIDHistory = []
+        self.SPNTargets = EMPTY_LIST
+        self.HasSIDHistory = EMPTY_LIST
         self.IsACLProtected = False
-        self.MemberOfDNs = []
+        self.MemberOfDNs = EMPTY_LIST
 
         if isinstance(object, dict):
             self.PrimaryGroupSid = self.get_primary_membership(object) # Returns none if not exist
 
             if 'distinguishedname' in object.keys() and 'samaccountname' in object.keys():
-                domain = ADUtils.ldap2domain(object.get('distinguishedname')).upper()
+                domain = parse_dn(object.get('distinguishedname')).domain
                 name = f'{object.get("samaccountname")}@{domain}'.upper()
                 self.Properties["name"] = name
                 self.Properties["domain"] = domain
@@ -53,70 +58,12 @@ class BloodHoundUser(BloodHoundObject):
 
             # self.Properties["highvalue"] = False,
 
-            if 'useraccountcontrol' in object.keys():
-                uac = int(object.get('useraccountcontrol', 0))
-                self.Properties["unconstraineddelegation"] = uac & 0x00080000 == 0x00080000
-                self.Properties["passwordnotreqd"] = uac & 0x00000020 == 0x00000020
-                self.Properties["enabled"] = uac & 2 == 0
-                self.Properties["dontreqpreauth"] = uac & 0x00400000 == 0x00400000
-                self.Properties["sensitive"] = uac & 0x00100000 == 0x00100000
-                self.Properties["trustedtoauth"] = uac & 0x01000000 == 0x01000000
-                self.Properties["pwdneverexpires"] = uac & 0x00010000 == 0x00010000
-
-            if 'lastlogon' in object.keys():
-                self.Properties["lastlogon"] = ADUtils.win_timestamp_to_unix(
-                    int(object.get('lastlogon'))
-                )
-
-            if 'lastlogontimestamp' in object.keys():
-                self.Properties["lastlogontimestamp"] = ADUtils.win_timestamp_to_unix(
-                    int(object.get('lastlogontimestamp'))
-                )
-
-            if 'pwdlastset' in object.keys():
-                self.Properties["pwdlastset"] = ADUtils.win_timestamp_to_unix(
-                    int(object.get('pwdlastset'))
-                )
-
-            if 'useraccountcontrol' in object.keys():
-                self.Properties["dontreqpreauth"] = int(object.get('useraccountcontrol', 0)) & 0x00400000 == 0x00400000
-                self.Properties["pwdneverexpires"] = int(object.get('useraccountcontrol', 0)) & 0x00010000 == 0x00010000
-                self.Properties["sensitive"] = int(object.get('useraccountcontrol', 0)) & 0x00100000 == 0x00100000
-
-            if 'serviceprincipalname' in object.keys():
-                self.Properties["serviceprincipalnames"] = object.get('serviceprincipalname').split(',')
-                self.Properties['hasspn'] = True
-            else:
-                self.Properties["serviceprincipalnames"] = []
-                self.Properties['hasspn'] = False
-
-            if 'serviceprincipalname' in object.keys():
-                self.Properties["hasspn"] = len(object.get('serviceprincipalname', [])) > 0
-
-            if 'samaccounttype' in object.keys():
-                self.Properties["samaccounttype"] = object.get('samaccounttype')
-            
-            if 'displayname' in object.keys():
-                self.Properties["displayname"] = object.get('displayname')
-
             if 'mail' in object.keys():
                 self.Properties["email"] = object.get('mail')
 
-            if 'title' in object.keys():
-                self.Properties["title"] = object.get('title')
-
-            if 'homedirectory' in object.keys():
-                self.Properties["homedirectory"] = object.get('homedirectory')
-
-            if 'description' in object.keys():
-                self.Properties["description"] = object.get('description')
-
             if 'userpassword' in object.keys():
                 self.Properties["userpassword"] = ADUtils.ensure_string(object.get('userpassword'))
 
-            if 'sidhistory' in object.keys():
-                self.Properties["sidhistory"] = [LDAP_SID(bsid).formatCanonical() for bsid in object.get('sIDHistory', [])]
-
             if 'msds-allowedtodelegateto' in object.keys():
                 if len(object.get('msds-allowedtodelegateto', [])) > 0:
                     self.Properties['allowedtodelegate'] = object.get('msds-allowedtodelegateto', [])
@@ -142,6 +89,45 @@ class BloodHoundUser(BloodHoundObject):
             # self.Properties['sidhistory'] = []
 
 
+    def _derive_properties(self, object):
+        super()._derive_properties(object)
+
+        if 'useraccountcontrol' in object.keys():
+            uac = int(object.get('useraccountcontrol', 0))
+            self.Properties["unconstraineddelegation"] = uac & 0x00080000 == 0x00080000
+            self.Properties["passwordnotreqd"] = uac & 0x00000020 == 0x00000020
+            self.Properties["enabled"] = uac & 2 == 0
+            self.Properties["dontreqpreauth"] = uac & 0x00400000 == 0x00400000
+            self.Properties["sensitive"] = uac & 0x00100000 == 0x00100000
+            self.Properties["trustedtoauth"] = uac & 0x01000000 == 0x01000000
+            self.Properties["pwdneverexpires"] = uac & 0x00010000 == 0x00010000
+
+        if 'lastlogon' in object.keys():
+            self.Properties["lastlogon"] = ADUtils.win_timestamp_to_unix(
+                int(object.get('lastlogon'))
+            )
+
+        if 'lastlogontimestamp' in object.keys():
+            self.Properties["lastlogontimestamp"] = ADUtils.win_timestamp_to_unix(
+                int(object.get('lastlogontimestamp'))
+            )
+
+        if 'pwdlastset' in object.keys():
+            self.Properties["pwdlastset"] = ADUtils.win_timestamp_to_unix(
+                int(object.get('pwdlastset'))
+            )
+
+        if 'serviceprincipalname' in object.keys():
+            self.Properties["serviceprincipalnames"] = object.get('serviceprincipalname').split(',')
+            self.Properties['hasspn'] = len(object.get('serviceprincipalname', [])) > 0
+        else:
+            self.Properties["serviceprincipalnames"] = []
+            self.Properties['hasspn'] = False
+
+        if 'sidhistory' in object.keys():
+            self.Properties["sidhistory"] = [LDAP_SID(bsid).formatCanonical() for bsid in object.get('sIDHistory', [])]
+
+
     def to_json(self, properties_level):
         self.Properties['isaclprotected'] = self.IsACLProtected
         user = super().to_json(properties_level)
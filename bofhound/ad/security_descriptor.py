@@ -0,0 +1,121 @@
+"""
+Decoder for binary nTSecurityDescriptors ([MS-DTYP] 2.4.6). Only the owner and the
+DACL are read, straight from the descriptor bytes with struct offsets, and ACEs are
+yielded as plain tuples instead of the per-field objects bloodhound-python builds.
+"""
+import struct
+from functools import lru_cache
+from typing import Iterator, Optional, Tuple
+
+SE_DACL_PROTECTED = 0x1000
+SE_SELF_RELATIVE = 0x8000
+
+ACCESS_ALLOWED_ACE_TYPE = 0x00
+ACCESS_DENIED_ACE_TYPE = 0x01
+ACCESS_ALLOWED_OBJECT_ACE_TYPE = 0x05
+ACCESS_DENIED_OBJECT_ACE_TYPE = 0x06
+
+ACE_OBJECT_TYPE_PRESENT = 0x01
+ACE_INHERITED_OBJECT_TYPE_PRESENT = 0x02
+
+_HEADER = struct.Struct("<BBHIIII")
+_ACL_HEADER = struct.Struct("<BBHHH")
+_ACE_HEADER = struct.Struct("<BBH")
+_UINT32 = struct.Struct("<I")
+_OBJECT_ACE_FIXED = struct.Struct("<II")
+
+# (ace type, ace flags, access mask, object type, inherited object type, sid)
+# The GUIDs are the raw 16 bytes, or None when the ACE doesn't carry them. ACE types
+# without a mask and SID have mask 0 and empty bytes as SID.
+AceTuple = Tuple[int, int, int, Optional[bytes], Optional[bytes], bytes]
+
+
+class SecurityDescriptorError(ValueError):
+    """The descriptor is truncated or not self-relative"""
+
+
+def _sid_end(buffer, offset: int, limit: int) -> int:
+    """Return where the SID at offset ends, checking it fits before limit"""
+    if offset + 8 > limit:
+        raise SecurityDescriptorError(f"SID at offset {offset} is truncated")
+    end = offset + 8 + 4 * buffer[offset + 1]
+    if end > limit:
+        raise SecurityDescriptorError(f"SID at offset {offset} is truncated")
+    return end
+
+
+def decode_security_descriptor(value: bytes) -> Tuple[int, Optional[bytes], Iterator[AceTuple]]:
+    """
+    Return the control flags, the owner SID bytes (None if the descriptor has no owner)
+    and an iterator over the DACL's ACEs. Raises SecurityDescriptorError if the
+    descriptor has no DACL or is malformed.
+    """
+    buffer = memoryview(value)
+    size = len(buffer)
+    if size < _HEADER.size:
+        raise SecurityDescriptorError("Security descriptor is truncated")
+    _, _, control, offset_owner, _, _, offset_dacl = _HEADER.unpack_from(buffer)
+    if not control & SE_SELF_RELATIVE:
+        raise SecurityDescriptorError("Only self-relative security descriptors are supported")
+    if not offset_dacl:
+        raise SecurityDescriptorError("Security descriptor has no DACL")
+
+    owner = None
+    if offset_owner:
+        owner = bytes(buffer[offset_owner:_sid_end(buffer, offset_owner, size)])
+
+    if offset_dacl + _ACL_HEADER.size > size:
+        raise SecurityDescriptorError("DACL is truncated")
+    _, _, acl_size, ace_count, _ = _ACL_HEADER.unpack_from(buffer, offset_dacl)
+    acl_end = offset_dacl + acl_size
+    if acl_end > size or acl_size < _ACL_HEADER.size:
+        raise SecurityDescriptorError("DACL is truncated")
+
+    return control, owner, _iter_aces(buffer, offset_dacl + _ACL_HEADER.size, acl_end, ace_count)
+
+
+def _iter_aces(buffer, offset: int, acl_end: int, ace_count: int) -> Iterator[AceTuple]:
+    for _ in range(ace_count):
+        if offset + _ACE_HEADER.size > acl_end:
+            raise SecurityDescriptorError("ACE header is truncated")
+        ace_type, ace_flags, ace_size = _ACE_HEADER.unpack_from(buffer, offset)
+        ace_end = offset + ace_size
+        if ace_size < _ACE_HEADER.size or ace_end > acl_end:
+            raise SecurityDescriptorError("ACE is truncated")
+        body = offset + _ACE_HEADER.size
+
+        if ace_type in (ACCESS_ALLOWED_ACE_TYPE, ACCESS_DENIED_ACE_TYPE):
+            if body + 4 > ace_end:
+                raise SecurityDescriptorError("ACE is truncated")
+            (mask,) = _UINT32.unpack_from(buffer, body)
+            sid_offset = body + 4
+            yield (ace_type, ace_flags, mask, None, None,
+                   bytes(buffer[sid_offset:_sid_end(buffer, sid_offset, ace_end)]))
+        elif ace_type in (ACCESS_ALLOWED_OBJECT_ACE_TYPE, ACCESS_DENIED_OBJECT_ACE_TYPE):
+            if body + _OBJECT_ACE_FIXED.size > ace_end:
+                raise SecurityDescriptorError("ACE is truncated")
+            mask, object_flags = _OBJECT_ACE_FIXED.unpack_from(buffer, body)
+            position = body + _OBJECT_ACE_FIXED.size
+            object_type = inherited_object_type = None
+            if object_flags & ACE_OBJECT_TYPE_PRESENT:
+                object_type = bytes(buffer[position:position + 16])
+                position += 16
+            if object_flags & ACE_INHERITED_OBJECT_TYPE_PRESENT:
+                inherited_object_type = bytes(buffer[position:position + 16])
+                position += 16
+            yield (ace_type, ace_flags, mask, object_type, inherited_object_type,
+                   bytes(buffer[position:_sid_end(buffer, position, ace_end)]))
+        else:
+            yield ace_type, ace_flags, 0, None, None, b""
+
+        offset = ace_end
+
+
+@lru_cache(maxsize=4096)
+def format_sid(sid: bytes) -> str:
+    """
+    Format binary SID bytes as S-1-5-21-..., the way bloodhound-python does: only the
+    low byte of the identifier authority is used.
+    """
+    sub_authorities = struct.unpack_from(f"<{sid[1]}I", sid, 8)
+    return f"S-{sid[0]}-{sid[7]}-" + "-".join(str(sub) for sub in sub_authorities)
@@ -1,21 +1,94 @@
 """Data source abstractions for BOFHound parsing pipeline."""
 
 import os
+import re
 import sys
-import glob
+import bz2
+import gzip
+import lzma
+import mmap
+import fnmatch
+import tarfile
 import json
 import logging
 import base64
+import contextlib
 import asyncio
 import warnings
 from abc import ABC, abstractmethod
-from typing import Iterator, AsyncIterator, TypeVar
+from datetime import date, datetime
+from typing import Iterator, AsyncIterator, TypeVar, List, Optional, Tuple
 from typing_extensions import override
 from mythic import mythic
 from bofhound.logger import logger
+from .line_router import LineRouter
 
 T = TypeVar('T')
 
+# Names of log directories created per day, e.g. Cobalt Strike's 261001
+_DATE_DIRECTORY_FORMATS = [
+    (re.compile(r'\d{6}'), '%y%m%d'),
+    (re.compile(r'\d{8}'), '%Y%m%d'),
+    (re.compile(r'\d{4}-\d{2}-\d{2}'), '%Y-%m-%d'),
+]
+
+# Bytes of a log file decoded at a time
+READ_BLOCK_SIZE = 64 * 1024
+
+# Compressed logs are streamed through these, by file name suffix
+DECOMPRESSORS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+ARCHIVE_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+
+def compression_suffix(file_path: str) -> Optional[str]:
+    """Return the compression suffix of a file name, None if it isn't compressed."""
+    for suffix in DECOMPRESSORS:
+        if file_path.lower().endswith(suffix):
+            return suffix
+    return None
+
+
+def is_archive(file_path: str) -> bool:
+    """Return True if the file is a (compressed) tar archive."""
+    return file_path.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _log_name(file_name: str) -> str:
+    """File name a log would have once decompressed, for matching filename patterns."""
+    suffix = compression_suffix(file_name)
+    return file_name[:-len(suffix)] if suffix is not None else file_name
+
+
+def _decode_lines(data: bytes) -> List[str]:
+    """
+    Decode whole lines, tolerating invalid UTF-8. Newlines are handled the same way
+    as reading a file in text mode.
+    """
+    text = data.decode('utf-8', errors='replace')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    lines = text.split('\n')
+    if text.endswith('\n'):
+        lines.pop()
+    return lines
+
+
+def _read_lines(f) -> Iterator[str]:
+    """Decode lines from a binary file object a block at a time."""
+    pending = b''
+    while True:
+        block = f.read(READ_BLOCK_SIZE)
+        if not block:
+            break
+        block = pending + block
+        # Only decode up to the last newline so no line or character is cut in two
+        cut = block.rfind(b'\n') + 1
+        pending = block[cut:]
+        if cut:
+            yield from _decode_lines(block[:cut])
+    if pending:
+        yield from _decode_lines(pending)
+
 class DataSource(ABC):
     """Abstract base class for data sources that provide lines to parse."""
 
@@ -36,6 +109,22 @@ class DataStream(ABC):
     def lines(self) -> Iterator[str]:
         """Return an iterator of lines from this data stream."""
 
+    def feed(self, router: LineRouter) -> None:
+        """Send this stream's lines through a LineRouter."""
+        router.route_lines(self.lines())
+
+    @property
+    def first_line(self) -> Optional[str]:
+        """Stripped first line of a stream split from a larger one, None otherwise."""
+        return None
+
+    def split(self, boundaries: List[str], chunk_size: int) -> List['DataStream']:
+        """
+        Split the stream into consecutive streams of roughly chunk_size that each
+        begin on a line matching one of the boundaries. Not all streams can be split.
+        """
+        return [self]
+
     def __str__(self) -> str:
         return self.identifier
 
@@ -44,63 +133,424 @@ class FileDataSource(DataSource):
     """Data source that reads from local files."""
 
     def __init__(self, input_path: str, filename_pattern: str = "*.log",
-                 stream_type=None):
+                 stream_type=None, fallback_pattern: str = None, since: date = None):
         self.input_path = input_path
         self.filename_pattern = filename_pattern
         self.stream_type = stream_type or FileDataStream
+        # Used instead when no file matches filename_pattern
+        self.fallback_pattern = fallback_pattern
+        # Date named directories from before this are not searched
+        self.since = since
+        # {(path, mtime, size): (member matches pattern, member matches fallback)}
+        self._archive_cache = {}
+
+    def get_data_streams(self) -> Iterator[DataStream]:
+        """
+        Get file-based data streams. Compressed logs are decompressed as they're read,
+        and tar archives yield their members that match the pattern chosen for the run.
+        """
+        files, pattern = self._discover()
+        for file_path, _ in files:
+            if is_archive(file_path):
+                yield TarArchiveDataStream(file_path, pattern, self.stream_type)
+            else:
+                yield self.stream_type(file_path)
 
-    def get_data_streams(self) -> Iterator['FileDataStream']:
-        """Get file-based data streams."""
+    def find_files(self) -> List[Tuple[str, os.stat_result]]:
+        """
+        Return matching files and their stat results, least recently modified first.
+        The input directory is walked once, collecting matches for the filename and
+        fallback patterns together.
+        """
+        return self._discover()[0]
+
+    def _discover(self) -> Tuple[List[Tuple[str, os.stat_result]], str]:
+        """
+        Return the matching files and the pattern they matched. The fallback pattern
+        is used when neither a file nor an archive member matches filename_pattern.
+        """
         if os.path.isfile(self.input_path):
-            yield self.stream_type(self.input_path)
-        elif os.path.isdir(self.input_path):
-            pattern = f"{self.input_path}/**/{self.filename_pattern}"
-            files = glob.glob(pattern, recursive=True)
-            files.sort(key=os.path.getmtime)
+            stat = os.stat(self.input_path)
+            pattern = self.filename_pattern
+            if is_archive(self.input_path) and self.fallback_pattern is not None:
+                primary, fallback = self._archive_matches(self.input_path, stat)
+                if not primary and fallback:
+                    pattern = self.fallback_pattern
+            return [(self.input_path, stat)], pattern
+        if not os.path.isdir(self.input_path):
+            raise ValueError(f"Input path does not exist: {self.input_path}")
 
-            for file_path in files:
-                yield self.stream_type(file_path)
+        matches: List[Tuple[str, os.stat_result]] = []
+        fallback_matches: List[Tuple[str, os.stat_result]] = []
+        archives: List[Tuple[str, os.stat_result]] = []
+        self._walk(self.input_path, matches, fallback_matches, archives)
+
+        # Archives match by their members, one without a matching member isn't read
+        for archive in archives:
+            primary, fallback = self._archive_matches(*archive)
+            if primary:
+                matches.append(archive)
+            elif fallback:
+                fallback_matches.append(archive)
+
+        if matches:
+            files, pattern = matches, self.filename_pattern
         else:
-            raise ValueError(f"Input path does not exist: {self.input_path}")
+            files, pattern = fallback_matches, self.fallback_pattern
+        files.sort(key=lambda file: file[1].st_mtime)
+        return files, pattern
+
+    def _walk(self, directory: str, matches: List[Tuple[str, os.stat_result]],
+              fallback_matches: List[Tuple[str, os.stat_result]],
+              archives: List[Tuple[str, os.stat_result]]) -> None:
+        """Collect matches in a directory, then in its subdirectories (glob's order)."""
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError as e:
+            logger.debug("Failed to list %s: %s", directory, e)
+            return
+
+        subdirectories = []
+        for entry in entries:
+            # Hidden files and directories are skipped, as glob does
+            if entry.name.startswith('.'):
+                continue
+            try:
+                if entry.is_dir():
+                    if not self._is_before_since(entry.name):
+                        subdirectories.append(entry.path)
+                elif is_archive(entry.name):
+                    archives.append((entry.path, entry.stat()))
+                elif fnmatch.fnmatchcase(_log_name(entry.name), self.filename_pattern):
+                    matches.append((entry.path, entry.stat()))
+                elif (self.fallback_pattern is not None
+                      and fnmatch.fnmatchcase(_log_name(entry.name), self.fallback_pattern)):
+                    fallback_matches.append((entry.path, entry.stat()))
+            except OSError:
+                # Removed while walking, or a broken symlink
+                continue
+
+        for subdirectory in subdirectories:
+            self._walk(subdirectory, matches, fallback_matches, archives)
+
+    def _archive_matches(self, file_path: str, stat: os.stat_result) -> Tuple[bool, bool]:
+        """
+        Return whether a member of an archive matches filename_pattern, and whether
+        one matches the fallback pattern. Results are kept until the archive changes,
+        so watching a directory doesn't list its archives on every poll.
+        """
+        key = (file_path, stat.st_mtime_ns, stat.st_size)
+        if key not in self._archive_cache:
+            primary = fallback = False
+            try:
+                with tarfile.open(file_path, 'r|*') as tar:
+                    for member in tar:
+                        name = os.path.basename(member.name)
+                        if not member.isfile() or name.startswith('.'):
+                            continue
+                        name = _log_name(name)
+                        if fnmatch.fnmatchcase(name, self.filename_pattern):
+                            # the fallback isn't used once the pattern matches
+                            primary = True
+                            break
+                        if (self.fallback_pattern is not None
+                                and fnmatch.fnmatchcase(name, self.fallback_pattern)):
+                            fallback = True
+            except (OSError, tarfile.TarError) as e:
+                logger.warning("Failed to read archive %s: %s", file_path, e)
+            self._archive_cache[key] = (primary, fallback)
+        return self._archive_cache[key]
+
+    def _is_before_since(self, name: str) -> bool:
+        """Return True if a directory is named for a date before since, e.g. 261001."""
+        if self.since is None:
+            return False
+        for name_pattern, date_format in _DATE_DIRECTORY_FORMATS:
+            if name_pattern.fullmatch(name):
+                try:
+                    return datetime.strptime(name, date_format).date() < self.since
+                except ValueError:
+                    return False
+        return False
 
 
 class FileDataStream(DataStream):
-    """Data stream that reads from a local file."""
+    """Data stream that reads from a local file, or a byte range of one."""
 
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, start: int = 0, end: int = None, first_line: str = None):
         self.file_path = file_path
+        self.start = start
+        self.end = end
+        self._first_line = first_line
 
     @property
     def identifier(self) -> str:
         return self.file_path
 
+    @property
+    def first_line(self) -> Optional[str]:
+        return self._first_line
+
+    @property
+    def compressed(self) -> bool:
+        """Return True if the file is decompressed as it's read."""
+        return compression_suffix(self.file_path) is not None
+
     def lines(self) -> Iterator[str]:
         """Read lines from the file."""
-        with open(self.file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                yield line.rstrip('\n\r')
+        return self.output_lines(self._file_lines())
+
+    @classmethod
+    def output_lines(cls, lines: Iterator[str]) -> Iterator[str]:
+        """Turn the lines of a log file into the tool output lines parsers expect."""
+        return lines
+
+    def _file_lines(self) -> Iterator[str]:
+        if self.compressed:
+            with DECOMPRESSORS[compression_suffix(self.file_path)](self.file_path, 'rb') as f:
+                yield from _read_lines(f)
+            return
+
+        with self._map() as mm:
+            pos, end = self.start, self._end(mm)
+            while pos < end:
+                lines, pos = self._read_block(mm, pos, end)
+                yield from lines
+
+    @override
+    def feed(self, router: LineRouter) -> None:
+        """
+        Send the file's lines through a LineRouter. While every parser is idle, jump
+        straight to the next line that could wake one instead of decoding every line.
+        """
+        if self.compressed:
+            router.route_lines(self.lines())
+            return
+
+        wake_chars = router.wake_chars
+        with self._map() as mm:
+            pos, end = self.start, self._end(mm)
+            finder = _WakeLineFinder(mm, wake_chars, end) if wake_chars else None
+            while pos < end:
+                if finder is not None and pos > 0 and router.is_idle:
+                    pos = finder.find(pos)
+                    if pos == -1:
+                        return
+                lines, pos = self._read_block(mm, pos, end)
+                router.route_lines(lines)
+
+    def contains_line(self, line_pattern: re.Pattern, candidate_pattern: re.Pattern) -> bool:
+        """
+        Return True if a line within the stream's byte range fully matches the bytes
+        line_pattern. Only lines in which candidate_pattern, which must match within
+        every such line and be quicker to search for, finds a match are checked.
+        Compressed files can't be searched without decompressing, so may contain any.
+        """
+        if self.compressed:
+            return True
+        with self._map() as mm:
+            start, end = self.start, self._end(mm)
+            pos = start
+            while pos < end:
+                candidate = candidate_pattern.search(mm, pos, end)
+                if candidate is None:
+                    return False
+                line_start = mm.rfind(b'\n', start, candidate.start()) + 1 or start
+                line_end = mm.find(b'\n', candidate.start(), end)
+                if line_end == -1:
+                    line_end = end
+                if line_pattern.fullmatch(mm, line_start, line_end):
+                    return True
+                pos = line_end + 1
+            return False
+
+    @staticmethod
+    def find_last_line_end(file_path: str, start: int, end: int) -> int:
+        """
+        Return the offset just past the last newline between start and end, or start
+        if there is none. Bytes after it may be a line that is still being written.
+        """
+        if end <= start:
+            return start
+        with open(file_path, 'rb') as f, \
+                mmap.mmap(f.fileno(), end, access=mmap.ACCESS_READ) as mm:
+            return mm.rfind(b'\n', start, end) + 1 or start
+
+    def _map(self):
+        """Memory map the file, an empty bytes object stands in for empty files."""
+        with open(self.file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return contextlib.nullcontext(b'')
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _end(self, mm) -> int:
+        return len(mm) if self.end is None else self.end
+
+    @staticmethod
+    def _read_block(mm, pos: int, end: int) -> Tuple[List[str], int]:
+        """
+        Decode the whole lines in roughly the next READ_BLOCK_SIZE bytes, tolerating
+        invalid UTF-8. Returns the lines and the offset after them. Newlines are
+        handled the same way as reading the file in text mode.
+        """
+        block_end = mm.find(b'\n', min(pos + READ_BLOCK_SIZE, end), end)
+        block_end = end if block_end == -1 else block_end + 1
+        return _decode_lines(mm[pos:block_end]), block_end
+
+    @override
+    def split(self, boundaries: List[str], chunk_size: int) -> List['FileDataStream']:
+        """Split the file at complete boundary lines found past every chunk_size bytes."""
+        if self.compressed:
+            return [self]
+        end = os.path.getsize(self.file_path) if self.end is None else self.end
+        if end - self.start <= chunk_size or not boundaries:
+            return [self]
+
+        markers = [boundary.encode('utf-8') for boundary in boundaries]
+        chunks = []
+        with self._map() as mm:
+            chunk_start = self.start
+            first_line = self._first_line
+            while True:
+                cut = self._find_boundary_line(mm, markers, chunk_start + chunk_size, end)
+                if cut is None:
+                    break
+                cut_start, line = cut
+                chunks.append(type(self)(self.file_path, chunk_start, cut_start, first_line))
+                chunk_start, first_line = cut_start, line
+            chunks.append(type(self)(self.file_path, chunk_start, self.end, first_line))
+
+        return chunks
+
+    @staticmethod
+    def _find_boundary_line(mm: mmap.mmap, markers: List[bytes], pos: int, end: int):
+        """
+        Find the first line at or past pos that is exactly one of the markers, ignoring
+        surrounding whitespace. Returns the line's start offset and stripped text.
+        """
+        best = None
+        search_end = end
+        for marker in markers:
+            found = mm.find(marker, pos, search_end)
+            while found != -1:
+                line_start = mm.rfind(b'\n', 0, found) + 1
+                line_end = mm.find(b'\n', found, end)
+                line_end = end if line_end == -1 else line_end
+                if (line_start >= pos and not mm[line_start:found].strip()
+                        and not mm[found + len(marker):line_end].strip()):
+                    # Later markers only need to be searched for before this line
+                    best = (line_start, marker.decode('utf-8'))
+                    search_end = line_end
+                    break
+                found = mm.find(marker, found + 1, search_end)
+        return best
+
+
+class _WakeLineFinder:
+    """Finds lines that could wake an idle parser in a memory mapped file."""
+
+    # Lead bytes of lines that str.strip() may shorten, including the first
+    #  byte of every non-ASCII whitespace character
+    STRIPPED_LEAD_BYTES = b' \t\x0b\x0c\x1c\x1d\x1e\x1f\xc2\xe1\xe2\xe3'
+    WINDOW_SIZE = 1024 * 1024
+
+    def __init__(self, mm, wake_chars, end: int):
+        lead_bytes = bytes(
+            set(self.STRIPPED_LEAD_BYTES) | set(''.join(wake_chars).encode('utf-8'))
+        )
+        # Fold every lead byte into one, and lone carriage returns (line breaks in
+        #  text mode) into newlines, so one find() locates every candidate line
+        self._table = bytes.maketrans(lead_bytes + b'\r', b'\x00' * len(lead_bytes) + b'\n')
+        self._mm = mm
+        self._end = end
+
+    def find(self, pos: int) -> int:
+        """
+        Return the start of the first line after pos, which must be the start of a
+        line, that could wake a parser. -1 if there is none.
+        """
+        while pos < self._end:
+            window_end = min(pos + self.WINDOW_SIZE, self._end)
+            window = self._mm[pos - 1:window_end].translate(self._table)
+            hit = window.find(b'\n\x00')
+            if hit != -1:
+                return pos + hit
+            pos = window_end
+        return -1
 
 
 class OutflankDataStream(FileDataStream):
     """Data stream for Outflank logs, inherits from FileDataStream."""
+    @override
+    def split(self, boundaries: List[str], chunk_size: int) -> List['OutflankDataStream']:
+        """Boundaries live inside JSON encoded events, so Outflank logs aren't split."""
+        return [self]
+
+    @override
+    def feed(self, router: LineRouter) -> None:
+        """Boundaries live inside JSON encoded events, so every event is decoded."""
+        router.route_lines(self.lines())
+
+    @override
+    def contains_line(self, line_pattern: re.Pattern, candidate_pattern: re.Pattern) -> bool:
+        """Lines are JSON encoded inside events, so the decoded lines are checked."""
+        return any(line_pattern.fullmatch(line.encode('utf-8')) for line in self.lines())
+
+    @classmethod
+    @override
+    def output_lines(cls, lines: Iterator[str]) -> Iterator[str]:
+        """Read ldapsearch output from the events of an Outflank log file."""
+        bofname = 'ldapsearch'
+        for line in lines:
+            event_json = json.loads(line.split('UTC ', 1)[1])
+
+            # we only care about task_resonse events
+            if (event_json['event_type'] == 'task_response'
+                and event_json['task']['name'].lower() == bofname):
+                # now we have a block of ldapsearch data we can parse through for objects
+                response_lines = event_json['task']['response']
+
+                if response_lines is None:
+                    continue
+
+                for response_line in response_lines.splitlines():
+                    yield response_line
+
+
+class TarArchiveDataStream(DataStream):
+    """
+    Data stream of the logs in a (compressed) tar archive that match a filename
+    pattern. The archive is read in a single pass, so members are parsed in the
+    order they're stored rather than by modification time.
+    """
+
+    def __init__(self, file_path: str, filename_pattern: str = "*.log", stream_type=None):
+        self.file_path = file_path
+        self.filename_pattern = filename_pattern
+        # Stream type the members would have if extracted, for its output_lines()
+        self.stream_type = stream_type or FileDataStream
+
+    @property
+    def identifier(self) -> str:
+        return self.file_path
+
     def lines(self) -> Iterator[str]:
-        """Read lines from the Outflank log file."""
-        with open(self.file_path, 'r', encoding='utf-8') as f:
-            bofname = 'ldapsearch'
-            for line in f:
-                event_json = json.loads(line.split('UTC ', 1)[1])
-
-                # we only care about task_resonse events
-                if (event_json['event_type'] == 'task_response'
-                    and event_json['task']['name'].lower() == bofname):
-                    # now we have a block of ldapsearch data we can parse through for objects
-                    response_lines = event_json['task']['response']
-
-                    if response_lines is None:
-                        continue
-
-                    for response_line in response_lines.splitlines():
-                        yield response_line
+        """Read lines from every matching member of the archive."""
+        with tarfile.open(self.file_path, 'r|*') as tar:
+            for member in tar:
+                name = os.path.basename(member.name)
+                if (not member.isfile() or name.startswith('.')
+                        or not fnmatch.fnmatchcase(_log_name(name), self.filename_pattern)):
+                    continue
+                logger.debug("Reading %s from %s", member.name, self.file_path)
+
+                with contextlib.ExitStack() as stack:
+                    f = stack.enter_context(tar.extractfile(member))
+                    suffix = compression_suffix(name)
+                    if suffix is not None:
+                        f = stack.enter_context(DECOMPRESSORS[suffix](f, 'rb'))
+                    yield from self.stream_type.output_lines(_read_lines(f))
 
 
 class MythicDataSource(DataSource):
@@ -23,7 +23,7 @@ class LdapSearchBofParser(BoundaryBasedParser):
             r'^Running [\w-] ?.*$',
             r'\n\n\d{2}\/\d{2} (\d{2}:){2}\d{2} UTC \[output\]\nreceived output:\n'
         ]
-        self._end_of_tool_output_pattern = r'^(R|r)etr(e|i)(e|i)ved \d+ results?'
+        self._end_of_tool_output_pattern = re.compile(r'^(R|r)etr(e|i)(e|i)ved \d+ results?')
 
     @property
     def tool_name(self) -> str:
@@ -35,7 +35,7 @@ class LdapSearchBofParser(BoundaryBasedParser):
 
     def _is_end_of_tool_output(self, line: str) -> bool:
         """Check if the line indicates the end of tool output."""
-        return re.match(self._end_of_tool_output_pattern, line) is not None
+        return self._end_of_tool_output_pattern.match(line) is not None
 
     @override
     def process_line(self, line: str) -> None:
@@ -0,0 +1,93 @@
+"""Routes log lines to only the parsers that can act on them."""
+from typing import Dict, List, Optional, Set
+from .types import ToolParser
+
+
+class LineRouter:
+    """
+    Single-pass line dispatcher for a set of tool parsers.
+
+    An idle boundary-based parser can only be moved by a line that is a prefix of
+    one of its boundary markers (boundaries may be split across several lines). All
+    of those prefixes are compiled into one lookup table, so a line that matches no
+    marker costs a single dict lookup instead of one regex pass per parser. Parsers
+    that are part way through a record, and parsers that don't expose their markers,
+    receive every line.
+    """
+
+    def __init__(self, parsers: List[ToolParser]):
+        self._parsers = list(parsers)
+        self._wake_index: Dict[str, List[ToolParser]] = {}
+        self._always_routed: List[ToolParser] = []
+
+        for parser in self._parsers:
+            patterns = parser.wake_patterns
+            if patterns is None:
+                self._always_routed.append(parser)
+                continue
+            for pattern in patterns:
+                for i in range(1, len(pattern) + 1):
+                    woken = self._wake_index.setdefault(pattern[:i], [])
+                    if parser not in woken:
+                        woken.append(parser)
+
+        self._active: List[ToolParser] = []
+        self.sync()
+
+    @property
+    def wake_chars(self) -> Optional[Set[str]]:
+        """
+        Return the first characters of every marker. A line can only wake an idle
+        parser if it starts with one of them once stripped. None if every line counts.
+        """
+        if self._always_routed:
+            return None
+        return {pattern for pattern in self._wake_index if len(pattern) == 1}
+
+    @property
+    def parsers(self) -> List[ToolParser]:
+        """Return the parsers this router dispatches to."""
+        return self._parsers
+
+    @property
+    def is_idle(self) -> bool:
+        """Return True if no routed parser is part way through a record."""
+        return not self._active and not self._always_routed
+
+    def sync(self) -> None:
+        """Pick up parser state that was changed outside of the router."""
+        self._active = [
+            p for p in self._parsers if p not in self._always_routed and not p.is_idle
+        ]
+
+    def route_line(self, line: str) -> None:
+        """Send a single line to every parser that could act on it."""
+        if self._always_routed:
+            filtered_line = line.rstrip('\n\r')
+            for parser in self._always_routed:
+                parser.process_line(filtered_line)
+
+        # Boundary-based parsers strip lines themselves, do it once for all of them
+        line = line.strip()
+        woken = self._wake_index.get(line) if line else None
+
+        if not self._active:
+            # Fast path, nothing is mid-record
+            if woken is None:
+                return
+            targets = woken
+        elif woken is None:
+            targets = self._active
+        else:
+            targets = self._active + [p for p in woken if p not in self._active]
+
+        for parser in targets:
+            parser.process_line(line)
+
+        self._active = [p for p in targets if not p.is_idle]
+
+    def route_lines(self, lines) -> None:
+        """Send every line of an iterable through the router."""
+        route_line = self.route_line
+        for line in lines:
+            route_line(line)
@@ -0,0 +1,90 @@
+"""Follows C2 log files as they are written and parses only new output."""
+import os
+from typing import Dict, List, NamedTuple, Tuple
+from bofhound.logger import logger
+from .types import ToolParser
+from .data_sources import FileDataSource, FileDataStream, compression_suffix, is_archive
+from .line_router import LineRouter
+from .parsing_pipeline import ParsingResult
+from .parse_cache import ParseCache
+from .prefilter import ContentPrefilter
+
+
+class _FilePosition(NamedTuple):
+    stat_key: Tuple[int, int, int]
+    offset: int
+    fingerprint: str
+
+
+def _stat_key(stat: os.stat_result) -> Tuple[int, int, int]:
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class LogWatcher:
+    """
+    Polls the log files of a FileDataSource and feeds only the bytes appended since
+    the previous poll, up to the last complete line, to the same long-lived parsers.
+    A record that is still being written when a poll happens is finished by a later
+    one. Files whose parsed content changed, or that were replaced, are read again
+    from the start.
+    """
+
+    def __init__(self, data_source: FileDataSource, parsers: List[ToolParser]):
+        self.data_source = data_source
+        self._parsers = parsers
+        self._router = LineRouter(parsers)
+        self._prefilter = ContentPrefilter(parsers)
+        self._positions: Dict[str, _FilePosition] = {}
+
+    @property
+    def parsers(self) -> List[ToolParser]:
+        """Return the parsers new output is fed to."""
+        return self._parsers
+
+    def poll(self) -> ParsingResult:
+        """Parse output appended to the watched files and return the records it finished"""
+        for file_path, stat in self._discover():
+            if is_archive(file_path) or compression_suffix(file_path) is not None:
+                # Archived logs aren't written to any more
+                continue
+
+            position = self._positions.get(file_path)
+            if position is not None and position.stat_key == _stat_key(stat):
+                continue
+
+            offset = 0
+            if position is not None:
+                if (position.stat_key[0] == stat.st_ino and stat.st_size >= position.offset
+                        and ParseCache.fingerprint(file_path, position.offset)
+                        == position.fingerprint):
+                    offset = position.offset
+                else:
+                    logger.info("%s was replaced or rewritten, parsing it again", file_path)
+
+            end = FileDataStream.find_last_line_end(file_path, offset, stat.st_size)
+            stream = self.data_source.stream_type(file_path, offset, end)
+            if end > offset and not (self._router.is_idle and self._prefilter.can_skip(stream)):
+                logger.debug("Parsing %d new bytes from %s", end - offset, file_path)
+                stream.feed(self._router)
+            self._positions[file_path] = _FilePosition(
+                _stat_key(stat), end, ParseCache.fingerprint(file_path, end)
+            )
+
+        return self.drain()
+
+    def drain(self) -> ParsingResult:
+        """Collect the records finished so far, leaving records in progress with the parsers"""
+        result = ParsingResult()
+        for parser in self._parsers:
+            records = parser.drain_results()
+            if records:
+                result.add_objects(parser.produces_object_type, records)
+        return result
+
+    def _discover(self) -> List[Tuple[str, os.stat_result]]:
+        try:
+            return self.data_source.find_files()
+        except (OSError, ValueError) as e:
+            # The input itself can disappear
+            logger.debug("Failed to list watched files: %s", e)
+            return []
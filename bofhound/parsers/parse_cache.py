@@ -0,0 +1,97 @@
+"""Persistent cache of parsed records for log files that are only ever appended to."""
+import os
+import json
+import hashlib
+from typing import Any, Dict, List, Optional
+from bofhound.logger import logger
+
+
+class ParseCache:
+    """
+    On-disk cache of the records parsed from each log file.
+
+    An entry remembers the file's size, mtime and a fingerprint of its content up to
+    the last fully parsed line (the safe offset), the parser state at that offset and
+    the records finished before it. When the file is unchanged, or has only been
+    appended to, the cached records are replayed and parsing resumes at the safe
+    offset. Entries also record the parser state the file was started with, since
+    a record can run on from the end of one file into the next.
+    """
+
+    VERSION = 1
+    FINGERPRINT_SIZE = 64 * 1024
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.hits = 0
+        self.bytes_skipped = 0
+
+    def lookup(self, file_path: str, parser_names: List[str],
+               start_state: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Return the cache entry for file_path if the file still begins with the
+        content it was parsed from, with the same parsers and starting state.
+        """
+        try:
+            with open(self._entry_path(file_path), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if (entry.get("version") != ParseCache.VERSION
+                or entry["parsers"] != parser_names
+                or entry["start_state"] != start_state):
+            return None
+
+        stat = os.stat(file_path)
+        if (stat.st_size != entry["size"] or stat.st_mtime_ns != entry["mtime_ns"]) and (
+            stat.st_size < entry["safe_offset"]
+            or self.fingerprint(file_path, entry["safe_offset"]) != entry["fingerprint"]
+        ):
+            logger.debug("Parse cache entry for %s is stale", file_path)
+            return None
+
+        self.hits += 1
+        self.bytes_skipped += entry["safe_offset"]
+        return entry
+
+    def store(self, file_path: str, stat: os.stat_result, parser_names: List[str],
+              start_state: List[Dict[str, Any]], safe_offset: int,
+              safe_state: List[Dict[str, Any]], records: List[List[Dict[str, Any]]]) -> None:
+        """Write the cache entry for file_path, replacing any existing one"""
+        entry = {
+            "version": ParseCache.VERSION,
+            "path": os.path.abspath(file_path),
+            "parsers": parser_names,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "fingerprint": self.fingerprint(file_path, safe_offset),
+            "safe_offset": safe_offset,
+            "start_state": start_state,
+            "safe_state": safe_state,
+            "records": records,
+        }
+        entry_path = self._entry_path(file_path)
+        try:
+            with open(f"{entry_path}.tmp", 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(f"{entry_path}.tmp", entry_path)
+        except OSError as e:
+            logger.warning("Failed to write parse cache entry for %s: %s", file_path, e)
+
+    @staticmethod
+    def fingerprint(file_path: str, length: int) -> str:
+        """Hash the first and last FINGERPRINT_SIZE bytes of the first length bytes"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(str(length).encode())
+        with open(file_path, 'rb') as f:
+            digest.update(f.read(min(length, ParseCache.FINGERPRINT_SIZE)))
+            if length > ParseCache.FINGERPRINT_SIZE:
+                f.seek(max(length - ParseCache.FINGERPRINT_SIZE, ParseCache.FINGERPRINT_SIZE))
+                digest.update(f.read(length - f.tell()))
+        return digest.hexdigest()
+
+    def _entry_path(self, file_path: str) -> str:
+        key = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
@@ -1,12 +1,23 @@
 """Parsing pipeline to coordinate multiple tool parsers for C2 framework logs."""
-from typing import List, Dict, Any
-from .types import ObjectType, ToolParser
-from .data_sources import DataSource
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import List, Dict, Any, Type, Callable
+from bofhound.logger import logger
+from .types import ObjectType, ToolParser, BoundaryBasedParser
+from .data_sources import DataSource, DataStream, FileDataStream
+from .parse_cache import ParseCache
+from .prefilter import ContentPrefilter
+from .line_router import LineRouter
 from . import (
     NetLocalGroupBofParser, NetLoggedOnBofParser, NetSessionBofParser, RegSessionBofParser,
     LdapSearchBofParser, ParserType, Brc4LdapSentinelParser
 )
 
+# Size of the pieces large log files are split into for parallel parsing
+SPLIT_CHUNK_SIZE = 32 * 1024 * 1024
+
+
 class ParsingResult:
     """Container for categorized parsing results"""
 
@@ -14,10 +25,16 @@ class ParsingResult:
         self.objects_by_type: Dict[ObjectType, List[Dict[str, Any]]] = {
             obj_type: [] for obj_type in ObjectType
         }
+        self.counts_by_type: Dict[ObjectType, int] = {obj_type: 0 for obj_type in ObjectType}
 
     def add_objects(self, obj_type: ObjectType, objects: List[Dict[str, Any]]):
         """Add objects of a specific type"""
         self.objects_by_type[obj_type].extend(objects)
+        self.counts_by_type[obj_type] += len(objects)
+
+    def get_count(self, obj_type: ObjectType) -> int:
+        """Get the number of parsed objects of a specific type, including streamed objects"""
+        return self.counts_by_type[obj_type]
 
     def get_objects_by_type(self, obj_type: ObjectType) -> List[Dict[str, Any]]:
         """Get all parsed objects of a specific type"""
@@ -52,33 +69,71 @@ class ParsingPipeline:
     def __init__(self, platform_filters=None):
         self.tool_parsers: List[ToolParser] = []
         self.platform_filters = platform_filters or []
+        self.record_sinks: Dict[ObjectType, Callable[[Dict[str, Any]], None]] = {}
 
     def register_parser(self, parser: ToolParser):
         """Register a tool parser with the pipeline"""
         self.tool_parsers.append(parser)
 
-    def process_data_source(self, data_source: DataSource, progress_callback=None) -> ParsingResult:
+    def register_sink(self, obj_type: ObjectType, sink: Callable[[Dict[str, Any]], None]):
+        """
+        Stream parsed objects of a specific type to sink, in the order a full parse
+        would return them, instead of keeping them in the ParsingResult.
+        Only their count is kept.
+        """
+        self.record_sinks[obj_type] = sink
+
+    def process_data_source(self, data_source: DataSource, progress_callback=None,
+                            jobs: int = 1, chunk_size: int = SPLIT_CHUNK_SIZE,
+                            cache: ParseCache = None) -> ParsingResult:
         """
         Process a data source through all registered parsers.
 
+        With jobs other than 1, each data stream is parsed in a worker process with
+        its own parser instances (0 uses every core). Streams larger than chunk_size
+        are split at record boundaries and the pieces parsed in parallel too. Results
+        are merged back in the data source's stream order, matching a sequential run.
+
+        With a cache, records already parsed from log files in a previous run are
+        reused and only bytes appended since then are parsed (sequential runs only).
+
         Returns categorized results.
         """
+        if jobs != 1:
+            return self._process_data_source_parallel(
+                data_source, progress_callback, jobs, chunk_size
+            )
+
         result = ParsingResult()
+        router = LineRouter(self.tool_parsers)
+        if cache is not None and any(parser.get_state() is None for parser in self.tool_parsers):
+            logger.debug("Parse cache disabled, not every parser's state can be saved")
+            cache = None
 
-        for data_stream in data_source.get_data_streams():
-            if progress_callback:
-                progress_callback(data_stream.identifier)
-            for line in data_stream.lines():
-                # Apply platform-specific filtering
-                filtered_line = line.rstrip('\n\r')
+        prefilter = ContentPrefilter(
+            self.tool_parsers, cache.cache_dir if cache is not None else None
+        )
 
-                # Distribute line to all parsers that can handle it
-                for parser in self.tool_parsers:
-                    parser.process_line(filtered_line)
+        # Cached runs stream every record so they can be stored per file
+        self._attach_sinks(result, collect_all=cache is not None)
+        try:
+            for data_stream in data_source.get_data_streams():
+                if progress_callback:
+                    progress_callback(data_stream.identifier)
+                if router.is_idle and prefilter.can_skip(data_stream):
+                    logger.debug("Skipping %s, no tool output found", data_stream.identifier)
+                    continue
+                if (cache is not None and isinstance(data_stream, FileDataStream)
+                        and not data_stream.compressed
+                        and data_stream.start == 0 and data_stream.end is None):
+                    self._feed_cached(data_stream, router, cache)
+                else:
+                    data_stream.feed(router)
 
-        # Collect results from all parsers
-        for parser in self.tool_parsers:
-            result.add_objects(parser.produces_object_type, parser.get_results())
+            self._collect_results(self.tool_parsers, result)
+        finally:
+            self._detach_sinks()
+            prefilter.save()
 
         return result
 
@@ -90,22 +145,157 @@ class ParsingPipeline:
         """
         result = ParsingResult()
 
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                # Apply platform-specific filtering
-                filtered_line = line.rstrip('\n\r')
+        self._attach_sinks(result)
+        try:
+            FileDataStream(file_path).feed(LineRouter(self.tool_parsers))
+            self._collect_results(self.tool_parsers, result)
+        finally:
+            self._detach_sinks()
 
-                # Distribute line to all parsers that can handle it
-                for parser in self.tool_parsers:
-                    parser.process_line(filtered_line)
+        return result
 
-        # Collect results from all parsers
-        for parser in self.tool_parsers:
-            parsed_objects = parser.get_results()
-            result.add_objects(parser.produces_object_type, parsed_objects)
+    def _feed_cached(self, data_stream: FileDataStream, router: LineRouter,
+                     cache: ParseCache) -> None:
+        """Feed a log file through the router, reusing and updating its cache entry"""
+        file_path = data_stream.file_path
+        parsers = self.tool_parsers
+        parser_names = [type(parser).__name__ for parser in parsers]
+        start_state = [parser.get_state() for parser in parsers]
+        stat = os.stat(file_path)
+
+        sinks = [parser.record_sink for parser in parsers]
+        records: List[List[Dict[str, Any]]] = [[] for _ in parsers]
+        resume_offset = 0
+
+        entry = cache.lookup(file_path, parser_names, start_state)
+        if entry is not None:
+            for sink, cached_records in zip(sinks, entry["records"]):
+                for record in cached_records:
+                    sink(record)
+            for parser, state in zip(parsers, entry["safe_state"]):
+                parser.set_state(state)
+            router.sync()
+            records = entry["records"]
+            resume_offset = entry["safe_offset"]
+
+        # Only parse up to the last complete line into the cache, a partial
+        #  line may still be being written
+        safe_offset = FileDataStream.find_last_line_end(file_path, resume_offset, stat.st_size)
+
+        for parser, sink, parser_records in zip(parsers, sinks, records):
+            def caching_sink(record, sink=sink, parser_records=parser_records):
+                parser_records.append(record)
+                sink(record)
+            parser.set_record_sink(caching_sink)
+        try:
+            type(data_stream)(file_path, resume_offset, safe_offset).feed(router)
+        finally:
+            for parser, sink in zip(parsers, sinks):
+                parser.set_record_sink(sink)
+
+        cache.store(file_path, stat, parser_names, start_state, safe_offset,
+                    [parser.get_state() for parser in parsers], records)
+
+        if safe_offset < stat.st_size:
+            type(data_stream)(file_path, safe_offset, stat.st_size).feed(router)
+
+    def _process_data_source_parallel(self, data_source: DataSource, progress_callback,
+                                      jobs: int, chunk_size: int) -> ParsingResult:
+        """Parse data streams in worker processes and merge results in stream order"""
+        result = ParsingResult()
+        parser_types = [type(parser) for parser in self.tool_parsers]
+        boundaries = [
+            parser.start_boundary_pattern for parser in self.tool_parsers
+            if isinstance(parser, BoundaryBasedParser)
+        ]
+
+        streams: List[DataStream] = []
+        for data_stream in data_source.get_data_streams():
+            streams.extend(data_stream.split(boundaries, chunk_size))
+
+        # Parsers whose state runs past the end of a stream into the next one
+        carried_parsers: List[ToolParser] = None
+
+        with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+            worker = partial(_parse_stream, parser_types)
+            # map() yields in submission order, which keeps later-wins merge semantics
+            for i, parsers in enumerate(executor.map(worker, streams)):
+                stream = streams[i]
+                if progress_callback:
+                    progress_callback(stream.identifier)
+
+                if carried_parsers is not None:
+                    # The worker started this stream from the wrong state, so
+                    #  continue with the parsers from the previous stream instead
+                    parsers = carried_parsers
+                    stream.feed(LineRouter(parsers))
+
+                next_line = streams[i + 1].first_line if i + 1 < len(streams) else None
+                if all(parser.is_safe_split_point(next_line) for parser in parsers):
+                    self._collect_results(parsers, result)
+                    carried_parsers = None
+                else:
+                    carried_parsers = parsers
+
+        if carried_parsers is not None:
+            self._collect_results(carried_parsers, result)
 
         return result
 
+    def _collect_results(self, parsers: List[ToolParser], result: ParsingResult) -> None:
+        """Collect results from parsers into result, or their object type's sink"""
+        for parser in parsers:
+            obj_type = parser.produces_object_type
+            records = parser.get_results()
+            sink = self.record_sinks.get(obj_type)
+            if sink is None:
+                result.add_objects(obj_type, records)
+                continue
+            for record in records:
+                sink(record)
+            result.counts_by_type[obj_type] += len(records)
+
+    def _attach_sinks(self, result: ParsingResult, collect_all: bool = False) -> None:
+        """
+        Have parsers stream finished records straight to their object type's sink,
+        or with collect_all, into result for object types without a sink.
+        """
+        for parser in self.tool_parsers:
+            obj_type = parser.produces_object_type
+            sink = self.record_sinks.get(obj_type)
+            if not isinstance(parser, BoundaryBasedParser):
+                continue
+            if sink is None:
+                if collect_all:
+                    parser.set_record_sink(
+                        lambda record, obj_type=obj_type: result.add_objects(obj_type, [record])
+                    )
+                continue
+
+            def counting_sink(record, sink=sink, obj_type=obj_type):
+                sink(record)
+                result.counts_by_type[obj_type] += 1
+
+            parser.set_record_sink(counting_sink)
+
+    def _detach_sinks(self) -> None:
+        """Have parsers keep finished records for get_results again"""
+        for parser in self.tool_parsers:
+            if isinstance(parser, BoundaryBasedParser):
+                parser.set_record_sink(None)
+
+def _parse_stream(parser_types: List[Type[ToolParser]], data_stream: DataStream
+                  ) -> List[ToolParser]:
+    """
+    Parse a data stream with fresh parser instances (process pool worker).
+    The parsers are returned with results uncollected so their state can be continued.
+    """
+    parsers = [parser_type() for parser_type in parser_types]
+    if not ContentPrefilter(parsers).can_skip(data_stream):
+        data_stream.feed(LineRouter(parsers))
+    return parsers
+
+
 class ParsingPipelineFactory:
     """Factory to create ParsingPipeline instances with registered parsers."""
 
@@ -0,0 +1,120 @@
+"""Byte-level prefilter that skips log files without any tool output."""
+import os
+import re
+import json
+import hashlib
+from typing import Dict, List, Optional
+from bofhound.logger import logger
+from .types import ToolParser, BoundaryBasedParser
+from .data_sources import DataStream, FileDataStream
+from .parse_cache import ParseCache
+
+
+def _prefix_regex(boundary: bytes) -> bytes:
+    """Regex matching any non-empty prefix of a boundary, -(?:-(?:-)?)? for '---'"""
+    regex = b''
+    for i in range(len(boundary) - 1, 0, -1):
+        regex = b'(?:' + re.escape(boundary[i:i + 1]) + regex + b')?'
+    return re.escape(boundary[:1]) + regex
+
+
+def _candidate_regexes(boundary: bytes) -> List[bytes]:
+    """
+    Regexes of which one matches within every line that is a prefix of a boundary.
+    The prefix either ends within the boundary's leading run of its first character,
+    or contains that run and the character after it ('----------L' for netlocalgroup).
+    """
+    first = boundary[:1]
+    run = len(boundary) - len(boundary.lstrip(first))
+    regexes = [re.escape(first) + rb'[^\S\n]*$']
+    if run < len(boundary):
+        regexes.append(re.escape(boundary[:run + 1]))
+    return regexes
+
+
+class ContentPrefilter:
+    """
+    Decides whether a log file can be skipped without routing any of its lines.
+
+    Idle parsers only produce records after a start boundary, so a file in which
+    none of the parsers' start boundaries occur can't add records unless a record
+    is already in progress. Boundaries may be split over several lines, the first
+    of which is a prefix of the boundary, so a file is only skipped if none of its
+    lines is a prefix of a start boundary once stripped. The memory mapped file is
+    searched for lines that could be one, which are then checked. Decisions for large files are remembered
+    by mtime and content fingerprint, and with a cache directory across runs too.
+    """
+
+    DECISIONS_FILE = "prefilter.json"
+    # Scanning smaller files is about as cheap as fingerprinting them
+    MIN_CACHED_SIZE = 4 * ParseCache.FINGERPRINT_SIZE
+
+    def __init__(self, parsers: List[ToolParser], cache_dir: str = None):
+        # Parsers without boundaries may act on any line
+        self._line_pattern: Optional[re.Pattern] = None
+        self._candidate_pattern: Optional[re.Pattern] = None
+        if all(isinstance(parser, BoundaryBasedParser) for parser in parsers):
+            boundaries = sorted({parser.start_boundary_pattern.encode('utf-8')
+                                 for parser in parsers})
+            self._line_pattern = re.compile(
+                rb'\s*(?:' + b'|'.join(map(_prefix_regex, boundaries)) + rb')\s*'
+            )
+            self._candidate_pattern = re.compile(b'|'.join(sorted(
+                {regex for boundary in boundaries for regex in _candidate_regexes(boundary)}
+            )), re.MULTILINE)
+
+        self._pattern_key = hashlib.blake2b(
+            self._line_pattern.pattern if self._line_pattern is not None else b'',
+            digest_size=8
+        ).hexdigest()
+        self._decisions_path = (
+            os.path.join(cache_dir, ContentPrefilter.DECISIONS_FILE) if cache_dir else None
+        )
+        self._decisions: Dict[str, bool] = self._load()
+        self._changed = False
+        self.skipped = 0
+
+    def can_skip(self, data_stream: DataStream) -> bool:
+        """Return True if no line of the data stream can begin a parser's start boundary."""
+        if self._line_pattern is None or not isinstance(data_stream, FileDataStream):
+            return False
+
+        key = None
+        if data_stream.start == 0 and data_stream.end is None:
+            stat = os.stat(data_stream.file_path)
+            if stat.st_size >= ContentPrefilter.MIN_CACHED_SIZE:
+                # the fingerprint doesn't cover the middle of the file, the mtime does
+                key = (f"{self._pattern_key}:{stat.st_mtime_ns}:"
+                       f"{ParseCache.fingerprint(data_stream.file_path, stat.st_size)}")
+
+        skip = self._decisions.get(key) if key is not None else None
+        if skip is None:
+            skip = not data_stream.contains_line(self._line_pattern, self._candidate_pattern)
+            if key is not None:
+                self._decisions[key] = skip
+                self._changed = True
+
+        if skip:
+            self.skipped += 1
+        return skip
+
+    def save(self) -> None:
+        """Write decisions made during this run to the cache directory, if any"""
+        if self._decisions_path is None or not self._changed:
+            return
+        try:
+            with open(f"{self._decisions_path}.tmp", 'w', encoding='utf-8') as f:
+                json.dump(self._decisions, f)
+            os.replace(f"{self._decisions_path}.tmp", self._decisions_path)
+            self._changed = False
+        except OSError as e:
+            logger.warning("Failed to write prefilter decisions: %s", e)
+
+    def _load(self) -> Dict[str, bool]:
+        if self._decisions_path is None:
+            return {}
+        try:
+            with open(self._decisions_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
@@ -3,7 +3,7 @@
 import re
 from enum import Enum
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable
 from typing_extensions import override
 
 
@@ -43,6 +43,47 @@ class ToolParser(ABC):
     def get_results(self) -> List[Dict[str, Any]]:
         """Return all parsed objects and reset internal state"""
 
+    @abstractmethod
+    def drain_results(self) -> List[Dict[str, Any]]:
+        """Return the objects finished so far and forget them, keeping any record in progress"""
+
+    @abstractmethod
+    def reset(self) -> None:
+        """Discard all parsed objects and any record in progress"""
+
+    @property
+    def wake_patterns(self) -> Optional[List[str]]:
+        """
+        Return the markers that can move an idle parser out of its idle state.
+        None means the parser must see every line.
+        """
+        return None
+
+    @property
+    def is_idle(self) -> bool:
+        """Return True if lines that don't match a wake pattern can't change parser state"""
+        return False
+
+    def is_safe_split_point(self, next_line: Optional[str] = None) -> bool:
+        """
+        Return True if a fresh parser starting at next_line would produce the same
+        records as this one continuing, once this parser's results are collected.
+        """
+        return self.is_idle
+
+    def get_state(self) -> Optional[Dict[str, Any]]:
+        """
+        Return a JSON serializable snapshot of the parser's position within a record,
+        excluding finished records. None if the parser can't be snapshotted.
+        """
+        return None
+
+    def set_state(self, state: Optional[Dict[str, Any]]) -> None:
+        """
+        Restore a snapshot taken with get_state. A parser that can't be snapshotted
+        has nothing to restore, parsers that override get_state override this too.
+        """
+
 
 class BoundaryBasedParser(ToolParser):
     """Abstract base class for parsing records from tools with start/end boundaries."""
@@ -58,6 +99,87 @@ class BoundaryBasedParser(ToolParser):
             BoundaryDetector(end_boundary_pattern) if end_boundary_pattern else None
         )
         self._skippable_patterns = []
+        self._record_sink: Optional[Callable[[Dict[str, Any]], None]] = None
+
+    @property
+    def record_sink(self) -> Optional[Callable[[Dict[str, Any]], None]]:
+        """Return the callable finished records are handed to, if any"""
+        return self._record_sink
+
+    def set_record_sink(self, sink: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+        """Hand each record to sink as soon as it is finished instead of keeping it"""
+        self._record_sink = sink
+
+    @override
+    def get_state(self) -> Dict[str, Any]:
+        return {
+            "parsing_state": self._parsing_state.value,
+            "start_boundary_chars": self._start_boundary_detector.accumulated_chars,
+            "end_boundary_chars": (
+                self._end_boundary_detector.accumulated_chars
+                if self._end_boundary_detector is not None else 0
+            ),
+            "current_record_lines": list(self._current_record_lines),
+        }
+
+    @override
+    def set_state(self, state: Dict[str, Any]) -> None:
+        self._parsing_state = ParsingState(state["parsing_state"])
+        self._start_boundary_detector.accumulated_chars = state["start_boundary_chars"]
+        if self._end_boundary_detector is not None:
+            self._end_boundary_detector.accumulated_chars = state["end_boundary_chars"]
+        self._current_record_lines = list(state["current_record_lines"])
+
+    @property
+    def _skippable_patterns(self) -> List[str]:
+        return self.__skippable_patterns
+
+    @_skippable_patterns.setter
+    def _skippable_patterns(self, patterns: List[str]) -> None:
+        # Compile all patterns into a single alternation so skip checks
+        #  cost one regex evaluation per line instead of one per pattern
+        self.__skippable_patterns = patterns
+        self.__skippable_regex = (
+            re.compile("|".join(f"(?:{pattern})" for pattern in patterns)) if patterns else None
+        )
+
+    @property
+    @override
+    def wake_patterns(self) -> List[str]:
+        patterns = [self._start_boundary_detector.boundary_pattern]
+        if self._end_boundary_detector is not None:
+            patterns.append(self._end_boundary_detector.boundary_pattern)
+        return patterns
+
+    @property
+    def start_boundary_pattern(self) -> str:
+        """Return the boundary that starts a record."""
+        return self._start_boundary_detector.boundary_pattern
+
+    @override
+    def is_safe_split_point(self, next_line: Optional[str] = None) -> bool:
+        if self.is_idle:
+            return True
+        # A complete start boundary saves the current record, which is what
+        #  collecting results does, and a fresh parser then enters the next record
+        return (
+            next_line == self.start_boundary_pattern
+            and self._parsing_state == ParsingState.IN_OBJECT
+            and not self._start_boundary_detector.in_progress
+            and (self._end_boundary_detector is None
+                 or not self._end_boundary_detector.in_progress)
+            and not self.should_skip_line(next_line)
+        )
+
+    @property
+    @override
+    def is_idle(self) -> bool:
+        return (
+            self._parsing_state == ParsingState.WAITING_FOR_OBJECT
+            and not self._start_boundary_detector.in_progress
+            and (self._end_boundary_detector is None
+                 or not self._end_boundary_detector.in_progress)
+        )
 
     @override
     def process_line(self, line) -> None:
@@ -97,11 +219,28 @@ class BoundaryBasedParser(ToolParser):
     def get_results(self) -> list[dict[str, str]]:
         if self._current_record_lines:  # Complete any pending record
             self._save_current_record()
-        return self._records
+        records = self._records
+        self.reset()
+        return records
+
+    @override
+    def drain_results(self) -> list[dict[str, str]]:
+        records = self._records
+        self._records = []
+        return records
+
+    @override
+    def reset(self) -> None:
+        self._records = []
+        self._current_record_lines = []
+        self._parsing_state = ParsingState.WAITING_FOR_OBJECT
+        self._start_boundary_detector.accumulated_chars = 0
+        if self._end_boundary_detector is not None:
+            self._end_boundary_detector.accumulated_chars = 0
 
     def should_skip_line(self, line: str) -> bool:
         """Determine if a line should be skipped."""
-        return any(re.match(pattern, line) for pattern in self._skippable_patterns)
+        return self.__skippable_regex is not None and self.__skippable_regex.match(line) is not None
 
     def _handle_end_boundary_line(self) -> None:
         """Handle end of tool's output line"""
@@ -122,7 +261,10 @@ class BoundaryBasedParser(ToolParser):
         """Build the current record from lines and save it"""
         attributes = self._parse_lines_to_attributes()
         if attributes: # If not empty object
-            self._records.append(attributes)
+            if self._record_sink is not None:
+                self._record_sink(attributes)
+            else:
+                self._records.append(attributes)
         self._current_record_lines = []
 
     def _handle_skipped_line(self) -> None:
@@ -200,6 +342,25 @@ class BoundaryDetector:
         self._accumulated_chars = 0
         self._target_length = len(boundary_pattern)
 
+    @property
+    def boundary_pattern(self) -> str:
+        """Return the full boundary pattern this detector matches."""
+        return self._boundary_pattern
+
+    @property
+    def in_progress(self) -> bool:
+        """Return True if part of the boundary has been matched."""
+        return self._accumulated_chars > 0
+
+    @property
+    def accumulated_chars(self) -> int:
+        """Return the number of boundary characters matched so far."""
+        return self._accumulated_chars
+
+    @accumulated_chars.setter
+    def accumulated_chars(self, value: int) -> None:
+        self._accumulated_chars = value
+
     def process_line(self, line: str) -> BoundaryResult:
         """Process a line and return boundary detection result."""
         # clean_line = line.strip()
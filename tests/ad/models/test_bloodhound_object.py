@@ -1,5 +1,7 @@
 import pytest
-from bofhound.ad.models.bloodhound_object import BloodHoundObject
+from bofhound.ad.helpers import PropertiesLevel, parse_dn
+from bofhound.ad.models import BloodHoundGroup, BloodHoundOU
+from bofhound.ad.models.bloodhound_object import BloodHoundObject, EMPTY_LIST
 
 
 @pytest.fixture
@@ -51,7 +53,10 @@ def test_constructor_basicFullObject(parsed_full_user):
 
     assert bho.ObjectIdentifier == 'S-1-5-21-3539700351-1165401899-3544196954-500'
     assert bho.get_distinguished_name() == 'CN=ADMINISTRATOR,CN=USERS,DC=TEST,DC=LAB'
-    assert bho.Properties['whencreated'] == 1629999042
+    assert bho.Properties is parsed_full_user
+    # derived properties are only computed when the object is written
+    assert bho.Properties['whencreated'] == '20210826173042.0Z'
+    assert bho.to_json(PropertiesLevel.All)['Properties']['whencreated'] == 1629999042
 
 def test_merge_entry_fullOverwrite():
     bho1 = BloodHoundObject({
@@ -135,3 +140,55 @@ def test_merge_entry_emptySourceAttributes():
     bho2.merge_entry(bho1)
     assert bho2.ObjectIdentifier == '024929'
     assert bho2.Properties['distinguishedname'] == 'DC=VALUE'
+
+
+def test_merge_entry_slotAttributes():
+    group = BloodHoundGroup({'distinguishedname': 'CN=Admins,DC=test,DC=lab', 'objectsid': 'S-1-5-21-1-512'})
+    fragment = BloodHoundGroup({'distinguishedname': 'CN=Admins,DC=test,DC=lab', 'member': 'CN=Bob,DC=test,DC=lab'})
+    fragment.RawAces = 'AQAEnA=='
+    del group.RawAces
+
+    group.merge_entry(fragment)
+    assert not hasattr(group, '__dict__')
+    assert group.ObjectIdentifier == 'S-1-5-21-1-512'
+    assert group.RawAces == 'AQAEnA=='
+    assert group.MemberDNs == ['CN=BOB,DC=TEST,DC=LAB']
+
+
+def test_merge_entry_otherModelAttributes():
+    group = BloodHoundGroup({'distinguishedname': 'CN=Admins,DC=test,DC=lab'})
+    ou = BloodHoundOU({'distinguishedname': 'CN=Admins,DC=test,DC=lab', 'gplink': '[LDAP://cn={1},dc=test;0]'})
+
+    group.merge_entry(ou)
+    assert not hasattr(group, 'GPLinks')
+
+
+def test_append_to_allocates_empty_list():
+    first = BloodHoundGroup({'distinguishedname': 'CN=First,DC=test,DC=lab'})
+    second = BloodHoundGroup({'distinguishedname': 'CN=Second,DC=test,DC=lab'})
+    assert first.Members is EMPTY_LIST and second.Members is EMPTY_LIST
+    assert first.Members == []
+
+    first.add_group_member(second, 'Group')
+    assert first.Members == [{'ObjectIdentifier': None, 'ObjectType': 'Group'}]
+    assert second.Members is EMPTY_LIST
+    with pytest.raises(TypeError):
+        second.Members.append({})
+
+
+def test_parse_dn_components():
+    dn = parse_dn('CN=ALICE,OU=LONDON,OU=SITES,DC=TEST,DC=LAB')
+
+    assert dn.rdns == ['CN=ALICE', 'OU=LONDON', 'OU=SITES', 'DC=TEST', 'DC=LAB']
+    assert dn.parent == 'OU=LONDON,OU=SITES,DC=TEST,DC=LAB'
+    assert dn.domain_component == 'DC=TEST,DC=LAB'
+    assert dn.domain == 'TEST.LAB'
+    assert dn.cn == 'ALICE'
+    assert dn.ancestor('OU=') == 'OU=LONDON,OU=SITES,DC=TEST,DC=LAB'
+    assert dn.ancestor('OU=', 2) == 'OU=SITES,DC=TEST,DC=LAB'
+    assert dn.ancestor('OU=', 3) is None
+    assert parse_dn('CN=ALICE,OU=LONDON,OU=SITES,DC=TEST,DC=LAB') is dn
+    # DC RDNs that don't end the DN are still part of the domain component
+    zone = parse_dn('DC=TEST.LAB,CN=MICROSOFTDNS,DC=DOMAINDNSZONES,DC=TEST,DC=LAB')
+    assert zone.domain_component == 'DC=TEST.LAB,DC=DOMAINDNSZONES,DC=TEST,DC=LAB'
+    assert BloodHoundObject.get_dn('test.lab') == 'DC=test,DC=lab'
@@ -1,4 +1,6 @@
 import pytest
+from bloodhound.ad.utils import ADUtils
+from bofhound.ad.helpers import PropertiesLevel
 from bofhound.ad.models import BloodHoundObject, BloodHoundUser
 
 @pytest.fixture
@@ -39,3 +41,21 @@ def parsed_full_user():
         'lastlogontimestamp': '132934687411151999',
         'msds-supportedencryptiontypes': '0'
     }
+
+
+def test_properties_derived_when_written(parsed_full_user):
+    user = BloodHoundUser(parsed_full_user)
+    assert user.Properties is parsed_full_user
+    assert user.Properties['name'] == 'ADMINISTRATOR@TEST.LAB'
+    assert 'enabled' not in user.Properties
+    assert user.Properties['lastlogon'] == '132940422420644609'
+
+    properties = user.to_json(PropertiesLevel.All)['Properties']
+    assert properties['enabled'] is True
+    assert properties['pwdneverexpires'] is True
+    assert properties['lastlogon'] == ADUtils.win_timestamp_to_unix(132940422420644609)
+    assert properties['whencreated'] == 1629999042
+    assert properties['hasspn'] is False
+
+    # writing the object again doesn't convert the values twice
+    assert user.to_json(PropertiesLevel.All)['Properties'] == properties
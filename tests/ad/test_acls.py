@@ -0,0 +1,50 @@
+import base64
+from uuid import UUID
+from bofhound.ad import ADDS
+from bofhound.ad.acls import AceRules, AclCache, parse_security_descriptor
+from tests.test_data import testdata_ldapsearchbof_beacon_257_objects
+
+
+def test_acl_cache_parses_each_descriptor_once(testdata_ldapsearchbof_beacon_257_objects):
+    adds = ADDS()
+    adds.import_objects(testdata_ldapsearchbof_beacon_257_objects)
+    objects = [user for user in adds.users if user.RawAces]
+    cache = AclCache(adds.ObjectTypeGuidMap)
+
+    for user in objects:
+        value = base64.b64decode(user.RawAces)
+        assert cache.parse(value, user._entry_type, False) == \
+            parse_security_descriptor(value, user._entry_type, False, AceRules(adds.ObjectTypeGuidMap))
+
+    distinct = {(user.RawAces, user._entry_type) for user in objects}
+    assert cache.lookups == len(objects)
+    assert cache.misses == len(distinct)
+    assert cache.hits == len(objects) - len(distinct) > 0
+
+
+def test_acl_cache_keys_on_entry_type_and_laps():
+    value = b"descriptor"
+    assert AclCache.key(value, "User", False) == AclCache.key(bytes(value), "User", False)
+    assert AclCache.key(value, "User", False) != AclCache.key(value, "Computer", False)
+    assert AclCache.key(value, "Computer", False) != AclCache.key(value, "Computer", True)
+
+
+def test_acl_cache_remembers_unparsable_descriptors():
+    cache = AclCache({})
+    assert cache.parse(b"\x01\x00", "User", False) is None
+    assert cache.parse(b"\x01\x00", "User", False) is None
+    assert (cache.lookups, cache.misses) == (2, 1)
+
+
+def test_ace_rules_are_compiled_per_entry_type():
+    laps = "1a94b25b-0820-47ba-9dcb-80aefadfb370"
+    computer_class = "bf967a86-0de6-11d0-a285-00aa003049e2"
+    rules = AceRules({"ms-mcs-admpwd": laps, "computer": computer_class, "user": "not-a-guid"})
+
+    computer = rules.for_entry("Computer", True)
+    assert rules.for_entry("Computer", True) is computer
+    assert computer.object_class == UUID(computer_class).bytes_le
+    assert computer.extended_rights[UUID(laps).bytes_le] == ("ReadLAPSPassword",)
+    assert UUID(laps).bytes_le not in rules.for_entry("Computer", False).extended_rights
+    assert rules.for_entry("User", False).object_class is None
+    assert not rules.for_entry("Container", False).write_property
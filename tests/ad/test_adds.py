@@ -1,8 +1,14 @@
+import copy
+from array import array
 import pytest
 from bofhound.ad import ADDS
+from bofhound.ad.helpers import DNTable, PropertiesLevel
 from bofhound.ad.models import BloodHoundObject, BloodHoundUser, BloodHoundComputer
+from bofhound.parsers import ParsingPipelineFactory, ObjectType
+from bofhound.parsers.data_sources import FileDataSource
 from tests.test_data import (
-    testdata_ldapsearchbof_beacon_257_objects, ldapsearchbof_minimal_ou_gplink_results
+    testdata_ldapsearchbof_beacon_257_objects, ldapsearchbof_minimal_ou_gplink_results,
+    ldapsearchbof_standard_file_257
 )
 
 @pytest.fixture
@@ -143,6 +149,22 @@ def test_import_objects_expectedValuesFromStandardDataSet(testdata_ldapsearchbof
     assert len(adds.unknown_objects) == 22
 
 
+def test_import_object_streamed_from_pipeline(ldapsearchbof_standard_file_257):
+    adds = ADDS()
+    pipeline = ParsingPipelineFactory.create_pipeline()
+    pipeline.register_sink(ObjectType.LDAP_OBJECT, adds.import_object)
+    result = pipeline.process_data_source(FileDataSource(ldapsearchbof_standard_file_257))
+
+    assert result.get_ldap_objects() == []
+    assert len(adds.SID_MAP) == 92
+    assert len(adds.DN_MAP) == 92
+    assert len(adds.users) == 5
+    assert len(adds.computers) == 4
+    assert len(adds.groups) == 53
+    assert len(adds.containers) == 24
+    assert len(adds.unknown_objects) == 22
+
+
 def test_import_objects_MinimalObject(raw_user):
     expected_sid = 'S-1-5-21-3539700351-1165401899-3544196954-500'
     expected_dn = 'CN=ADMINISTRATOR,CN=USERS,DC=TEST,DC=LAB'
@@ -173,6 +195,46 @@ def test_import_objects_DuplicateObject(raw_user):
     assert dn_map_object.ObjectIdentifier == expected_sid
 
 
+def test_import_objects_twice_gives_identical_output(testdata_ldapsearchbof_beacon_257_objects):
+    objects = testdata_ldapsearchbof_beacon_257_objects
+    original = copy.deepcopy(objects)
+
+    outputs = []
+    for _ in range(2):
+        adds = ADDS()
+        adds.import_objects(objects)
+        adds.process()
+        outputs.append([o.to_json(PropertiesLevel.All)
+                        for o in adds.users + adds.computers + adds.groups + adds.domains])
+
+    assert objects == original
+    assert outputs[0] == outputs[1]
+    # timestamps are converted once, not again on the second import
+    assert any(o['Properties'].get('lastlogon', 0) > 0 for o in outputs[1])
+
+
+def test_import_objects_merges_fragments_before_building(raw_user, monkeypatch):
+    spn_query = {key: raw_user[key] for key in ('distinguishedname', 'objectsid', 'samaccounttype')}
+    spn_query['serviceprincipalname'] = 'HTTP/web01.test.lab'
+    acl_query = {key: raw_user[key] for key in ('distinguishedname', 'objectguid', 'samaccounttype')}
+    acl_query['ntsecuritydescriptor'] = raw_user.pop('ntsecuritydescriptor')
+
+    built = []
+    init = BloodHoundUser.__init__
+    monkeypatch.setattr(BloodHoundUser, '__init__', lambda self, object=None: built.append(object) or init(self, object))
+    adds = ADDS()
+    adds.import_objects([raw_user, spn_query, acl_query])
+
+    user, = adds.users
+    assert len(built) == 1
+    assert adds.SID_MAP[raw_user['objectsid']] is user
+    assert user.Properties['serviceprincipalname'] == 'HTTP/web01.test.lab'
+    assert user.RawAces == acl_query['ntsecuritydescriptor']
+    # a fragment without primarygroupid doesn't change the primary group
+    assert user.PrimaryGroupSid == 'S-1-5-21-3539700351-1165401899-3544196954-513'
+    assert 'memberof' in raw_user and 'serviceprincipalname' not in raw_user
+
+
 def test_import_unique_trust(raw_trust, raw_domain):
     expected_domain_count = 1
     expected_trust_count = 1
@@ -201,6 +263,16 @@ def test_import_duplicate_trust(raw_trust, raw_domain):
     assert len(adds.domains[0].Trusts) == expected_trust_count
 
 
+def test_import_trust_hex_securityidentifier(raw_trust, raw_domain):
+    # BRc4 writes the trust's binary SID as hex
+    raw_trust['securityidentifier'] = '010400000000000515000000A7D963F01186E78DD485E416'
+
+    adds = ADDS()
+    adds.import_objects([raw_domain, raw_trust])
+
+    assert adds.trusts[0].TrustProperties['TargetDomainSid'] == 'S-1-5-21-4033075623-2380760593-384075220'
+
+
 def test_import_unique_crossref(raw_crossref):
     expected_crossref_count = 1
 
@@ -232,3 +304,249 @@ def test_import_gplink_parsing(ldapsearchbof_minimal_ou_gplink_results):
     assert len(ou.GPLinks) == 1
     assert ou.GPLinks[0][0] == 'CN={6AC1786C-016F-11D2-945F-00C04FB984F9},CN=POLICIES,CN=SYSTEM,DC=EZ,DC=LAB'.upper()
     assert ou.GPLinks[0][1] == '0'
+
+def test_calculate_contained_uses_parent_maps(raw_domain):
+    domain_sid = raw_domain['objectsid']
+    adds = ADDS()
+    adds.import_objects([
+        raw_domain,
+        {'objectclass': 'top, container', 'distinguishedname': 'CN=Users,DC=windomain,DC=local',
+         'objectguid': 'a0000000-0000-0000-0000-000000000001', 'name': 'Users'},
+        {'objectclass': 'top, organizationalUnit', 'ou': 'Staff', 'name': 'Staff',
+         'distinguishedname': 'OU=Staff,DC=windomain,DC=local',
+         'objectguid': 'a0000000-0000-0000-0000-000000000002'},
+        {'objectclass': 'top, NTDSService', 'name': 'Directory Service',
+         'distinguishedname': 'CN=Directory Service,CN=Windows NT,CN=Services,CN=Configuration,DC=windomain,DC=local',
+         'objectguid': 'a0000000-0000-0000-0000-000000000003'},
+    ])
+    users = []
+    for i, parent in enumerate([
+        'CN=Users,DC=windomain,DC=local', 'OU=Staff,DC=windomain,DC=local', 'DC=windomain,DC=local',
+        'CN=Directory Service,CN=Windows NT,CN=Services,CN=Configuration,DC=windomain,DC=local',
+    ]):
+        adds.import_object({
+            'objectclass': 'top, person, organizationalPerson, user', 'name': f'user{i}',
+            'distinguishedname': f'CN=user{i},{parent}', 'objectsid': f'{domain_sid}-{2000 + i}',
+            'samaccountname': f'user{i}', 'samaccounttype': '805306368',
+        })
+        users.append(adds.users[-1])
+    adds.process()
+
+    assert [user.ContainedBy for user in users] == [
+        {'ObjectIdentifier': 'A0000000-0000-0000-0000-000000000001', 'ObjectType': 'Container'},
+        {'ObjectIdentifier': 'A0000000-0000-0000-0000-000000000002', 'ObjectType': 'OU'},
+        {'ObjectIdentifier': domain_sid, 'ObjectType': 'Domain'},
+        {'ObjectIdentifier': 'A0000000-0000-0000-0000-000000000003', 'ObjectType': 'Base'},
+    ]
+
+def test_resolve_ou_members_nested_affected_objects(raw_domain):
+    domain_sid = raw_domain['objectsid']
+    adds = ADDS()
+    adds.import_object(raw_domain)
+    for i, dn in enumerate([
+        'OU=Sites,DC=windomain,DC=local',
+        'OU=London,OU=Sites,DC=windomain,DC=local',
+        'OU=Paris,OU=Sites,DC=windomain,DC=local',
+    ]):
+        adds.import_object({
+            'objectclass': 'top, organizationalUnit', 'distinguishedname': dn,
+            'name': dn[3:dn.index(',')], 'objectguid': f'b0000000-0000-0000-0000-00000000000{i}',
+        })
+    for i, (name, parent, account_type) in enumerate([
+        ('alice', 'OU=London,OU=Sites', '805306368'),
+        ('LONPC$', 'OU=London,OU=Sites', '805306369'),
+        ('bob', 'OU=Paris,OU=Sites', '805306368'),
+        ('carol', 'OU=Sites', '805306368'),
+    ]):
+        adds.import_object({
+            'objectclass': 'top, person, organizationalPerson, user', 'name': name,
+            'distinguishedname': f'CN={name},{parent},DC=windomain,DC=local',
+            'objectsid': f'{domain_sid}-{3000 + i}', 'samaccountname': name,
+            'samaccounttype': account_type,
+        })
+    adds.process()
+
+    sites, london, paris = adds.ous
+    def sids(affected):
+        return [int(entry['ObjectIdentifier'].rsplit('-', 1)[1]) for entry in affected]
+
+    assert sids(london.AffectedUsers) == [3000]
+    assert sids(london.AffectedComputers) == [3001]
+    assert sids(paris.AffectedUsers) == [3002]
+    assert sids(sites.AffectedUsers) == [3003, 3000, 3002]
+    assert sids(sites.AffectedComputers) == [3001]
+    assert sids(adds.domains[0].AffectedUsers) == [3003, 3000, 3002]
+    assert [child['ObjectType'] for child in sites.ChildObjects] == ['User', 'OU', 'OU']
+
+
+def test_resolve_delegation_targets_by_name_and_short_hostname(raw_domain):
+    domain_sid = raw_domain['objectsid']
+    adds = ADDS()
+    adds.import_object(raw_domain)
+    adds.import_object({
+        'objectclass': 'top, person, organizationalPerson, user, computer',
+        'distinguishedname': 'CN=SQL01,CN=Computers,DC=windomain,DC=local',
+        'dnshostname': 'sql01.windomain.local', 'name': 'SQL01',
+        'objectsid': f'{domain_sid}-3000', 'samaccountname': 'SQL01$',
+        'samaccounttype': '805306369',
+    })
+    adds.import_object({
+        'objectclass': 'top, person, organizationalPerson, user, computer',
+        'distinguishedname': 'CN=WEB01,CN=Computers,DC=windomain,DC=local', 'name': 'WEB01',
+        'objectsid': f'{domain_sid}-3001', 'samaccountname': 'WEB01$',
+        'samaccounttype': '805306369',
+        'msds-allowedtodelegateto': 'MSSQLSvc/sql01.windomain.local, cifs/SQL01, '
+                                    'http/app01.windomain.local, invalid',
+    })
+
+    adds.resolve_delegation_targets()
+
+    web01 = adds.SID_MAP[f'{domain_sid}-3001']
+    assert web01.AllowedToDelegate == [
+        {"ObjectIdentifier": f'{domain_sid}-3000', "ObjectType": "Computer"},
+        {"ObjectIdentifier": f'{domain_sid}-3000', "ObjectType": "Computer"},
+    ]
+    assert adds.get_sid_from_name('app01') == (None, None)
+
+
+def test_assign_ip_addresses_and_ip_map(raw_domain):
+    domain_sid = raw_domain['objectsid']
+    adds = ADDS()
+    adds.import_object(raw_domain)
+    for rid, name, extra in [
+        (3000, 'SQL01', {'dnshostname': 'sql01.windomain.local'}),
+        (3001, 'WEB01', {}),
+        (3002, 'APP01', {}),
+    ]:
+        adds.import_object({
+            'objectclass': 'top, person, organizationalPerson, user, computer',
+            'distinguishedname': f'CN={name},CN=Computers,DC=windomain,DC=local', 'name': name,
+            'objectsid': f'{domain_sid}-{rid}', 'samaccountname': f'{name}$',
+            'samaccounttype': '805306369', **extra,
+        })
+    adds.DNSNODE_MAP = {
+        'sql01.windomain.local': {'10.0.0.10'},
+        'web01.windomain.local': {'10.0.0.20'},
+        'app01.otherdomain.local': {'10.0.0.30'},
+    }
+
+    adds.assign_ip_addresses()
+
+    sql01, web01, app01 = adds.computers
+    assert sql01.ipaddresses == ['10.0.0.10']
+    assert web01.ipaddresses == ['10.0.0.20']
+    assert app01.ipaddresses == []
+    assert adds.IP_MAP == {'10.0.0.10': [sql01], '10.0.0.20': [web01]}
+
+
+def test_process_parallel_acls_match_serial(testdata_ldapsearchbof_beacon_257_objects):
+    serial = ADDS()
+    serial.import_objects(testdata_ldapsearchbof_beacon_257_objects)
+    serial.process()
+
+    parallel = ADDS()
+    parallel.import_objects(testdata_ldapsearchbof_beacon_257_objects)
+    parallel.process(acl_jobs=2)
+
+    serial_objects = serial.users + serial.groups + serial.computers + serial.domains + serial.ous
+    parallel_objects = parallel.users + parallel.groups + parallel.computers + parallel.domains \
+        + parallel.ous
+    assert sum(len(o.Aces) for o in serial_objects) > 0
+    assert [(o.IsACLProtected, o.Aces) for o in parallel_objects] == \
+        [(o.IsACLProtected, o.Aces) for o in serial_objects]
+
+def test_group_members_resolved_by_dn_id(raw_domain):
+    domain_sid = raw_domain['objectsid']
+    adds = ADDS()
+    adds.import_object(raw_domain)
+    adds.import_object({
+        'objectclass': 'top, group', 'name': 'Staff', 'samaccountname': 'Staff',
+        'distinguishedname': 'CN=Staff,CN=Users,DC=windomain,DC=local',
+        'objectsid': f'{domain_sid}-4000', 'samaccounttype': '268435456',
+        'member': 'CN=alice,CN=Users,DC=windomain,DC=local, CN=PC1,CN=Computers,DC=windomain,DC=local',
+    })
+    for i, (name, parent, account_type) in enumerate([
+        ('alice', 'CN=Users', '805306368'),
+        ('PC1', 'CN=Computers', '805306369'),
+    ]):
+        adds.import_object({
+            'objectclass': 'top, person, organizationalPerson, user', 'name': name,
+            'distinguishedname': f'CN={name},{parent},DC=windomain,DC=local',
+            'objectsid': f'{domain_sid}-{4001 + i}', 'samaccountname': name,
+            'samaccounttype': account_type,
+            'memberof': 'CN=Staff,CN=Users,DC=windomain,DC=local',
+        })
+    adds.process()
+
+    group = adds.groups[0]
+    alice = adds.users[0]
+    assert isinstance(group.MemberDNs, array)
+    assert adds.DN_TABLE.dns(group.MemberDNs) == [
+        'CN=ALICE,CN=USERS,DC=WINDOMAIN,DC=LOCAL', 'CN=PC1,CN=COMPUTERS,DC=WINDOMAIN,DC=LOCAL'
+    ]
+    assert adds.DN_TABLE.dns(alice.MemberOfDNs) == ['CN=STAFF,CN=USERS,DC=WINDOMAIN,DC=LOCAL']
+    # the table's instance of a DN is shared by the object that has it
+    assert alice.Properties['distinguishedname'] is adds.DN_TABLE.dn(group.MemberDNs[0])
+    assert [member['ObjectIdentifier'] for member in group.Members] == [
+        f'{domain_sid}-4001', f'{domain_sid}-4002'
+    ]
+
+def test_dn_table_interns_each_dn_once():
+    table = DNTable()
+    first = table.intern('CN=ALICE,DC=TEST,DC=LAB')
+    ids = table.intern_all(['CN=BOB,DC=TEST,DC=LAB', 'CN=ALICE,DC=TEST,DC=LAB'])
+
+    assert ids == array('I', [1, first])
+    assert len(table) == 2
+    assert table.get('CN=CAROL,DC=TEST,DC=LAB') is None
+    assert table.dns(ids) == ['CN=BOB,DC=TEST,DC=LAB', 'CN=ALICE,DC=TEST,DC=LAB']
+
+def test_group_members_from_memberof_and_primary_group(raw_domain):
+    domain_sid = raw_domain['objectsid']
+    adds = ADDS()
+    adds.import_object(raw_domain)
+    # BRc4 only returns memberOf, the groups have no member attribute
+    for name, rid in [('Domain Users', 513), ('Staff', 4000)]:
+        adds.import_object({
+            'objectclass': 'top, group', 'name': name, 'samaccountname': name,
+            'distinguishedname': f'CN={name},CN=Users,DC=windomain,DC=local',
+            'objectsid': f'{domain_sid}-{rid}', 'samaccounttype': '268435456',
+        })
+    adds.import_object({
+        'objectclass': 'top, person, organizationalPerson, user', 'name': 'alice',
+        'distinguishedname': 'CN=alice,CN=Users,DC=windomain,DC=local',
+        'objectsid': f'{domain_sid}-4001', 'samaccountname': 'alice',
+        'samaccounttype': '805306368', 'primarygroupid': '513',
+        'memberof': 'CN=Staff,CN=Users,DC=windomain,DC=local, CN=Domain Users,CN=Users,DC=windomain,DC=local',
+    })
+    adds.process()
+
+    members = {group.Properties['name']: [member['ObjectIdentifier'] for member in group.Members]
+               for group in adds.groups[:2]}
+    # Domain Users is both alice's primary group and in her memberOf, she's listed once
+    assert members == {
+        'DOMAIN USERS@WINDOMAIN.LOCAL': [f'{domain_sid}-4001'],
+        'STAFF@WINDOMAIN.LOCAL': [f'{domain_sid}-4001'],
+    }
+
+def test_group_members_same_from_member_or_memberof(testdata_ldapsearchbof_beacon_257_objects):
+    def memberships(without):
+        adds = ADDS()
+        adds.import_objects([
+            {key: value for key, value in object.items() if key != without}
+            for object in testdata_ldapsearchbof_beacon_257_objects
+        ])
+        adds.process()
+        return {(group.ObjectIdentifier, member['ObjectIdentifier'])
+                for group in adds.groups for member in group.Members}
+
+    memberships_both = memberships(None)
+    memberships_from_member = memberships('memberof')
+    memberships_from_memberof = memberships('member')
+
+    assert len(memberships_both) == 37
+    assert memberships_from_member == memberships_both
+    # the well-known groups bofhound adds have no memberOf
+    assert memberships_both - memberships_from_memberof == {
+        ('EZ.LAB-S-1-5-32-545', 'EZ.LAB-S-1-5-4'), ('EZ.LAB-S-1-5-32-560', 'EZ.LAB-S-1-5-9')
+    }
@@ -0,0 +1,57 @@
+import base64
+from io import BytesIO
+from uuid import UUID
+import pytest
+from bloodhound.enumeration.acls import SecurityDescriptor
+from bofhound.ad.security_descriptor import (
+    decode_security_descriptor, format_sid, SecurityDescriptorError,
+    SE_DACL_PROTECTED
+)
+from tests.test_data import testdata_ldapsearchbof_beacon_257_objects
+
+
+def test_decode_matches_bloodhound_python(testdata_ldapsearchbof_beacon_257_objects):
+    descriptors = {record["ntsecuritydescriptor"] for record in testdata_ldapsearchbof_beacon_257_objects
+                   if record.get("ntsecuritydescriptor")}
+    assert descriptors
+
+    for value in descriptors:
+        value = base64.b64decode(value)
+        expected = SecurityDescriptor(BytesIO(value))
+        control, owner, aces = decode_security_descriptor(value)
+        aces = list(aces)
+
+        assert bool(control & SE_DACL_PROTECTED) == expected.has_control(expected.PD)
+        assert format_sid(owner) == str(expected.owner_sid)
+        assert len(aces) == len(expected.dacl.aces)
+        for (ace_type, ace_flags, mask, object_type, inherited_object_type, sid), ace \
+                in zip(aces, expected.dacl.aces):
+            assert (ace_type, ace_flags) == (ace.ace.AceType, ace.ace.AceFlags)
+            if ace.acedata is None:
+                continue
+            assert mask == ace.acedata.data.Mask
+            assert format_sid(sid) == str(ace.acedata.sid)
+            if ace_type == 0x05:
+                data = ace.acedata.data
+                assert object_type == (data.ObjectType if data.Flags & 1 else None)
+                assert inherited_object_type == (data.InheritedObjectType if data.Flags & 2 else None)
+                if object_type:
+                    assert str(UUID(bytes_le=object_type)) == ace.acedata.get_object_type().lower()
+
+
+def test_format_sid():
+    sid = bytes.fromhex("010200000000000515000000") + (512).to_bytes(4, "little")
+    assert format_sid(b"\x01\x01\x00\x00\x00\x00\x00\x05\x12\x00\x00\x00") == "S-1-5-18"
+    assert format_sid(sid) == "S-1-5-21-512"
+
+
+@pytest.mark.parametrize("value", [
+    b"",
+    b"\x01\x00\x04\x80" + bytes(16),         # no DACL
+    b"\x01\x00\x04\x00" + bytes(12) + b"\x14\x00\x00\x00",  # not self-relative
+    b"\x01\x00\x04\x80" + bytes(12) + b"\x14\x00\x00\x00" + b"\x04\x00\x40\x00\x01\x00\x00\x00",
+])
+def test_decode_rejects_malformed_descriptors(value):
+    with pytest.raises(SecurityDescriptorError):
+        _, _, aces = decode_security_descriptor(value)
+        list(aces)
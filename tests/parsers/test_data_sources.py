@@ -1,11 +1,21 @@
 """Test Data Sources for parsers"""
 
+import bz2
+import gzip
 import json
+import lzma
+import tarfile
 from unittest.mock import patch
 from pathlib import Path
+from datetime import date
 import pytest
-from bofhound.parsers.data_sources import MythicDataSource, FileDataSource
-from bofhound.parsers import ParsingPipeline, LdapSearchBofParser
+from bofhound.parsers.data_sources import (
+    MythicDataSource, FileDataSource, FileDataStream, OutflankDataStream
+)
+from bofhound.parsers import (
+    ParsingPipeline, ParsingPipelineFactory, LdapSearchBofParser, NetSessionBofParser, ObjectType
+)
+from bofhound.parsers.line_router import LineRouter
 from tests.mocks.mock_mythic_api import MockMythicAPI
 
 def test_file_glob_data_source(tmp_path):
@@ -51,6 +61,48 @@ def test_single_file_data_source(tmp_path):
     assert lines == ["onlyline1", "onlyline2"]
 
 
+def test_file_data_stream_split(tmp_path):
+    """Test splitting a FileDataStream at complete boundary lines."""
+    file1 = tmp_path / "split.log"
+    file1.write_text(
+        "header\n--------------------\nname: a\n----------\n----------\nname: b\n"
+        "  --------------------\r\nname: c\n---------------------\nname: d\n"
+    )
+
+    stream = FileDataStream(str(file1))
+    chunks = stream.split(["-" * 20], chunk_size=4)
+
+    # Split boundaries and overlong lines are not cut points
+    assert [chunk.first_line for chunk in chunks] == [None, "-" * 20, "-" * 20]
+    assert [line for chunk in chunks for line in chunk.lines()] == list(stream.lines())
+    assert stream.split(["-" * 20], chunk_size=1024) == [stream]
+
+def test_file_data_stream_invalid_utf8(tmp_path):
+    """Test that invalid UTF-8 and mixed newlines are read like text mode, without aborting."""
+    file1 = tmp_path / "invalid.log"
+    file1.write_bytes(b"first\r\nbad \xff\xfe byte\nlone\rreturn\r\r\nlast")
+
+    lines = list(FileDataStream(str(file1)).lines())
+
+    assert lines == ["first", "bad \ufffd\ufffd byte", "lone", "return", "", "last"]
+
+def test_file_data_stream_feed_skips_noise(tmp_path):
+    """Test that feeding a router only skips lines that can't matter to idle parsers."""
+    noise = "".join(f"12/01 10:00:{i % 60:02d} UTC [output]\nnoise {i}\n" for i in range(5000))
+    file1 = tmp_path / "noisy.log"
+    file1.write_text(
+        noise + "--------------------\nname: a\n----------\n----------\nname: b\n"
+        "retrieved 2 results\n" + noise + "\t--------------------\r\nname: c\n"
+        "retrieved 1 result\n" + noise + "\xa0---------------Session--------------\n"
+        "Client: 10.0.0.1\n-------------End Session------------\n" + noise
+    )
+
+    parsers = [LdapSearchBofParser(), NetSessionBofParser()]
+    FileDataStream(str(file1)).feed(LineRouter(parsers))
+
+    assert parsers[0].get_results() == [{"name": "a"}, {"name": "b"}, {"name": "c"}]
+    assert parsers[1].get_results() == [{"client": "10.0.0.1"}]
+
 @pytest.fixture
 def mock_mythic_api():
     """Create mock mythic API with test data."""
@@ -157,3 +209,102 @@ def test_mock_mythic_api_structure():
     assert isinstance(mock_api.test_data["callbacks"], list)
     assert isinstance(mock_api.test_data["tasks"], list)
     assert isinstance(mock_api.test_data["outputs"], list)
+
+def test_file_data_source_falls_back_in_one_walk(tmp_path):
+    """Test that the fallback pattern is only used when nothing matches the pattern."""
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "nested" / "pyldapsearch.log").write_text("a\n")
+    (tmp_path / "notes.txt").write_text("b\n")
+
+    data_source = FileDataSource(str(tmp_path), "beacon*.log", fallback_pattern="*.log")
+    assert [Path(f).name for f, _ in data_source.find_files()] == ["pyldapsearch.log"]
+
+    (tmp_path / "beacon_1.log").write_text("c\n")
+    files = data_source.find_files()
+    assert [Path(f).name for f, _ in files] == ["beacon_1.log"]
+    assert files[0][1].st_size == 2
+
+def test_file_data_source_skips_directories_before_since(tmp_path):
+    """Test that date named directories before since are not searched."""
+    for day in ("260930", "261001", "2026-09-30", "20261002", "hosts", "999999"):
+        (tmp_path / day).mkdir()
+        (tmp_path / day / "beacon_1.log").write_text("a\n")
+
+    data_source = FileDataSource(str(tmp_path), "beacon*.log", since=date(2026, 10, 1))
+    found = sorted(Path(f).parent.name for f, _ in data_source.find_files())
+
+    assert found == ["20261002", "261001", "999999", "hosts"]
+
+@pytest.mark.parametrize("suffix, opener", [
+    (".gz", gzip.open), (".bz2", bz2.open), (".xz", lzma.open)
+])
+def test_compressed_file_matches_plain_file(tmp_path, suffix, opener):
+    """Test that compressed logs are parsed the same as the plain log."""
+    plain_log = "tests/test_data/ldapsearchbof_logs/beacon_marvel_ldap_sessions_localgroup.log"
+    with open(plain_log, 'rb') as src, opener(tmp_path / f"beacon_1.log{suffix}", 'wb') as dst:
+        dst.write(src.read())
+
+    expected = ParsingPipelineFactory.create_pipeline().process_data_source(
+        FileDataSource(plain_log)
+    )
+    result = ParsingPipelineFactory.create_pipeline().process_data_source(
+        FileDataSource(str(tmp_path), "beacon*.log")
+    )
+
+    for obj_type in ObjectType:
+        assert result.get_objects_by_type(obj_type) == expected.get_objects_by_type(obj_type)
+
+def test_tar_archive_members_are_parsed(tmp_path):
+    """Test that matching members of a tar archive, compressed or not, are parsed in order."""
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    (logs / "beacon_1.log").write_text("--------------------\nname: a\nretrieved 1 results total\n")
+    with gzip.open(logs / "beacon_2.log.gz", 'wt') as f:
+        f.write("--------------------\nname: b\nretrieved 1 results total\n")
+    (logs / "keystrokes.txt").write_text("--------------------\nname: c\n")
+    with tarfile.open(tmp_path / "engagement.tar.gz", 'w:gz') as tar:
+        tar.add(logs, arcname="logs")
+
+    data_source = FileDataSource(str(tmp_path / "engagement.tar.gz"), "beacon*.log")
+    result = ParsingPipelineFactory.create_pipeline().process_data_source(data_source)
+
+    assert result.get_ldap_objects() == [{"name": "a"}, {"name": "b"}]
+
+def test_unrelated_tar_archive_keeps_fallback(tmp_path):
+    """Test that an archive without a matching member doesn't count as a match."""
+    (tmp_path / "op.log").write_text("--------------------\nname: a\nretrieved 1 results total\n")
+    (tmp_path / "readme.txt").write_text("screenshots\n")
+    with tarfile.open(tmp_path / "screenshots.tgz", 'w:gz') as tar:
+        tar.add(tmp_path / "readme.txt", arcname="readme.txt")
+
+    data_source = FileDataSource(str(tmp_path), "beacon*.log", fallback_pattern="*.log")
+    assert [Path(f).name for f, _ in data_source.find_files()] == ["op.log"]
+
+    result = ParsingPipelineFactory.create_pipeline().process_data_source(data_source)
+    assert result.get_ldap_objects() == [{"name": "a"}]
+
+def test_tar_archive_members_matching_fallback_are_parsed(tmp_path):
+    """Test that archived logs matching only the fallback pattern are read with it."""
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    (logs / "op_1.log").write_text("--------------------\nname: a\nretrieved 1 results total\n")
+    (logs / "op_2.log").write_text("--------------------\nname: b\nretrieved 1 results total\n")
+    with tarfile.open(tmp_path / "engagement.tar", 'w') as tar:
+        tar.add(logs, arcname="logs")
+    archive = tmp_path / "archive"
+    archive.mkdir()
+    (tmp_path / "engagement.tar").rename(archive / "engagement.tar")
+
+    for input_path in (archive, archive / "engagement.tar"):
+        data_source = FileDataSource(str(input_path), "beacon*.log", fallback_pattern="*.log")
+        result = ParsingPipelineFactory.create_pipeline().process_data_source(data_source)
+        assert result.get_ldap_objects() == [{"name": "a"}, {"name": "b"}]
+
+def test_compressed_outflank_log_matches_plain_log(tmp_path):
+    """Test that Outflank events are decoded from compressed logs too."""
+    plain_log = "tests/test_data/outflankc2_logs/ldapsearchbof/beacon_2052.json"
+    with open(plain_log, 'rb') as src, gzip.open(tmp_path / "beacon.json.gz", 'wb') as dst:
+        dst.write(src.read())
+
+    expected = list(OutflankDataStream(plain_log).lines())
+    assert list(OutflankDataStream(str(tmp_path / "beacon.json.gz")).lines()) == expected
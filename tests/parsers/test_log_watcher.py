@@ -0,0 +1,53 @@
+"""Tests for following log files as they are written."""
+from bofhound.parsers import ParsingPipelineFactory, ObjectType
+from bofhound.parsers.data_sources import FileDataSource
+from bofhound.parsers.log_watcher import LogWatcher
+from tests.test_data import ldapsearchbof_standard_file_marvel
+
+
+def test_log_watcher_parses_appended_output(tmp_path, ldapsearchbof_standard_file_marvel):
+    """Test that output appended between polls, cut mid-line, gives the same records."""
+    with open(ldapsearchbof_standard_file_marvel, 'rb') as f:
+        content = f.read()
+    log_file = tmp_path / "beacon_1.log"
+    log_file.write_bytes(b"")
+
+    expected = ParsingPipelineFactory.create_pipeline().process_data_source(
+        FileDataSource(ldapsearchbof_standard_file_marvel)
+    )
+    watcher = LogWatcher(
+        FileDataSource(str(tmp_path), "beacon*.log"),
+        ParsingPipelineFactory.create_pipeline().tool_parsers
+    )
+
+    collected = {obj_type: [] for obj_type in ObjectType}
+    for i in range(0, len(content), 7919):
+        with open(log_file, 'ab') as f:
+            f.write(content[i:i + 7919])
+        for obj_type, objects in watcher.poll().objects_by_type.items():
+            collected[obj_type].extend(objects)
+    for parser in watcher.parsers:
+        collected[parser.produces_object_type].extend(parser.get_results())
+
+    for obj_type in ObjectType:
+        assert collected[obj_type] == expected.get_objects_by_type(obj_type)
+
+
+def test_log_watcher_picks_up_new_and_rewritten_files(tmp_path):
+    """Test that new files are found and truncated files are parsed again."""
+    first_log = tmp_path / "beacon_1.log"
+    first_log.write_text("--------------------\nname: a\nretrieved 1 results total\n")
+    watcher = LogWatcher(
+        FileDataSource(str(tmp_path), "beacon*.log"),
+        ParsingPipelineFactory.create_pipeline().tool_parsers
+    )
+    assert watcher.poll().get_ldap_objects() == [{"name": "a"}]
+    assert watcher.poll().get_ldap_objects() == []
+
+    (tmp_path / "beacon_2.log").write_text(
+        "--------------------\nname: b\nretrieved 1 results total\n"
+    )
+    assert watcher.poll().get_ldap_objects() == [{"name": "b"}]
+
+    first_log.write_text("--------------------\nname: c\nretrieved 1 results total\n")
+    assert watcher.poll().get_ldap_objects() == [{"name": "c"}]
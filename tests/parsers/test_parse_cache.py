@@ -0,0 +1,104 @@
+"""Tests for the incremental parse cache."""
+import os
+import shutil
+from bofhound.parsers import ParsingPipeline, ParsingPipelineFactory, ObjectType, ToolParser
+from bofhound.parsers.data_sources import FileDataSource
+from bofhound.parsers.parse_cache import ParseCache
+from tests.test_data import ldapsearchbof_standard_file_marvel
+
+
+def _parse(file_path, cache=None):
+    return ParsingPipelineFactory.create_pipeline().process_data_source(
+        FileDataSource(file_path), cache=cache
+    )
+
+
+def _assert_same_results(result, expected):
+    for obj_type in ObjectType:
+        assert result.get_objects_by_type(obj_type) == expected.get_objects_by_type(obj_type)
+
+
+def test_parse_cache_replays_unchanged_file(tmp_path, ldapsearchbof_standard_file_marvel):
+    """Test that a second run over an unchanged file reuses every cached record."""
+    expected = _parse(ldapsearchbof_standard_file_marvel)
+    cache = ParseCache(str(tmp_path / "cache"))
+
+    _assert_same_results(_parse(ldapsearchbof_standard_file_marvel, cache), expected)
+    assert cache.hits == 0
+
+    _assert_same_results(_parse(ldapsearchbof_standard_file_marvel, cache), expected)
+    assert cache.hits == 1
+    assert cache.bytes_skipped == os.path.getsize(ldapsearchbof_standard_file_marvel)
+
+
+def test_parse_cache_resumes_appended_file(tmp_path, ldapsearchbof_standard_file_marvel):
+    """Test that only bytes appended since the last run are parsed, mid-record included."""
+    with open(ldapsearchbof_standard_file_marvel, 'rb') as f:
+        content = f.read()
+    log_file = str(tmp_path / "beacon_1.log")
+    cache = ParseCache(str(tmp_path / "cache"))
+
+    # Cut part way through a record and a line
+    cut = content.index(b"objectClass", len(content) // 2) + 4
+    with open(log_file, 'wb') as f:
+        f.write(content[:cut])
+    _parse(log_file, cache)
+
+    with open(log_file, 'ab') as f:
+        f.write(content[cut:])
+    result = _parse(log_file, cache)
+
+    assert cache.hits == 1
+    assert 0 < cache.bytes_skipped <= cut
+    _assert_same_results(result, _parse(ldapsearchbof_standard_file_marvel))
+
+
+def test_parse_cache_ignores_rewritten_file(tmp_path, ldapsearchbof_standard_file_marvel):
+    """Test that a file rewritten with different content is parsed from scratch."""
+    log_file = str(tmp_path / "beacon_1.log")
+    cache = ParseCache(str(tmp_path / "cache"))
+
+    shutil.copy("tests/test_data/ldapsearchbof_logs/beacon_257-objects.log", log_file)
+    _parse(log_file, cache)
+
+    shutil.copy(ldapsearchbof_standard_file_marvel, log_file)
+    result = _parse(log_file, cache)
+
+    assert cache.hits == 0
+    _assert_same_results(result, _parse(ldapsearchbof_standard_file_marvel))
+
+
+def test_parse_cache_skipped_for_parsers_without_state(tmp_path):
+    """Test that a parser whose state can't be saved is parsed without the cache."""
+    class LineParser(ToolParser):
+        tool_name = "lines"
+        produces_object_type = ObjectType.LDAP_OBJECT
+
+        def __init__(self):
+            self.records = []
+
+        def process_line(self, line):
+            self.records.append({"line": line})
+
+        def get_results(self):
+            return self.drain_results()
+
+        def drain_results(self):
+            records, self.records = self.records, []
+            return records
+
+        def reset(self):
+            self.records = []
+
+    log_file = tmp_path / "beacon_1.log"
+    log_file.write_text("a\nb\n")
+    parser = LineParser()
+    pipeline = ParsingPipeline()
+    pipeline.register_parser(parser)
+    cache = ParseCache(str(tmp_path / "cache"))
+
+    result = pipeline.process_data_source(FileDataSource(str(log_file)), cache=cache)
+
+    assert result.get_ldap_objects() == [{"line": "a"}, {"line": "b"}]
+    assert os.listdir(cache.cache_dir) == []
+    parser.set_state(parser.get_state())
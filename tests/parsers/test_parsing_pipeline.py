@@ -1,11 +1,13 @@
 """Tests for LDAP Search BOF parser."""
 from bofhound.parsers import (
     ParsingPipeline, ParsingResult, BoundaryDetector, BoundaryResult,
-    LdapSearchBofParser
+    LdapSearchBofParser, NetSessionBofParser, ParsingPipelineFactory, ObjectType
 )
+from bofhound.parsers.line_router import LineRouter
 from bofhound.parsers.data_sources import FileDataSource
 from tests.test_data import (
-    ldapsearchpy_standard_file_516
+    ldapsearchpy_standard_file_516,
+    ldapsearchbof_standard_file_marvel
 )
 
 def test_parse_file_ldapsearchpy_normal_file(ldapsearchpy_standard_file_516):
@@ -48,3 +50,101 @@ def test_boundary_detection():
     assert (detector.process_line("* Test Multi-char Boundary $$$")
             == BoundaryResult.COMPLETE_BOUNDARY)
     assert detector.process_line(" * Test Multi-char Boundary $$$") == BoundaryResult.NOT_BOUNDARY
+
+def test_routed_pipeline_matches_fan_out(ldapsearchbof_standard_file_marvel):
+    """Test that routing lines gives the same records as sending every line to every parser."""
+    fan_out_parsers = ParsingPipelineFactory.create_pipeline().tool_parsers
+    with open(ldapsearchbof_standard_file_marvel, 'r', encoding='utf-8') as f:
+        for line in f:
+            for parser in fan_out_parsers:
+                parser.process_line(line.rstrip('\n\r'))
+
+    pipeline = ParsingPipelineFactory.create_pipeline()
+    parsed_objects = pipeline.process_data_source(FileDataSource(ldapsearchbof_standard_file_marvel))
+
+    for parser in fan_out_parsers:
+        assert (parsed_objects.get_objects_by_type(parser.produces_object_type)
+                == parser.get_results())
+    assert len(parsed_objects.get_ldap_objects()) == 327
+    assert len(parsed_objects.get_sessions()) == 10
+
+
+def test_line_router_skips_idle_parsers():
+    """Test that idle parsers only see lines that could start one of their boundaries."""
+    session_parser = NetSessionBofParser()
+    ldap_parser = LdapSearchBofParser()
+    router = LineRouter([session_parser, ldap_parser])
+
+    router.route_lines(["noise", "---------------Session--------------", "Client: 10.0.0.1"])
+    assert not session_parser.is_idle
+    assert ldap_parser.is_idle
+
+    # Split boundary lines still reach the parser
+    router.route_lines(["-------------End Sess", "ion------------", "name: x"])
+    assert session_parser.is_idle
+    assert router.is_idle
+
+    router.route_lines(["----------", "----------", "name: x", "Retrieved 1 results"])
+    assert router.is_idle
+    assert session_parser.get_results() == [{"client": "10.0.0.1"}]
+    assert ldap_parser.get_results() == [{"name": "x"}]
+
+def test_parallel_pipeline_preserves_stream_order():
+    """Test that parsing streams in worker processes merges results in mtime order."""
+    data_source = FileDataSource("tests/test_data/ldapsearchbof_logs")
+
+    sequential = ParsingPipelineFactory.create_pipeline().process_data_source(data_source)
+    parallel = ParsingPipelineFactory.create_pipeline().process_data_source(data_source, jobs=2)
+
+    for obj_type in ObjectType:
+        assert (parallel.get_objects_by_type(obj_type)
+                == sequential.get_objects_by_type(obj_type))
+
+def test_parallel_pipeline_split_file_matches_sequential(ldapsearchbof_standard_file_marvel):
+    """Test that parsing pieces of one file in parallel gives the same records."""
+    data_source = FileDataSource(ldapsearchbof_standard_file_marvel)
+
+    sequential = ParsingPipelineFactory.create_pipeline().process_data_source(data_source)
+    parallel = ParsingPipelineFactory.create_pipeline().process_data_source(
+        data_source, jobs=2, chunk_size=4096
+    )
+
+    for obj_type in ObjectType:
+        assert (parallel.get_objects_by_type(obj_type)
+                == sequential.get_objects_by_type(obj_type))
+
+def test_pipeline_streams_records_to_sink(ldapsearchbof_standard_file_marvel):
+    """Test that records streamed to a sink arrive in the same order a full parse returns."""
+    data_source = FileDataSource(ldapsearchbof_standard_file_marvel)
+    collected = ParsingPipelineFactory.create_pipeline().process_data_source(data_source)
+
+    streamed_records = []
+    pipeline = ParsingPipelineFactory.create_pipeline()
+    pipeline.register_sink(ObjectType.LDAP_OBJECT, streamed_records.append)
+    streamed = pipeline.process_data_source(data_source)
+
+    assert streamed_records == collected.get_ldap_objects()
+    assert streamed.get_ldap_objects() == []
+    assert streamed.get_count(ObjectType.LDAP_OBJECT) == 327
+    assert streamed.get_sessions() == collected.get_sessions()
+    assert streamed.get_count(ObjectType.SESSION) == 10
+
+def test_parser_drain_and_reset():
+    """Test that draining keeps the record in progress and collecting results resets."""
+    parser = LdapSearchBofParser()
+    for line in ["--------------------", "name: a", "--------------------", "name: b"]:
+        parser.process_line(line)
+
+    assert parser.drain_results() == [{"name": "a"}]
+    assert parser.drain_results() == []
+
+    parser.process_line("retrieved 2 results total")
+    assert parser.get_results() == [{"name": "b"}]
+    assert parser.get_results() == []
+    assert parser.is_idle
+
+    parser.process_line("--------------------")
+    parser.process_line("name: c")
+    parser.reset()
+    assert parser.is_idle
+    assert parser.get_results() == []
@@ -0,0 +1,99 @@
+"""Tests for the log file content prefilter."""
+import os
+from bofhound.parsers import ParsingPipelineFactory, LdapSearchBofParser
+from bofhound.parsers.data_sources import FileDataSource, FileDataStream, OutflankDataStream
+from bofhound.parsers.prefilter import ContentPrefilter
+from tests.test_data import ldapsearchbof_standard_file_marvel
+
+
+def test_prefilter_skips_files_without_boundaries(tmp_path, ldapsearchbof_standard_file_marvel):
+    """Test that only files containing a parser's start boundary are parsed."""
+    noise_log = tmp_path / "keystrokes.log"
+    noise_log.write_text("10/18 12:00:00 UTC [output]\n- typed text\nretrieved 1 results total\n")
+    prefilter = ContentPrefilter(ParsingPipelineFactory.create_pipeline().tool_parsers)
+
+    assert prefilter.can_skip(FileDataStream(str(noise_log)))
+    assert not prefilter.can_skip(FileDataStream(ldapsearchbof_standard_file_marvel))
+    assert prefilter.skipped == 1
+
+
+def test_prefilter_keeps_record_continued_from_previous_file(tmp_path):
+    """Test that a file without boundaries is still parsed while a record is in progress."""
+    first_log = tmp_path / "beacon_1.log"
+    second_log = tmp_path / "beacon_2.log"
+    first_log.write_text("--------------------\nname: a\n")
+    second_log.write_text("description: b\nretrieved 1 results total\n")
+    os.utime(first_log, (1, 1))
+    os.utime(second_log, (2, 2))
+
+    result = ParsingPipelineFactory.create_pipeline().process_data_source(
+        FileDataSource(str(tmp_path), "beacon*.log")
+    )
+
+    assert result.get_ldap_objects() == [{"name": "a", "description": "b"}]
+
+
+def test_prefilter_remembers_decisions_by_fingerprint(tmp_path):
+    """Test that decisions for large files are reused from the cache directory."""
+    noise_log = tmp_path / "keystrokes.log"
+    noise_log.write_text("keystrokes\n" * ContentPrefilter.MIN_CACHED_SIZE)
+    parsers = ParsingPipelineFactory.create_pipeline().tool_parsers
+
+    prefilter = ContentPrefilter(parsers, str(tmp_path))
+    assert prefilter.can_skip(FileDataStream(str(noise_log)))
+    prefilter.save()
+
+    class UnreadableStream(FileDataStream):
+        def contains_line(self, line_pattern, candidate_pattern):
+            raise AssertionError("decision should come from the cache")
+
+    assert ContentPrefilter(parsers, str(tmp_path)).can_skip(UnreadableStream(str(noise_log)))
+
+
+def test_prefilter_keeps_files_with_split_boundaries(tmp_path):
+    """Test that a file whose boundaries are all split over several lines is parsed."""
+    split_log = tmp_path / "beacon_1.log"
+    split_log.write_text("----------\n----------\nname: a\nretrieved 1 results total\n")
+    prefilter = ContentPrefilter(ParsingPipelineFactory.create_pipeline().tool_parsers)
+    assert not prefilter.can_skip(FileDataStream(str(split_log)))
+
+    parser = LdapSearchBofParser()
+    for line in FileDataStream(str(split_log)).lines():
+        parser.process_line(line)
+    expected = parser.get_results()
+    result = ParsingPipelineFactory.create_pipeline().process_data_source(
+        FileDataSource(str(split_log))
+    )
+
+    assert len(expected) == 1
+    assert result.get_ldap_objects() == expected
+
+
+def test_prefilter_keeps_outflank_logs(tmp_path):
+    """Test that boundaries inside Outflank's JSON encoded events are found."""
+    outflank_log = "tests/test_data/outflankc2_logs/ldapsearchbof/beacon_2052.json"
+    noise_log = tmp_path / "beacon.json"
+    noise_log.write_text('10/18 12:00:00 UTC {"event_type": "task_response", '
+                         '"task": {"name": "ldapsearch", "response": "- a\\n--- b"}}\n')
+    prefilter = ContentPrefilter(ParsingPipelineFactory.create_pipeline().tool_parsers)
+
+    assert not prefilter.can_skip(OutflankDataStream(outflank_log))
+    assert prefilter.can_skip(OutflankDataStream(str(noise_log)))
+
+def test_prefilter_decisions_change_with_the_file(tmp_path):
+    """Test that a decision isn't reused once the middle of a file is rewritten."""
+    noise_log = tmp_path / "keystrokes.log"
+    lines = ["keystrokes\n"] * ContentPrefilter.MIN_CACHED_SIZE
+    noise_log.write_text("".join(lines))
+    parsers = ParsingPipelineFactory.create_pipeline().tool_parsers
+
+    prefilter = ContentPrefilter(parsers, str(tmp_path))
+    assert prefilter.can_skip(FileDataStream(str(noise_log)))
+    prefilter.save()
+
+    # same size, first and last blocks unchanged
+    lines[len(lines) // 2] = "-" * 10 + "\n"
+    noise_log.write_text("".join(lines))
+    os.utime(noise_log, ns=(0, os.stat(noise_log).st_mtime_ns + 1))
+
+    assert not ContentPrefilter(parsers, str(tmp_path)).can_skip(FileDataStream(str(noise_log)))
@@ -1,4 +1,6 @@
 from tests.test_data import *
+from bofhound.local import LocalBroker
+from bofhound.local.models import LocalPrivilegedSession, LocalSession
 
 THOR_SID = "S-1-5-21-3719975868-1113416855-2416171545-1104"
 EARTH_DC_SID = "S-1-5-21-3719975868-1113416855-2416171545-1000"
@@ -29,3 +31,29 @@ def test_marvel_registry_sessions(marvel_adds):
     assert len(asgard_wrkstn_reg_sessions) == 1
     assert earth_dc_reg_sessions[0]["UserSID"] == THOR_SID
     assert asgard_wrkstn_reg_sessions[0]["UserSID"] == THOR_SID
+
+
+def test_sessions_for_ambiguous_username_use_netbios_domain(marvel_adds):
+    # a thor from another domain makes the sAMAccountName ambiguous
+    marvel_adds.import_object({
+        'objectclass': 'top, person, organizationalPerson, user',
+        'distinguishedname': 'CN=thor,CN=Users,DC=jotunheim,DC=local',
+        'objectsid': 'S-1-5-21-1111111111-2222222222-3333333333-1104',
+        'samaccountname': 'thor', 'samaccounttype': '805306368', 'name': 'thor',
+    })
+    earth_dc = marvel_adds.SID_MAP[EARTH_DC_SID]
+    asgard_wrkstn = marvel_adds.SID_MAP[ASGARD_WKSTN_SID]
+    earth_dc.privileged_sessions.clear()
+    asgard_wrkstn.sessions.clear()
+
+    broker = LocalBroker()
+    broker.privileged_sessions.add(LocalPrivilegedSession(
+        {"host": "earth-dc.marvel.local", "username": "thor", "domain": "MARVEL"}
+    ))
+    broker.sessions.add(LocalSession(
+        {"user": "thor", "computername": "ASGARD-WRKSTN", "computerdomain": "MARVEL"}
+    ))
+    marvel_adds.process_local_objects(broker)
+
+    assert [s["UserSID"] for s in earth_dc.privileged_sessions] == [THOR_SID]
+    assert [s["UserSID"] for s in asgard_wrkstn.sessions] == [THOR_SID]
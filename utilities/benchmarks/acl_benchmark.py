@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Benchmark ACL parsing in ADDS.process, serially and in worker processes."""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# pylint: disable=wrong-import-position
+from bofhound.ad import ADDS
+from bofhound.parsers import ParsingPipelineFactory, ObjectType
+from bofhound.parsers.data_sources import FileDataSource
+from synthetic_forest import write_synthetic_log
+
+OBJECTS = 5000
+
+
+def build_adds(input_path):
+    """Import every LDAP object in the input into a new ADDS."""
+    ad = ADDS()
+    pipeline = ParsingPipelineFactory.create_pipeline()
+    pipeline.register_sink(ObjectType.LDAP_OBJECT, ad.import_object)
+    pipeline.process_data_source(FileDataSource(input_path))
+    return ad
+
+
+def all_objects(ad):
+    """Objects process() parses the ACLs of, in the same order."""
+    return ad.users + ad.groups + ad.computers + ad.domains + ad.ous + ad.gpos + ad.containers \
+        + ad.aiacas + ad.rootcas + ad.enterprisecas + ad.certtemplates + ad.issuancepolicies \
+        + ad.ntauthstores
+
+
+def run_acls(ad, jobs):
+    """
+    Parse every ACL, returning the elapsed time and the relations found. With jobs 0
+    every descriptor is parsed again, without the cache shared between objects.
+    """
+    objects = all_objects(ad)
+    for object in objects:
+        object.Aces = []
+    start = time.perf_counter()
+    if jobs == 0:
+        sid_types = ad.get_sid_types()
+        for object in objects:
+            ad.parse_acl(object, sid_types)
+    elif jobs == 1:
+        ad.parse_acls(objects)
+    else:
+        ad.parse_acls_parallel(objects, jobs)
+    return time.perf_counter() - start, [(o.IsACLProtected, o.Aces) for o in objects]
+
+
+if __name__ == "__main__":
+    inputs = sys.argv[1:]
+    if not inputs:
+        synthetic_log = str(Path(tempfile.mkdtemp()) / "beacon_synthetic.log")
+        write_synthetic_log(synthetic_log, users=OBJECTS * 7 // 10,
+                            computers=OBJECTS * 2 // 10, groups=OBJECTS // 20,
+                            ous=OBJECTS // 50)
+        inputs = [synthetic_log]
+
+    job_counts = sorted({1, 2, os.cpu_count() or 1})
+    for input_path in inputs:
+        ad = build_adds(input_path)
+        print(f"\nACLs: {input_path} ({len(all_objects(ad))} objects, {os.cpu_count()} cores)")
+        print("-" * 50)
+        uncached_seconds, expected = run_acls(ad, 0)
+        print(f"{'uncached':>10}: {uncached_seconds:8.3f}s")
+        serial_seconds, relations = run_acls(ad, 1)
+        print(f"{'serial':>10}: {serial_seconds:8.3f}s  ({uncached_seconds / serial_seconds:.2f}x, "
+              f"{'identical' if relations == expected else 'DIFFERENT'})")
+        for jobs in job_counts[1:]:
+            seconds, relations = run_acls(ad, jobs)
+            print(f"{jobs:>5} jobs: {seconds:8.3f}s  ({uncached_seconds / seconds:.2f}x, "
+                  f"{'identical' if relations == expected else 'DIFFERENT'})")
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""Benchmark how ADDS processing steps scale with the number of objects."""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# pylint: disable=wrong-import-position
+from bofhound.ad import ADDS
+from bofhound.ad.models import BloodHoundObject
+from bofhound.local import LocalBroker
+from bofhound.local.models import LocalGroupMembership, LocalPrivilegedSession, LocalSession
+from bofhound.parsers import ParsingPipelineFactory, ObjectType
+from bofhound.parsers.data_sources import FileDataSource
+from synthetic_forest import write_synthetic_log
+
+SIZES = [1000, 10000, 100000]
+
+
+def build_adds(objects):
+    """
+    Import a synthetic forest of roughly the given number of objects, without ACLs.
+    OUs are nested four to a parent.
+    """
+    log_path = str(Path(tempfile.mkdtemp()) / "beacon_synthetic.log")
+    write_synthetic_log(
+        log_path, users=objects * 7 // 10, computers=objects * 2 // 10,
+        groups=objects // 20, ous=objects // 50, with_acls=False, ou_branching=4
+    )
+    ad = ADDS()
+    pipeline = ParsingPipelineFactory.create_pipeline()
+    pipeline.register_sink(ObjectType.LDAP_OBJECT, ad.import_object)
+    pipeline.process_data_source(FileDataSource(log_path))
+    return ad
+
+
+def all_objects(ad):
+    """Objects process() walks, in the same order."""
+    return ad.users + ad.groups + ad.computers + ad.domains + ad.ous + ad.gpos + ad.containers \
+        + ad.aiacas + ad.rootcas + ad.enterprisecas + ad.certtemplates + ad.issuancepolicies \
+        + ad.ntauthstores
+
+
+def linear_calculate_contained(ad, object):
+    """Previous behaviour, every container, unknown object, OU and domain is scanned."""
+    if object._entry_type == "Domain":
+        return
+    dn = object.Properties['distinguishedname']
+    contained_dn = dn[dn.find(',') + 1:]
+    match contained_dn[0:2]:
+        case "CN":
+            for cn in ad.containers:
+                if cn.Properties["distinguishedname"] == contained_dn:
+                    object.ContainedBy = {"ObjectIdentifier": cn.ObjectIdentifier,
+                                          "ObjectType": "Container"}
+            for obj in ad.unknown_objects:
+                if str(obj.get('distinguishedname')).upper() == contained_dn:
+                    object.ContainedBy = {"ObjectIdentifier": obj.get("objectguid").upper(),
+                                          "ObjectType": "Container"}
+        case "OU":
+            for ou in ad.ous:
+                if ou.Properties["distinguishedname"] == contained_dn:
+                    object.ContainedBy = {"ObjectIdentifier": ou.ObjectIdentifier,
+                                          "ObjectType": "OU"}
+        case "DC":
+            for domain in ad.domains:
+                if domain.Properties["distinguishedname"] == contained_dn:
+                    object.ContainedBy = {"ObjectIdentifier": domain.ObjectIdentifier,
+                                          "ObjectType": "Domain"}
+
+
+def indexed_containment(ad, objects):
+    """Containment the way process() resolves it now."""
+    ad.build_parent_maps()
+    for object in objects:
+        ad.calculate_contained(object)
+
+
+def linear_containment(ad, objects):
+    """Containment resolved by scanning the object lists."""
+    for object in objects:
+        linear_calculate_contained(ad, object)
+
+
+def _reset_ou_members(ad):
+    for container in ad.ous + ad.domains:
+        container.ChildObjects = []
+
+
+def linear_ou_members(ad, objects):
+    """
+    Previous behaviour, each object's OU is found by scanning every OU, and affected
+    objects are gathered by scanning every OU for each child OU.
+    """
+    _reset_ou_members(ad)
+
+    def find_ou(target_dn):
+        for ou in ad.ous:
+            if ou.Properties["distinguishedname"] == target_dn:
+                return ou
+        return None
+
+    for item, object_type in [(user, "User") for user in ad.users] \
+            + [(computer, "Computer") for computer in ad.computers]:
+        dn = item.Properties["distinguishedname"]
+        if "OU=" in dn:
+            ou = find_ou("OU=" + dn.split("OU=", 1)[1])
+            if ou is not None:
+                ou.add_ou_member(item, object_type)
+    for nested_ou in ad.ous:
+        dn = nested_ou.Properties["distinguishedname"]
+        if len(dn.split("OU=")) > 2:
+            parent = find_ou("OU=" + dn.split("OU=", 2)[2])
+        else:
+            parent = ad.domains[0]
+        if parent is not None:
+            parent.add_ou_member(nested_ou, "OU")
+
+    sorted_ous = sorted(ad.ous, key=lambda x: len(x.Properties['distinguishedname']), reverse=True)
+    for ou in sorted_ous + ad.domains:
+        affectedcomputers = []
+        affectedusers = []
+        for childobject in ou.ChildObjects:
+            match childobject["ObjectType"]:
+                case "Computer":
+                    affectedcomputers.append(childobject)
+                case "User":
+                    affectedusers.append(childobject)
+                case "OU":
+                    for childou in sorted_ous:
+                        if childou.ObjectIdentifier == childobject["ObjectIdentifier"]:
+                            affectedcomputers = affectedcomputers + childou.AffectedComputers
+                            affectedusers = affectedusers + childou.AffectedUsers
+        ou.AffectedComputers = affectedcomputers
+        ou.AffectedUsers = affectedusers
+
+
+def tree_ou_members(ad, objects):
+    """OU membership the way process() resolves it now."""
+    _reset_ou_members(ad)
+    ad.build_parent_maps()
+    ad.resolve_ou_members()
+
+
+def build_broker(ad):
+    """A privileged session, net session and local admin for every tenth computer."""
+    broker = LocalBroker()
+    for i, computer in enumerate(ad.computers[::10]):
+        host = computer.Properties["dnshostname"]
+        user = ad.users[i % len(ad.users)].Properties["samaccountname"]
+        broker.privileged_sessions.add(LocalPrivilegedSession(
+            {"host": host, "username": user, "domain": "WINDOMAIN"}))
+        broker.sessions.add(LocalSession({"ptr": host, "user": user}))
+        broker.local_group_memberships.add(LocalGroupMembership({
+            "host": host, "group": "Administrators", "member": f"WINDOMAIN\\{user}",
+            "membersid": ad.users[i % len(ad.users)].ObjectIdentifier, "membersidtype": "User",
+        }))
+    return broker
+
+
+def _reset_local_objects(ad):
+    for computer in ad.computers:
+        computer.privileged_sessions = []
+        computer.sessions = []
+        computer.local_group_members = {}
+
+
+def linear_local_objects(ad, objects):
+    """
+    Previous behaviour, every session is checked against every computer, and the
+    users are scanned for each match.
+    """
+    _reset_local_objects(ad)
+    broker = build_broker(ad)
+    for computer in ad.computers:
+        for session in list(broker.privileged_sessions) + list(broker.sessions):
+            host_fqdn = getattr(session, "host_fqdn", None) or session.ptr_record
+            user = getattr(session, "user", None) or session.username
+            if not computer.matches_dnshostname(host_fqdn):
+                continue
+            match_users = [u for u in ad.users
+                           if u.Properties.get('samaccountname', '').lower() == user.lower()]
+            if len(match_users) == 1:
+                computer.add_session(match_users[0].ObjectIdentifier, "session")
+        for member in broker.local_group_memberships:
+            if computer.matches_dnshostname(member.host_fqdn):
+                computer.add_local_group_member(member.member_sid, member.member_sid_type,
+                                                member.group)
+
+
+def indexed_local_objects(ad, objects):
+    """Sessions and local groups the way process_local_objects() resolves them now."""
+    _reset_local_objects(ad)
+    ad.process_local_objects(build_broker(ad))
+
+
+def _set_delegation_targets(ad):
+    """Every tenth computer delegates to the next computer by FQDN and short hostname."""
+    for i, computer in enumerate(ad.computers[::10]):
+        target = ad.computers[(i * 10 + 1) % len(ad.computers)].Properties["dnshostname"]
+        computer.AllowedToDelegate = [f"cifs/{target}", f"http/{target.split('.')[0]}"]
+
+
+def linear_delegation_targets(ad, objects):
+    """Previous behaviour, SID_MAP is scanned for each delegation target's name."""
+    _set_delegation_targets(ad)
+    for computer in ad.computers:
+        resolved = []
+        for host in computer.AllowedToDelegate:
+            target = host.split('/')[1].lower()
+            for sid, entry in ad.SID_MAP.items():
+                if entry.Properties["name"].lower() == target:
+                    resolved.append({"ObjectIdentifier": sid, "ObjectType": entry._entry_type})
+                    break
+        computer.AllowedToDelegate = resolved
+
+
+def indexed_delegation_targets(ad, objects):
+    """Delegation targets the way resolve_delegation_targets() resolves them now."""
+    _set_delegation_targets(ad)
+    ad.resolve_delegation_targets()
+
+
+def _set_dns_nodes(ad):
+    """An A record for every computer and as many records that aren't computers."""
+    ad.DNSNODE_MAP = {}
+    for i, computer in enumerate(ad.computers):
+        ad.DNSNODE_MAP[computer.Properties["dnshostname"].lower()] = {
+            f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"
+        }
+        ad.DNSNODE_MAP[f"printer{i}.windomain.local"] = {f"172.16.{i >> 8 & 255}.{i & 255}"}
+
+
+def linear_ip_addresses(ad, objects):
+    """Previous behaviour, the computers are scanned twice for every DNS node."""
+    _set_dns_nodes(ad)
+    for host_fqdn in ad.DNSNODE_MAP:
+        computer_found = False
+        for computer in ad.computers:
+            if computer.matches_dnshostname(host_fqdn):
+                computer_found = True
+                break
+        if not computer_found:
+            host_name, _, host_domain = host_fqdn.partition(".")
+            domain_sid = ad.DOMAIN_MAP.get(BloodHoundObject.get_dn(host_domain.upper()), None)
+            if domain_sid is not None:
+                for computer in ad.computers:
+                    if computer.matches_samaccountname(host_name) and \
+                            computer.ObjectIdentifier.startswith(domain_sid):
+                        computer_found = True
+                        break
+        if computer_found:
+            computer.ipaddresses = list(ad.DNSNODE_MAP[host_fqdn])
+
+
+def indexed_ip_addresses(ad, objects):
+    """IP addresses the way assign_ip_addresses() assigns them now."""
+    _set_dns_nodes(ad)
+    ad.assign_ip_addresses()
+
+
+# (name, previous behaviour, current behaviour, largest size the previous one is run at)
+STEPS = [
+    ("containment", linear_containment, indexed_containment, 100000),
+    ("ou members", linear_ou_members, tree_ou_members, 100000),
+    ("local objects", linear_local_objects, indexed_local_objects, 10000),
+    ("delegation", linear_delegation_targets, indexed_delegation_targets, 10000),
+    ("ip addresses", linear_ip_addresses, indexed_ip_addresses, 10000),
+]
+
+
+def timed(function, *args):
+    """Return the elapsed time of a call."""
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in sys.argv[1:]] or SIZES
+
+    for size in sizes:
+        ad = build_adds(size)
+        objects = all_objects(ad)
+        print(f"\n{len(objects)} objects")
+        print("-" * 50)
+        for name, linear, indexed, linear_limit in STEPS:
+            new = timed(indexed, ad, objects)
+            # Scanning is quadratic, past the limit it takes minutes
+            old = timed(linear, ad, objects) if size <= linear_limit else float('nan')
+            print(f"{name:>14}: linear {old:8.3f}s  indexed {new:8.3f}s  "
+                  f"({new / len(objects) * 1e6:.2f}us/object)")
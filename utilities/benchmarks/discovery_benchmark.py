@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Benchmark finding log files in a large Cobalt Strike style log tree."""
+import glob
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# pylint: disable=wrong-import-position
+from bofhound.parsers.data_sources import FileDataSource
+
+
+def make_log_tree(root, days=100, hosts=20, beacons=5):
+    """
+    Write an empty log tree laid out like Cobalt Strike's: one directory per day,
+    one per host below it, holding beacon, keystroke and screenshot logs.
+    """
+    for day in range(days):
+        day_dir = Path(root) / f"26{1 + day // 28:02d}{1 + day % 28:02d}"
+        for host in range(hosts):
+            host_dir = day_dir / f"10.0.{day}.{host}"
+            (host_dir / "keystrokes").mkdir(parents=True, exist_ok=True)
+            for beacon in range(beacons):
+                (host_dir / f"beacon_{day}{host}{beacon}.log").touch()
+                (host_dir / "keystrokes" / f"keystrokes_{day}{host}{beacon}.txt").touch()
+            (host_dir / "events.log").touch()
+    return root
+
+
+def glob_discovery(root):
+    """Previous behaviour, a recursive glob per pattern plus a stat per file to sort."""
+    files = glob.glob(f"{root}/**/beacon*.log", recursive=True)
+    files.sort(key=os.path.getmtime)
+    # main() listed the files once to decide on the fallback, then again to parse
+    files = glob.glob(f"{root}/**/beacon*.log", recursive=True)
+    files.sort(key=os.path.getmtime)
+    return files
+
+
+def scandir_discovery(root, since=None):
+    """One os.scandir walk collecting stat results and the fallback pattern."""
+    data_source = FileDataSource(root, "beacon*.log", fallback_pattern="*.log", since=since)
+    return [file_path for file_path, _ in data_source.find_files()]
+
+
+def best_time(function, *args, iterations=5):
+    """Return the result and best elapsed time of several calls."""
+    best = None
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+if __name__ == "__main__":
+    log_root = sys.argv[1] if len(sys.argv) > 1 else make_log_tree(tempfile.mkdtemp())
+
+    print(f"Discovery: {log_root}")
+    print("-" * 50)
+    old_files, old_time = best_time(glob_discovery, log_root)
+    new_files, new_time = best_time(scandir_discovery, log_root)
+    assert old_files == new_files
+    since_files, since_time = best_time(scandir_discovery, log_root, date(2026, 3, 1))
+    print(f"   glob x2: {old_time:.3f}s ({len(old_files)} files)")
+    print(f"   scandir: {new_time:.3f}s ({len(new_files)} files)")
+    print(f"   --since: {since_time:.3f}s ({len(since_files)} files)")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark peak memory of parsing and importing LDAP objects. With --objects N only a
+synthetic forest of N objects is imported (e.g. --objects 500000), streamed and without
+security descriptors so that it fits in memory. --memberships M makes each of its users
+a member of M groups (e.g. --objects 100000 --memberships 50).
+"""
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# pylint: disable=wrong-import-position
+from bofhound.ad import ADDS
+from bofhound.parsers import ParsingPipelineFactory, ObjectType
+from bofhound.parsers.data_sources import FileDataSource
+from synthetic_forest import write_synthetic_log
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_import(input_path, mode):
+    """Parse and import the input into ADDS, either collected first or streamed."""
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+
+    ad = ADDS()
+    pipeline = ParsingPipelineFactory.create_pipeline()
+    if mode == "stream":
+        pipeline.register_sink(ObjectType.LDAP_OBJECT, ad.import_object)
+        result = pipeline.process_data_source(FileDataSource(input_path))
+    else:
+        result = pipeline.process_data_source(FileDataSource(input_path))
+        ad.import_objects(result.get_ldap_objects())
+
+    return {
+        "objects": result.get_count(ObjectType.LDAP_OBJECT),
+        "seconds": time.perf_counter() - start,
+        "peak_rss_mb": peak_rss_mb(),
+        "peak_rss_growth_mb": peak_rss_mb() - baseline,
+    }
+
+
+def run_import_subprocess(input_path, mode):
+    """Peak RSS only grows, so each mode is measured in its own process."""
+    output = subprocess.run(
+        [sys.executable, __file__, "--mode", mode, input_path],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--mode":
+        print(json.dumps(run_import(sys.argv[3], sys.argv[2])))
+        sys.exit(0)
+
+    inputs = sys.argv[1:]
+    options = {"--objects": None, "--memberships": 1}
+    while len(inputs) >= 2 and inputs[0] in options:
+        options[inputs[0]] = int(inputs[1])
+        inputs = inputs[2:]
+    objects = options["--objects"]
+    if not inputs:
+        synthetic_log = str(Path(tempfile.mkdtemp()) / "beacon_synthetic.log")
+        if objects:
+            write_synthetic_log(synthetic_log, users=objects * 8 // 10, computers=objects // 5,
+                                groups=objects // 100, ous=objects // 1000, with_acls=False,
+                                memberships=options["--memberships"])
+            inputs = [synthetic_log]
+        else:
+            write_synthetic_log(synthetic_log, users=40000, computers=10000, groups=500, ous=50)
+            inputs = ["tests/test_data/ldapsearchbof_logs/beacon_2052.log", synthetic_log]
+
+    for input_path in inputs:
+        print(f"\nImport: {input_path}")
+        print("-" * 50)
+        for mode in ("stream",) if objects else ("collect", "stream"):
+            results = run_import_subprocess(input_path, mode)
+            print(f"{mode:>8}: peak RSS {results['peak_rss_mb']:.1f} MB "
+                  f"(+{results['peak_rss_growth_mb']:.1f} MB while importing "
+                  f"{results['objects']} objects, {results['seconds']:.2f}s)")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Benchmark line throughput of the parsing pipeline."""
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# pylint: disable=wrong-import-position
+from bofhound.parsers import ParsingPipelineFactory, ParserType
+from bofhound.parsers import parsing_pipeline
+from bofhound.parsers.data_sources import FileDataSource, FileDataStream
+from bofhound.parsers.line_router import LineRouter
+from bofhound.parsers.prefilter import ContentPrefilter
+
+DEFAULT_INPUTS = [
+    "tests/test_data/ldapsearchbof_logs/beacon_2052.log",
+    "tests/test_data/brc4_ldap_sentinel_logs/badger_no_acl_1030_objects.log",
+    "tests/test_data/ldapsearchbof_logs",
+]
+
+
+class TextFileDataStream(FileDataStream):
+    """Previous behaviour, every line is decoded in strict UTF-8 text mode."""
+
+    def lines(self):
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield line.rstrip('\n\r')
+
+    def feed(self, router):
+        router.route_lines(self.lines())
+
+
+def make_noisy_log(source_path, output_path, noise_lines=200000):
+    """
+    Write a copy of a log with large blocks of unrelated beacon output (keystrokes,
+    process listings) between tool outputs, as found in long running beacon logs.
+    """
+    noise = "".join(
+        f"10/18 12:{i % 60:02d}:00 UTC [output]\nsvchost.exe\t{i}\t{i % 977}\tx64\t"
+        f"NT AUTHORITY\\SYSTEM\t0\n"
+        for i in range(noise_lines // 2)
+    )
+    with open(source_path, 'r', encoding='utf-8') as src, \
+            open(output_path, 'w', encoding='utf-8') as out:
+        out.write(noise)
+        for line in src:
+            out.write(line)
+            if line.lower().startswith("retrieved "):
+                out.write(noise)
+
+
+def make_keystroke_log(output_path, lines=2000000):
+    """Write a log of keystroke output only, which contains no tool output at all."""
+    with open(output_path, 'w', encoding='utf-8') as out:
+        for i in range(lines // 2):
+            out.write(f"10/18 12:{i % 60:02d}:00 UTC [output]\n- typed {i} [enter]\n")
+
+
+class NoPrefilter(ContentPrefilter):
+    """Previous behaviour, every file is routed line by line."""
+
+    def can_skip(self, data_stream):
+        return False
+
+
+def run_prefilter_benchmark(input_path, prefilter_type):
+    """Parse the input with the given prefilter and return the elapsed time."""
+    parsing_pipeline.ContentPrefilter = prefilter_type
+    try:
+        start = time.perf_counter()
+        ParsingPipelineFactory.create_pipeline().process_data_source(FileDataSource(input_path))
+        return time.perf_counter() - start
+    finally:
+        parsing_pipeline.ContentPrefilter = ContentPrefilter
+
+
+def fan_out(parsers, lines):
+    """Previous behaviour, every line is sent to every parser."""
+    for line in lines:
+        filtered_line = line.rstrip('\n\r')
+        for parser in parsers:
+            parser.process_line(filtered_line)
+
+
+def routed(parsers, lines):
+    """Lines are only sent to parsers that could act on them."""
+    LineRouter(parsers).route_lines(lines)
+
+
+def run_dispatch_benchmark(input_path, dispatch, iterations=5):
+    """Parse the file with a fresh pipeline per run and return lines/sec of the best run."""
+    with open(input_path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+
+    best = None
+    records = 0
+    for _ in range(iterations):
+        parsers = ParsingPipelineFactory.create_pipeline().tool_parsers
+        start = time.perf_counter()
+        dispatch(parsers, lines)
+        records = sum(len(parser.get_results()) for parser in parsers)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return {"lines": len(lines), "records": records, "seconds": best, "lps": len(lines) / best}
+
+
+def run_stream_benchmark(input_path, stream_type, iterations=3):
+    """Run the whole pipeline over an input and return the best time and peak RSS."""
+    if Path(input_path).is_dir():
+        size = sum(f.stat().st_size for f in Path(input_path).glob("**/*.log"))
+    else:
+        size = Path(input_path).stat().st_size
+    parser_type = ParserType.BRC4 if "brc4" in input_path else ParserType.LdapsearchBof
+
+    best = None
+    records = 0
+    for _ in range(iterations):
+        pipeline = ParsingPipelineFactory.create_pipeline(parser_type)
+        start = time.perf_counter()
+        result = pipeline.process_data_source(FileDataSource(input_path, stream_type=stream_type))
+        elapsed = time.perf_counter() - start
+        records = sum(len(objects) for objects in result.objects_by_type.values())
+        best = elapsed if best is None else min(best, elapsed)
+
+    return {
+        "records": records,
+        "seconds": best,
+        "mbps": size / best / 1024 / 1024,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def stream_benchmark_subprocess(input_path, variant):
+    """Peak RSS only grows, so each stream variant is measured in its own process."""
+    output = subprocess.run(
+        [sys.executable, __file__, "--stream-variant", variant, input_path],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--stream-variant":
+        stream_types = {"text": TextFileDataStream, "mmap": FileDataStream}
+        print(json.dumps(run_stream_benchmark(sys.argv[3], stream_types[sys.argv[2]])))
+        sys.exit(0)
+
+    inputs = sys.argv[1:] or DEFAULT_INPUTS
+
+    print(f"Line dispatch: {inputs[0]}")
+    print("-" * 50)
+    baseline = run_dispatch_benchmark(inputs[0], fan_out)
+    optimized = run_dispatch_benchmark(inputs[0], routed)
+    for name, results in (("fan-out", baseline), ("routed", optimized)):
+        print(f"{name:>8}: {results['lps']:>12,.0f} lines/sec "
+              f"({results['lines']} lines, {results['records']} records, "
+              f"{results['seconds']:.3f}s)")
+    print(f" speedup: {optimized['lps'] / baseline['lps']:.2f}x")
+
+    noisy_log = str(Path(tempfile.mkdtemp()) / "beacon_noisy.log")
+    make_noisy_log(inputs[0], noisy_log)
+
+    for input_path in inputs + [noisy_log]:
+        print(f"\nData stream: {input_path}")
+        print("-" * 50)
+        for variant in ("text", "mmap"):
+            results = stream_benchmark_subprocess(input_path, variant)
+            print(f"{variant:>8}: {results['mbps']:>8.1f} MB/s, "
+                  f"peak RSS {results['peak_rss_mb']:.1f} MB "
+                  f"({results['records']} records, {results['seconds']:.3f}s)")
+
+    keystroke_log = str(Path(tempfile.mkdtemp()) / "keystrokes.log")
+    make_keystroke_log(keystroke_log)
+    print(f"\nPrefilter: {keystroke_log} "
+          f"({Path(keystroke_log).stat().st_size / 1024 / 1024:.0f} MB, no tool output)")
+    print("-" * 50)
+    for name, prefilter_type in (("routed", NoPrefilter), ("prefilter", ContentPrefilter)):
+        print(f"{name:>9}: {run_prefilter_benchmark(keystroke_log, prefilter_type):.3f}s")
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark bofhound's security descriptor decoder against bloodhound-python's
+SecurityDescriptor, over every nTSecurityDescriptor in the test logs (or the logs
+given as arguments). The ACE rules are run on the output of both decoders and the
+relations must be identical for every descriptor and entry type.
+"""
+import base64
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# pylint: disable=wrong-import-position
+from bloodhound.enumeration.acls import SecurityDescriptor
+from bofhound.ad import ADDS, acls
+from bofhound.ad.security_descriptor import decode_security_descriptor, format_sid
+from bofhound.parsers import ParsingPipelineFactory
+from bofhound.parsers.data_sources import FileDataSource
+
+TEST_DATA = Path(__file__).resolve().parents[2] / "tests" / "test_data"
+ENTRY_TYPES = ["user", "computer", "group", "domain", "ou", "gpo", "container",
+               "pki template", "enterpriseca"]
+ROUNDS = 20
+
+
+def legacy_decode(value):
+    """decode_security_descriptor's output, built from bloodhound-python's objects"""
+    sd = SecurityDescriptor(BytesIO(value))
+    owner = str(sd.owner_sid) if sd.owner_sid != b'' else None
+    aces = []
+    for ace in sd.dacl.aces:
+        if ace.acedata is None:
+            aces.append((ace.ace.AceType, ace.ace.AceFlags, 0, None, None, ""))
+            continue
+        data = ace.acedata.data
+        object_type = inherited_object_type = None
+        if ace.ace.AceType in (0x05, 0x06):
+            if data.Flags & 1:
+                object_type = data.ObjectType
+            if data.Flags & 2:
+                inherited_object_type = data.InheritedObjectType
+        aces.append((ace.ace.AceType, ace.ace.AceFlags, data.Mask, object_type,
+                     inherited_object_type, str(ace.acedata.sid)))
+    # bloodhound-python's has_control indexes the binary string of the control flags
+    control = 0x1000 if sd.has_control(sd.PD) else 0
+    return control | 0x8000, owner, aces
+
+
+def new_decode(value):
+    """decode_security_descriptor with the SIDs formatted, to compare with legacy_decode"""
+    control, owner, aces = decode_security_descriptor(value)
+    return (control & 0x1000 | 0x8000, format_sid(owner) if owner is not None else None,
+            [ace[:5] + (format_sid(ace[5]) if ace[5] else "",) for ace in aces])
+
+
+def decoded(decoder, value):
+    """The decoder's output, or None when it can't decode the descriptor"""
+    try:
+        return decoder(value)
+    except Exception: # pylint: disable=broad-except
+        return None
+
+
+def collect_descriptors(paths):
+    """Every distinct security descriptor in the logs, and the ADDS they import into"""
+    ad = ADDS()
+    descriptors = {}
+    for path in paths:
+        pipeline = ParsingPipelineFactory.create_pipeline()
+        try:
+            records = pipeline.process_data_source(FileDataSource(str(path))).get_ldap_objects()
+        except Exception: # pylint: disable=broad-except
+            continue
+        for record in records:
+            ad.import_object(record)
+            value = record.get("ntsecuritydescriptor")
+            if not value or value in descriptors:
+                continue
+            try:
+                descriptors[value] = base64.b64decode(value)
+            except ValueError:
+                continue
+    return ad, list(descriptors.values())
+
+
+def time_decoder(decoder, descriptors):
+    """Seconds to decode every descriptor ROUNDS times"""
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for value in descriptors:
+            decoded(decoder, value)
+    return time.perf_counter() - start
+
+
+def relations(ad, descriptors, legacy):
+    """Seconds to run the ACE rules over every descriptor and entry type, and the result"""
+    patches = [mock.patch.object(acls, "decode_security_descriptor", legacy_decode),
+               mock.patch.object(acls, "format_sid", str)] if legacy else []
+    for patch in patches:
+        patch.start()
+    try:
+        rules = acls.AceRules(ad.ObjectTypeGuidMap)
+        results = []
+        start = time.perf_counter()
+        for value in descriptors:
+            for entry_type in ENTRY_TYPES:
+                try:
+                    results.append(acls.parse_security_descriptor(
+                        value, entry_type, True, rules))
+                except Exception: # pylint: disable=broad-except
+                    results.append(None)
+        return time.perf_counter() - start, results
+    finally:
+        for patch in patches:
+            patch.stop()
+
+
+if __name__ == "__main__":
+    inputs = sys.argv[1:] or sorted(p for p in TEST_DATA.rglob("*")
+                                    if p.is_file() and p.suffix in (".log", ".json", ""))
+    ad, descriptors = collect_descriptors(inputs)
+    print(f"\nSecurity descriptors: {len(descriptors)} distinct, {ROUNDS} rounds")
+    print("-" * 50)
+
+    for value in descriptors:
+        if decoded(new_decode, value) != decoded(legacy_decode, value):
+            print("Decoded ACEs differ from bloodhound-python's")
+            sys.exit(1)
+    legacy_seconds = time_decoder(legacy_decode, descriptors)
+    new_seconds = time_decoder(new_decode, descriptors)
+    print(f"{'decode':>10}: {legacy_seconds:8.3f}s -> {new_seconds:8.3f}s "
+          f"({legacy_seconds / new_seconds:.2f}x, identical)")
+
+    legacy_seconds, expected = relations(ad, descriptors, legacy=True)
+    new_seconds, result = relations(ad, descriptors, legacy=False)
+    print(f"{'relations':>10}: {legacy_seconds:8.3f}s -> {new_seconds:8.3f}s "
+          f"({legacy_seconds / new_seconds:.2f}x, "
+          f"{'identical' if result == expected else 'DIFFERENT'})")
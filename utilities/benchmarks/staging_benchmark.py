@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark importing a log where every object is returned by several queries, building
+a model per occurrence and merging them (import_object) against merging the raw
+attributes first and building each model once (stage_object). Both are compared with
+importing the original log, where each object is returned once.
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# pylint: disable=wrong-import-position
+from bofhound.ad import ADDS
+from bofhound.ad.helpers import PropertiesLevel
+from bofhound.parsers import ParsingPipelineFactory
+from bofhound.parsers.data_sources import FileDataSource
+from synthetic_forest import write_fragmented_log, write_synthetic_log
+
+OBJECTS = 10000
+COPIES = 3
+
+
+def run_import(records, staged):
+    """Import the records, returning the elapsed time and the processed ADDS"""
+    ad = ADDS()
+    start = time.perf_counter()
+    if staged:
+        ad.import_objects(records)
+    else:
+        for record in records:
+            ad.import_object(record)
+    seconds = time.perf_counter() - start
+    ad.process()
+    return seconds, ad
+
+
+def output(ad):
+    """Every object's JSON, to compare the two imports"""
+    objects = ad.users + ad.groups + ad.computers + ad.domains + ad.ous + ad.gpos \
+        + ad.containers + ad.aiacas + ad.rootcas + ad.enterprisecas + ad.certtemplates \
+        + ad.issuancepolicies + ad.ntauthstores
+    return [obj.to_json(PropertiesLevel.All) for obj in objects]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        template = sys.argv[1]
+    else:
+        template = str(Path(tempfile.mkdtemp()) / "beacon_synthetic.log")
+        write_synthetic_log(template, users=OBJECTS * 7 // 10, computers=OBJECTS * 2 // 10,
+                            groups=OBJECTS // 20, ous=OBJECTS // 50)
+    pipeline = ParsingPipelineFactory.create_pipeline()
+    expected = output(run_import(
+        pipeline.process_data_source(FileDataSource(template)).get_ldap_objects(), staged=False)[1])
+
+    fragmented_log = str(Path(tempfile.mkdtemp()) / "beacon_fragmented.log")
+    write_fragmented_log(fragmented_log, template, COPIES)
+    pipeline = ParsingPipelineFactory.create_pipeline()
+    records = pipeline.process_data_source(FileDataSource(fragmented_log)).get_ldap_objects()
+
+    print(f"\nImport: {template} as {len(records)} fragments ({COPIES} copies, 3 queries)")
+    print("-" * 50)
+    merged_seconds, merged = run_import(records, staged=False)
+    print(f"{'merged':>10}: {merged_seconds:8.3f}s  "
+          f"({'same as' if output(merged) == expected else 'differs from'} the original log)")
+    staged_seconds, staged = run_import(records, staged=True)
+    print(f"{'staged':>10}: {staged_seconds:8.3f}s  ({merged_seconds / staged_seconds:.2f}x, "
+          f"{'same as' if output(staged) == expected else 'differs from'} the original log)")
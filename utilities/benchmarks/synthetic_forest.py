@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Write synthetic ldapsearch BOF logs of any size for benchmarking."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# pylint: disable=wrong-import-position
+from bofhound.parsers import ParsingPipelineFactory
+from bofhound.parsers.data_sources import FileDataSource
+
+TEMPLATE_LOG = "tests/test_data/ldapsearchbof_logs/beacon_2052.log"
+DOMAIN_DN = "DC=windomain,DC=local"
+DOMAIN_SID = "S-1-5-21-3674311734-1768984491-1162443153"
+
+
+def _templates():
+    """Pick a domain, OU, user, computer and group record from the template log."""
+    pipeline = ParsingPipelineFactory.create_pipeline()
+    records = pipeline.process_data_source(FileDataSource(TEMPLATE_LOG)).get_ldap_objects()
+
+    templates = {}
+    for record in records:
+        account_type = record.get("samaccounttype")
+        object_class = record.get("objectclass", "")
+        if account_type == "805306368" and "ntsecuritydescriptor" in record:
+            templates.setdefault("user", record)
+        elif account_type == "805306369" and "ntsecuritydescriptor" in record:
+            templates.setdefault("computer", record)
+        elif account_type == "268435456" and "ntsecuritydescriptor" in record:
+            templates.setdefault("group", record)
+        elif "organizationalUnit" in object_class and "ntsecuritydescriptor" in record:
+            templates.setdefault("ou", record)
+        elif object_class.startswith("top, domain,"):
+            templates.setdefault("domain", record)
+    return templates
+
+
+def _write_record(out, record, with_acls):
+    out.write("--------------------\n")
+    for key, value in record.items():
+        if key == "ntsecuritydescriptor" and not with_acls:
+            continue
+        out.write(f"{key}: {value}\n")
+
+
+def write_synthetic_log(path, users, computers=0, groups=0, ous=0, with_acls=True,
+                        ou_branching=None, memberships=1):
+    """
+    Write an ldapsearch BOF log with one domain and the requested number of users,
+    computers, groups and OUs, all with unique DNs and SIDs. Users and computers are
+    spread over the OUs and each user is a member of one group. OUs are all top level
+    unless ou_branching is given, then they form a tree with that many children per OU.
+    With memberships > 1 each user is a member of that many groups instead, listed in
+    both the user's memberOf and the groups' member attributes.
+    """
+    templates = _templates()
+    ous = max(ous, 1)
+    rid = 100000
+
+    def clone(kind, name, parent_dn, **extra):
+        nonlocal rid
+        rid += 1
+        record = dict(templates[kind])
+        prefix = "OU" if kind == "ou" else "CN"
+        record.update({
+            "distinguishedname": f"{prefix}={name},{parent_dn}",
+            "name": name,
+            "objectguid": f"{rid:08x}-0000-4000-8000-000000000000",
+        })
+        if kind == "ou":
+            record["ou"] = name
+            record.pop("objectsid", None)
+        else:
+            record.update({
+                "cn": name,
+                "samaccountname": f"{name}$" if kind == "computer" else name,
+                "objectsid": f"{DOMAIN_SID}-{rid}",
+            })
+        record.pop("memberof", None)
+        record.pop("member", None)
+        record.update(extra)
+        return record
+
+    with open(path, "w", encoding="utf-8") as out:
+        out.write("10/18 12:00:00 UTC [input] <neo> ldapsearch (objectclass=*)\n")
+        out.write("10/18 12:00:00 UTC [output]\nreceived output:\n")
+        total = 1
+        _write_record(out, templates["domain"], with_acls)
+
+        ou_dns = []
+        for i in range(ous):
+            parent_dn = ou_dns[(i - 1) // ou_branching] if ou_branching and i else DOMAIN_DN
+            record = clone("ou", f"SynthOU{i}", parent_dn)
+            ou_dns.append(record["distinguishedname"])
+            _write_record(out, record, with_acls)
+        group_dns = [f"CN=SynthGroup{i},{DOMAIN_DN}" for i in range(groups)]
+        # user i is a member of groups i to i + memberships - 1
+        user_groups = [[(i + k) % groups for k in range(min(memberships, groups))]
+                       for i in range(users)] if groups else []
+        members = [[] for _ in range(groups)]
+        if memberships > 1:
+            for i, indexes in enumerate(user_groups):
+                for index in indexes:
+                    members[index].append(f"CN=synthuser{i},{ou_dns[i % ous]}")
+        for i in range(groups):
+            extra = {"member": ", ".join(members[i])} if members[i] else {}
+            _write_record(out, clone("group", f"SynthGroup{i}", DOMAIN_DN, **extra), with_acls)
+        for i in range(users):
+            extra = {}
+            if group_dns:
+                extra["memberof"] = ", ".join(group_dns[index] for index in user_groups[i])
+            _write_record(out, clone("user", f"synthuser{i}", ou_dns[i % ous], **extra),
+                          with_acls)
+        for i in range(computers):
+            record = clone("computer", f"SYNTHPC{i}", ou_dns[i % ous],
+                           dnshostname=f"synthpc{i}.windomain.local")
+            _write_record(out, record, with_acls)
+
+        total += ous + groups + users + computers
+        out.write(f"\nretrieved {total} results total\n")
+
+    return path
+
+
+# Attributes every query returns, so each fragment can be told apart and classified
+FRAGMENT_KEYS = ("distinguishedname", "objectsid", "objectguid", "objectclass", "samaccounttype")
+
+
+def write_fragmented_log(path, template_log, copies=1):
+    """
+    Rewrite every record of template_log as three query results, the way operators
+    query users, then SPNs, then ACLs: all other attributes, serviceprincipalname and
+    memberof, then nTSecurityDescriptor. Each fragment also has the attributes in
+    FRAGMENT_KEYS. The whole log is repeated copies times.
+    """
+    pipeline = ParsingPipelineFactory.create_pipeline()
+    records = pipeline.process_data_source(FileDataSource(template_log)).get_ldap_objects()
+    queries = [("serviceprincipalname", "memberof"), ("ntsecuritydescriptor",)]
+
+    total = 0
+    with open(path, "w", encoding="utf-8") as out:
+        out.write("10/18 12:00:00 UTC [input] <neo> ldapsearch (objectclass=*)\n")
+        out.write("10/18 12:00:00 UTC [output]\nreceived output:\n")
+        for _ in range(copies):
+            fragments = [[], [], []]
+            for record in records:
+                common = {key: record[key] for key in FRAGMENT_KEYS if key in record}
+                fragments[0].append({key: value for key, value in record.items()
+                                     if not any(key in query for query in queries)})
+                for i, query in enumerate(queries, 1):
+                    fragment = {key: record[key] for key in query if key in record}
+                    if fragment:
+                        fragments[i].append({**common, **fragment})
+            for query in fragments:
+                for record in query:
+                    _write_record(out, record, True)
+                    total += 1
+        out.write(f"\nretrieved {total} results total\n")
+
+    return path
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(f"usage: {sys.argv[0]} OUTPUT_LOG USERS [COMPUTERS] [GROUPS] [OUS]")
+        sys.exit(1)
+    counts = [int(count) for count in sys.argv[2:6]]
+    write_synthetic_log(sys.argv[1], *counts)